@@ -0,0 +1,96 @@
+"""
+So sánh bộ nhớ và thời gian quét giữa dict lồng nhau và AttendanceStore.
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.attendance_store_bench --students 50000
+"""
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Tuple
+import argparse
+import random
+import time
+import tracemalloc
+
+from models.student import Student
+from services.attendance_store import AttendanceStore, StudentAttendanceView, CODE_BY_STATUS
+from utils.constants import ATTENDANCE_STATUS, SUBJECTS
+
+ABSENT = ("Vắng mặt", "Không phép")
+ABSENT_CODES = [CODE_BY_STATUS[status] for status in ABSENT]
+
+
+def build_records(students: int, sessions: int, seed: int = 42) -> List[Tuple[str, str, str, str]]:
+    """Sinh dữ liệu điểm danh giả lập (môn học, ngày, MSSV, trạng thái)"""
+    rng = random.Random(seed)
+    statuses = list(ATTENDANCE_STATUS.values())
+    weights = [80, 6, 8, 3, 3]
+    start = date(2024, 9, 2)
+    dates = [(start + timedelta(days=7 * i)).isoformat() for i in range(sessions)]
+    records = []
+    for i in range(students):
+        student_id = f"SV{i:07d}"
+        for subject in SUBJECTS:
+            for day in dates:
+                records.append((subject, day, student_id, rng.choices(statuses, weights)[0]))
+    return records
+
+
+def measure(label: str, build: Callable[[], object], scan: Callable[[object], int]) -> Dict[str, float]:
+    """Đo bộ nhớ khi dựng dữ liệu và thời gian đếm số buổi vắng của toàn bộ bản ghi"""
+    tracemalloc.start()
+    data = build()
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    scan(data)
+    elapsed = time.perf_counter() - started
+    print(f"{label:8} bộ nhớ: {memory / 1024 / 1024:8.1f} MB | quét: {elapsed:7.3f} s")
+    return {'memory': memory, 'scan': elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--students', type=int, default=10_000)
+    parser.add_argument('--sessions', type=int, default=45)
+    args = parser.parse_args()
+
+    records = build_records(args.students, args.sessions)
+    student_ids = [f"SV{i:07d}" for i in range(args.students)]
+
+    def build_dict() -> List[Student]:
+        roster = {sid: Student(sid, sid, 'L', 'S', 'D', 'HK1-2024') for sid in student_ids}
+        for subject, day, student_id, status in records:
+            # Tạo chuỗi ngày mới như khi đọc từ nhập liệu/CSV
+            roster[student_id].add_attendance(subject, day[:4] + day[4:], status)
+        return list(roster.values())
+
+    def scan_dict(roster: List[Student]) -> int:
+        return sum(1 for student in roster for dates in student.attendance.values()
+                   for status in dates.values() if status in ABSENT)
+
+    def build_store() -> Tuple[List[Student], AttendanceStore]:
+        store = AttendanceStore()
+        roster = []
+        for sid in student_ids:
+            student = Student(sid, sid, 'L', 'S', 'D', 'HK1-2024')
+            student.attendance = StudentAttendanceView(store, sid)
+            roster.append(student)
+        for subject, day, student_id, status in records:
+            store.set(student_id, subject, day, status)
+        return roster, store
+
+    def scan_store(data: Tuple[List[Student], AttendanceStore]) -> int:
+        # Mảng mã trạng thái là bytes liên tục nên có thể đếm trực tiếp
+        statuses = data[1].statuses.tobytes()
+        return sum(statuses.count(code) for code in ABSENT_CODES)
+
+    print(f"{args.students} sinh viên x {len(SUBJECTS)} môn x {args.sessions} buổi = {len(records)} bản ghi")
+    before = measure('dict', build_dict, scan_dict)
+    after = measure('store', build_store, scan_store)
+    print(f"Tiết kiệm bộ nhớ: {before['memory'] / after['memory']:.1f}x | "
+          f"quét nhanh hơn: {before['scan'] / after['scan']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
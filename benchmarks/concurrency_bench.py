@@ -0,0 +1,131 @@
+"""
+Thử tải nhiều luồng: N luồng điểm danh ghi song song với M luồng tạo báo cáo.
+
+Mỗi luồng ghi phụ trách một nhóm sinh viên riêng nên kết quả cuối cùng xác
+định được và được đối chiếu với báo cáo tính lại sau khi chạy xong.
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.concurrency_bench --writers 8 --readers 4 --students 20000
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+import argparse
+import random
+import threading
+import time
+
+from benchmarks.synthetic import random_name
+from models.student import Student
+from services.attendance_system import AttendanceSystem
+from utils.constants import ATTENDANCE_STATUS, SUBJECTS
+
+CLASS_SIZE = 50
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Phân vị của mẫu (đã sắp xếp)"""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--students', type=int, default=20_000)
+    parser.add_argument('--writes', type=int, default=20_000, help='số lần điểm danh của mỗi luồng ghi')
+    parser.add_argument('--sessions', type=int, default=15)
+    args = parser.parse_args()
+
+    rng = random.Random(13)
+    system = AttendanceSystem()
+    for i in range(args.students):
+        system.add_student(Student(f"SV{i:07d}", random_name(rng), f"LOP{i // CLASS_SIZE:04d}",
+                                   'ITC', 'IT', 'HK1-2024'))
+    student_ids = list(system.students)
+    classes = sorted({student.class_name for student in system.students.values()})
+    subjects = list(SUBJECTS)
+    statuses = list(ATTENDANCE_STATUS.values())
+    start = date(2024, 9, 2)
+    dates = [(start + timedelta(days=7 * i)).isoformat() for i in range(args.sessions)]
+    period = (datetime(2024, 9, 1), datetime(2025, 6, 30))
+
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    write_times: List[float] = []
+    report_latencies: List[List[float]] = [[] for _ in range(args.readers)]
+    expected: List[Dict[Tuple[str, str, str], str]] = [{} for _ in range(args.writers)]
+
+    def writer(index: int) -> None:
+        local = random.Random(index)
+        owned = student_ids[index::args.writers]
+        try:
+            started = time.perf_counter()
+            for _ in range(args.writes):
+                student_id = local.choice(owned)
+                subject = local.choice(subjects)
+                day = local.choice(dates)
+                status = local.choice(statuses)
+                if local.random() < 0.2 and (subject, day, student_id) in expected[index]:
+                    system.edit_attendance(subject, student_id, day, status)
+                else:
+                    system.take_attendance(subject, day, student_id, status)
+                expected[index][(subject, day, student_id)] = status
+            write_times.append(time.perf_counter() - started)
+        except BaseException as error:
+            errors.append(error)
+
+    def reader(index: int) -> None:
+        local = random.Random(1000 + index)
+        try:
+            while not stop.is_set():
+                subject = local.choice(subjects)
+                class_name = local.choice(classes) if local.random() < 0.5 else None
+                started = time.perf_counter()
+                system.generate_report(subject, *period, class_name=class_name)
+                system.get_students_at_risk(subject)
+                report_latencies[index].append(time.perf_counter() - started)
+        except BaseException as error:
+            errors.append(error)
+            stop.set()
+
+    readers = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    writers = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    started = time.perf_counter()
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total_writes = args.writers * args.writes
+    latencies = sorted(sample for samples in report_latencies for sample in samples)
+    print(f"{args.writers} luồng ghi, {args.readers} luồng đọc, {args.students} sinh viên: {elapsed:.2f} s")
+    print(f"Ghi: {total_writes} lần, {total_writes / elapsed:,.0f} lần/s")
+    print(f"Báo cáo: {len(latencies)} lần, {len(latencies) / elapsed:,.1f} lần/s | "
+          f"p50 {percentile(latencies, 0.5) * 1000:.1f} ms | p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(f"Bộ nhớ đệm báo cáo: {system.report_cache.stats()}")
+
+    # Đối chiếu: mọi lần ghi phải còn nguyên và báo cáo phải khớp với dữ liệu cuối cùng
+    mismatches = 0
+    for owned in expected:
+        for (subject, day, student_id), status in owned.items():
+            if system.attendance_store.get(student_id, subject, day) != status:
+                mismatches += 1
+    for subject in subjects:
+        report = system.generate_report(subject, *period)
+        for row in report['students']:
+            counts = system.get_attendance_summary(row['student_id'], subject)
+            if row['absences'] != counts['Vắng mặt'] + counts['Không phép']:
+                mismatches += 1
+    print(f"Lỗi: {len(errors)} | bản ghi sai lệch: {mismatches}")
+    for error in errors[:5]:
+        print(f"  {type(error).__name__}: {error}")
+
+
+if __name__ == '__main__':
+    main()
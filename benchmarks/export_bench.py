@@ -0,0 +1,48 @@
+"""
+So sánh thời gian và dung lượng khi xuất báo cáo cả kỳ (mọi môn học × lớp)
+theo từng định dạng và số luồng ghi.
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.export_bench --students 100000 --threads 1 4
+    python -m benchmarks.export_bench --formats csv csv.gz zip --workers 4
+"""
+from datetime import datetime
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.suite import build_system
+from benchmarks.synthetic import SyntheticConfig
+from services.report_exporters import ARCHIVE_FORMAT, EXPORTERS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=20_000)
+    parser.add_argument('--formats', nargs='+', default=['csv', 'csv.gz', 'jsonl.gz', ARCHIVE_FORMAT],
+                        choices=[*EXPORTERS, ARCHIVE_FORMAT])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--workers', type=int, default=0)
+    args = parser.parse_args()
+
+    config = SyntheticConfig(students=args.students)
+    with tempfile.TemporaryDirectory() as work_dir:
+        system, _ = build_system(config, work_dir, 1, False)
+        start_date, end_date = datetime(config.start_date.year, 1, 1), datetime(config.start_date.year + 1, 12, 31)
+        print(f"\n{'định dạng':10} {'luồng':>6} {'file':>7} {'thời gian':>10} {'dung lượng':>12}")
+        for name in args.formats:
+            for threads in args.threads:
+                with tempfile.TemporaryDirectory() as output_dir:
+                    system.reports_dir = output_dir
+                    started = time.perf_counter()
+                    result = system.export_reports(start_date, end_date, workers=args.workers,
+                                                   formats=[name], threads=threads)
+                    elapsed = time.perf_counter() - started
+                    size = sum(os.path.getsize(path) for path in result.files)
+                print(f"{name:10} {threads:>6} {len(result.files):>7} {elapsed:>9.2f}s {size / 1024 / 1024:>9.1f} MB")
+        system.close()
+
+
+if __name__ == '__main__':
+    main()
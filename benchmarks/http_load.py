@@ -0,0 +1,150 @@
+"""
+Bộ tạo tải cho dịch vụ HTTP: đo số yêu cầu/giây và độ trễ p50/p99 theo từng loại.
+
+Mặc định tự chạy dịch vụ (dữ liệu giả lập, không ghi đĩa) trong một luồng
+riêng; dùng ``--connect`` để nhắm tới dịch vụ đang chạy sẵn.
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.http_load --clients 64 --duration 10
+    python -m benchmarks.http_load --connect 127.0.0.1:8080 --students 0
+"""
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+from urllib.parse import quote
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+
+from benchmarks.concurrency_bench import percentile
+from benchmarks.synthetic import random_name
+from models.student import Student
+from services.attendance_system import AttendanceSystem
+from services.http_service import AttendanceService
+from utils.constants import ATTENDANCE_STATUS, SUBJECTS
+
+# Tỉ lệ các loại yêu cầu: chủ yếu là máy điểm danh gửi lên
+MIX = [('attendance', 70), ('edit', 5), ('search', 10), ('history', 10), ('report', 5)]
+CLASS_SIZE = 50
+
+
+def start_local_service(students: int, readers: int) -> Tuple[str, int]:
+    """Chạy dịch vụ với dữ liệu giả lập trong luồng nền, trả về (host, cổng)"""
+    rng = random.Random(3)
+    system = AttendanceSystem()
+    for i in range(students):
+        system.add_student(Student(f"SV{i:07d}", random_name(rng), f"LOP{i // CLASS_SIZE:04d}",
+                                   'ITC', 'IT', 'HK1-2024'))
+    ready = threading.Event()
+    address: List[Tuple[str, int]] = []
+
+    async def run() -> None:
+        service = AttendanceService(system, readers)
+        server = await service.start('127.0.0.1', 0)
+        address.append(server.sockets[0].getsockname()[:2])
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    threading.Thread(target=asyncio.run, args=(run(),), daemon=True).start()
+    ready.wait()
+    return address[0]
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                  method: str, path: str, payload=None) -> int:
+    """Gửi một yêu cầu trên kết nối giữ sẵn, trả về mã trạng thái"""
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                 f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    length = 0
+    for line in lines[1:]:
+        if line.lower().startswith('content-length:'):
+            length = int(line.split(':', 1)[1])
+    await reader.readexactly(length)
+    return int(lines[0].split(' ')[1])
+
+
+async def client(index: int, host: str, port: int, deadline: float, student_ids: List[str],
+                 latencies: Dict[str, List[float]], failures: Dict[str, int]) -> None:
+    rng = random.Random(index)
+    kinds = [kind for kind, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    subjects = list(SUBJECTS)
+    statuses = list(ATTENDANCE_STATUS.values())
+    dates = [(date(2024, 9, 2) + timedelta(days=7 * i)).isoformat() for i in range(15)]
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            kind = rng.choices(kinds, weights)[0]
+            student_id = rng.choice(student_ids)
+            subject = rng.choice(subjects)
+            record = {'subject': subject, 'date': rng.choice(dates), 'student_id': student_id,
+                      'status': rng.choice(statuses)}
+            if kind == 'attendance':
+                call = ('POST', '/attendance', record)
+            elif kind == 'edit':
+                call = ('PUT', '/attendance', record)
+            elif kind == 'search':
+                call = ('GET', f"/students?q={quote(student_id[:7])}&limit=20", None)
+            elif kind == 'history':
+                call = ('GET', f"/students/{student_id}/history?limit=20", None)
+            else:
+                class_name = f"LOP{rng.randrange(max(1, len(student_ids) // CLASS_SIZE)):04d}"
+                call = ('GET', f"/reports?subject={subject}&start=2024-09-01&end=2025-06-30"
+                               f"&class_name={class_name}", None)
+            started = time.perf_counter()
+            status = await request(reader, writer, *call)
+            latencies[kind].append(time.perf_counter() - started)
+            # Sửa bản ghi chưa có trả về 404, đó không phải lỗi của dịch vụ
+            if status >= 500 or (status >= 400 and kind != 'edit'):
+                failures[kind] += 1
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, clients: int, duration: float,
+                   student_ids: List[str]) -> Tuple[Dict[str, List[float]], Dict[str, int], float]:
+    latencies: Dict[str, List[float]] = {kind: [] for kind, _ in MIX}
+    failures: Dict[str, int] = {kind: 0 for kind, _ in MIX}
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(client(i, host, port, deadline, student_ids, latencies, failures)
+                           for i in range(clients)))
+    return latencies, failures, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--connect', help='host:port của dịch vụ đang chạy')
+    parser.add_argument('--students', type=int, default=10_000,
+                        help='số sinh viên giả lập (khi --connect: số MSSV SV0000000.. đã có)')
+    parser.add_argument('--clients', type=int, default=64, help='số kết nối đồng thời')
+    parser.add_argument('--duration', type=float, default=10.0, help='thời gian chạy (giây)')
+    parser.add_argument('--readers', type=int, default=4)
+    args = parser.parse_args()
+
+    if args.connect:
+        host, port = args.connect.rsplit(':', 1)
+        port = int(port)
+    else:
+        host, port = start_local_service(args.students, args.readers)
+    student_ids = [f"SV{i:07d}" for i in range(max(1, args.students))]
+
+    latencies, failures, elapsed = asyncio.run(run_load(host, port, args.clients, args.duration, student_ids))
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"{args.clients} kết nối, {elapsed:.1f} s: {total} yêu cầu, {total / elapsed:,.0f} yêu cầu/s")
+    everything = sorted(sample for samples in latencies.values() for sample in samples)
+    rows = [(kind, sorted(samples)) for kind, samples in latencies.items()] + [('tổng', everything)]
+    for kind, samples in rows:
+        print(f"{kind:10} {len(samples):8} yêu cầu | p50 {percentile(samples, 0.5) * 1000:7.2f} ms | "
+              f"p99 {percentile(samples, 0.99) * 1000:7.2f} ms | lỗi {failures.get(kind, sum(failures.values()))}")
+
+
+if __name__ == '__main__':
+    main()
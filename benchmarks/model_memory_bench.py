@@ -0,0 +1,87 @@
+"""
+Đo bộ nhớ trên mỗi sinh viên của mô hình Student: lớp thường có __dict__
+và không intern (bố cục trước đây, chép lại trong PlainStudent) so với Student
+dùng __slots__ và intern các trường lặp lại. Dữ liệu được đọc từ file CSV nên
+mỗi dòng có chuỗi riêng như khi nạp thật.
+
+Với ``--system`` đo thêm cả AttendanceSystem sau load_students_from_csv
+(gồm các chỉ mục tìm kiếm và lọc).
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.model_memory_bench --scales 100000 1000000
+"""
+from typing import Callable, Dict, List
+import argparse
+import csv
+import gc
+import os
+import tempfile
+import tracemalloc
+
+from benchmarks.synthetic import SyntheticConfig, write_students_csv
+from models.student import Student
+from services.attendance_system import AttendanceSystem
+
+
+class PlainStudent:
+    """Bố cục Student trước khi dùng __slots__: __dict__ riêng, không intern"""
+
+    def __init__(self, student_id: str, name: str, class_name: str,
+                 school: str, department: str, enrollment_term: str):
+        self.student_id = student_id
+        self.name = name
+        self.class_name = class_name
+        self.school = school
+        self.department = department
+        self.enrollment_term = enrollment_term
+        self.attendance: Dict[str, Dict[str, str]] = {}
+        self._observers: List[Callable] = []
+
+
+def measure_models(csv_path: str, model) -> int:
+    """Số byte còn giữ sau khi tạo toàn bộ sinh viên từ file"""
+    gc.collect()
+    tracemalloc.start()
+    with open(csv_path, 'r', encoding='utf-8', newline='') as file:
+        reader = csv.reader(file)
+        next(reader)
+        students = [model(*row) for row in reader]
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del students
+    return used
+
+
+def measure_system(csv_path: str) -> int:
+    gc.collect()
+    tracemalloc.start()
+    system = AttendanceSystem()
+    system.load_students_from_csv(csv_path)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    system.close()
+    return used
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--system', action='store_true', help='đo cả AttendanceSystem sau khi nạp')
+    args = parser.parse_args()
+
+    print(f"{'quy mô':>9} {'mô hình':24} {'byte/SV':>9} {'tổng MB':>9}")
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory() as work_dir:
+            csv_path = os.path.join(work_dir, 'sinh_vien.csv')
+            write_students_csv(csv_path, SyntheticConfig(students=scale))
+            runs = [('trước (__dict__)', lambda: measure_models(csv_path, PlainStudent)),
+                    ('sau (__slots__ + intern)', lambda: measure_models(csv_path, Student))]
+            if args.system:
+                runs.append(('AttendanceSystem', lambda: measure_system(csv_path)))
+            for label, run in runs:
+                used = run()
+                print(f"{scale:>9} {label:24} {used / scale:>9.0f} {used / 1024 / 1024:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+So sánh generate_report dạng lặp từng bản ghi với bộ tổng hợp theo lô.
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.report_engine_bench --students 50000
+"""
+from datetime import datetime
+import argparse
+import time
+
+from benchmarks.attendance_store_bench import build_records
+from models.student import Student
+from services.attendance_system import AttendanceSystem, AttendanceReport
+from services import report_engine
+from utils.constants import MAX_ABSENCES
+
+
+def legacy_report(system: AttendanceSystem, subject: str,
+                  start_date: datetime, end_date: datetime) -> AttendanceReport:
+    """Cách tính cũ: strptime và so sánh chuỗi cho từng bản ghi"""
+    report: AttendanceReport = {
+        'subject': subject,
+        'period': f"{start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}",
+        'students': []
+    }
+    for student in system.students.values():
+        absences = late_arrivals = present = 0
+        for date, status in student.get_attendance(subject).items():
+            record_date = datetime.strptime(date, '%Y-%m-%d')
+            if start_date <= record_date <= end_date:
+                if status in ['Vắng mặt', 'Không phép']:
+                    absences += 1
+                elif status == 'Đi trễ':
+                    late_arrivals += 1
+                elif status == 'Có mặt':
+                    present += 1
+        eligible_for_exam, _ = student.check_exam_eligibility(subject, MAX_ABSENCES)
+        report['students'].append({
+            'student_id': student.student_id,
+            'name': student.name,
+            'absences': absences,
+            'late_arrivals': late_arrivals,
+            'present': present,
+            'eligible_for_exam': eligible_for_exam
+        })
+    return report
+
+
+def timed(label: str, func) -> tuple[float, AttendanceReport]:
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:12} {elapsed:8.3f} s")
+    return elapsed, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--students', type=int, default=10_000)
+    parser.add_argument('--sessions', type=int, default=45)
+    args = parser.parse_args()
+
+    system = AttendanceSystem()
+    for i in range(args.students):
+        system.add_student(Student(f"SV{i:07d}", f"Sinh viên {i}", f"L{i % 40}", 'ITC', 'IT', 'HK1-2024'))
+    for subject, day, student_id, status in build_records(args.students, args.sessions):
+        system.attendance_store.set(student_id, subject, day, status)
+
+    start_date, end_date = datetime(2024, 9, 15), datetime(2025, 3, 1)
+    print(f"{args.students} sinh viên, NumPy: {'có' if report_engine.np is not None else 'không'}")
+    before, expected = timed('lặp cũ', lambda: legacy_report(system, 'WD102', start_date, end_date))
+    after, actual = timed('theo lô', lambda: system.generate_report('WD102', start_date, end_date))
+    assert actual == expected, "Kết quả báo cáo không khớp"
+    print(f"Nhanh hơn {before / after:.1f}x, kết quả trùng khớp")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+So sánh bộ nhớ đỉnh và thời gian tới dòng đầu tiên giữa dựng cả báo cáo rồi
+ghi (generate_report + save_report) và ghi theo từng dòng (write_report).
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.report_stream_bench --students 200000
+"""
+from datetime import datetime
+import argparse
+import os
+import random
+import time
+import tracemalloc
+
+from benchmarks.synthetic import random_name
+from models.student import Student
+from services.attendance_system import AttendanceSystem
+from services.report_writer import write_report_csv
+from utils.constants import ATTENDANCE_STATUS
+
+
+class FirstWriteFile:
+    """File ghi bỏ qua dữ liệu, chỉ ghi nhận thời điểm dòng sinh viên đầu tiên được ghi"""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.lines = 0
+        self.first_row = None
+
+    def write(self, text: str) -> int:
+        self.lines += 1
+        if self.lines == 5 and self.first_row is None:  # 4 dòng tiêu đề đứng trước
+            self.first_row = time.perf_counter() - self.started
+        return len(text)
+
+
+def measure(label: str, run) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    sink = FirstWriteFile(started)
+    run(sink)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:10} bộ nhớ đỉnh: {peak / 1024 / 1024:7.1f} MB | dòng đầu tiên sau "
+          f"{(sink.first_row or 0) * 1000:8.1f} ms | tổng {elapsed:.2f} s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--students', type=int, default=200_000)
+    parser.add_argument('--sessions', type=int, default=15)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    system = AttendanceSystem()
+    system.reports_dir = os.devnull
+    statuses = list(ATTENDANCE_STATUS.values())
+    for i in range(args.students):
+        system.add_student(Student(f"SV{i:07d}", random_name(rng), f"LOP{i // 50:04d}", 'ITC', 'IT', 'HK1-2024'))
+    for session in range(args.sessions):
+        day = datetime(2024, 9, 2 + session % 28).strftime('%Y-%m-%d')
+        system.attendance_store.set_many('DB103', day, ((f"SV{i:07d}", rng.randint(1, len(statuses)))
+                                                        for i in range(args.students)))
+    period = (datetime(2024, 9, 1), datetime(2025, 6, 30))
+
+    def materialized(sink) -> None:
+        system.report_cache.clear()
+        write_report_csv(system.generate_report('DB103', *period), sink)
+
+    def streamed(sink) -> None:
+        system.report_cache.clear()
+        system.write_report(sink, 'DB103', *period)
+
+    measure('dựng sẵn', materialized)
+    measure('theo dòng', streamed)
+
+
+if __name__ == '__main__':
+    main()
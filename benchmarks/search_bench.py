@@ -0,0 +1,50 @@
+"""
+Đo thời gian tìm kiếm sinh viên qua chỉ mục so với duyệt tuần tự.
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.search_bench --students 100000
+"""
+from typing import List
+import argparse
+import random
+import time
+
+from benchmarks.synthetic import random_name
+from models.student import Student
+from services.attendance_system import AttendanceSystem
+
+def linear_search(students: List[Student], keyword: str) -> List[Student]:
+    """Cách tìm cũ: so khớp chuỗi con trên toàn bộ danh sách"""
+    keyword = keyword.lower()
+    return [s for s in students if keyword in s.name.lower() or keyword in s.student_id.lower()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--students', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    system = AttendanceSystem()
+    started = time.perf_counter()
+    for i in range(args.students):
+        system.add_student(Student(f"5012{i:06d}", random_name(rng), 'CD24CLC', 'ITC', 'IT', 'HK1-2024'))
+    print(f"Dựng chỉ mục cho {args.students} sinh viên: {time.perf_counter() - started:.2f} s")
+
+    students = list(system.students.values())
+    for keyword in ['5012000123', '50120012', 'Đức', 'duc', 'minh duc', 'Phạm Ngọc Tâm']:
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            results = system.search_student(keyword)
+        indexed = (time.perf_counter() - started) / args.repeat
+
+        started = time.perf_counter()
+        linear_search(students, keyword)
+        linear = time.perf_counter() - started
+        print(f"{keyword!r:16} {len(results):3} kết quả | chỉ mục: {indexed * 1000:7.3f} ms | "
+              f"tuần tự: {linear * 1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
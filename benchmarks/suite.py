@@ -0,0 +1,297 @@
+"""
+Bộ benchmark các thao tác chính của AttendanceSystem trên dữ liệu giả lập
+ở nhiều quy mô, lưu kết quả dạng JSON và so sánh với lần chạy trước.
+
+Mỗi kịch bản chạy ``--repeat`` lần và lấy lần nhanh nhất. Với ``--memory``,
+mỗi kịch bản được chạy thêm một lần dưới tracemalloc để đo bộ nhớ đỉnh.
+
+Chạy từ thư mục gốc dự án:
+    python -m benchmarks.suite --scales 1000 10000 100000
+    python -m benchmarks.suite --scales 1000000 --sessions 10 --memory
+    python -m benchmarks.suite --baseline benchmarks/results/truoc.json
+    python -m benchmarks.suite --compare benchmarks/results/truoc.json benchmarks/results/sau.json
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import csv
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import (SyntheticConfig, class_count, class_name, iter_sessions, load_subjects,
+                                  record_count, student_id, write_students_csv)
+from services.attendance_importer import ATTENDANCE_COLUMNS
+from services.attendance_system import AttendanceSystem
+from utils.constants import ATTENDANCE_STATUS
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+DEFAULT_SCALES = [1_000, 10_000, 100_000]
+# Slower than the baseline by more than this fraction counts as a regression
+DEFAULT_THRESHOLD = 0.10
+
+# (tên kịch bản, hàm chạy một lần và trả về số thao tác đã làm)
+Scenario = Tuple[str, Callable[[], int]]
+
+
+def peak_rss_kb() -> int:
+    """RSS đỉnh của tiến trình (KB)"""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(__file__))).stdout.strip()
+    except OSError:
+        return ''
+
+
+def measure(scale: int, name: str, run: Callable[[], int], repeat: int, memory: bool) -> Dict:
+    """Chạy một kịch bản ``repeat`` lần, lấy lần nhanh nhất"""
+    best = float('inf')
+    ops = 0
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        ops = run()
+        best = min(best, time.perf_counter() - started)
+    result = {'scale': scale, 'scenario': name, 'ops': ops, 'seconds': round(best, 6),
+              'per_op_us': round(best / max(ops, 1) * 1e6, 3)}
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        run()
+        result['peak_kb'] = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    print(f"{scale:>9} {name:32} {ops:>9} thao tác {best * 1000:10.1f} ms "
+          f"{result['per_op_us']:10.2f} µs/thao tác" + (f" {result['peak_kb']:>9} KB" if memory else ''))
+    return result
+
+
+def build_system(config: SyntheticConfig, work_dir: str, repeat: int,
+                 memory: bool) -> Tuple[AttendanceSystem, List[Dict]]:
+    """Nạp sinh viên từ CSV và điểm danh theo lớp, đo thời gian của hai bước này"""
+    csv_path = os.path.join(work_dir, 'sinh_vien.csv')
+    write_students_csv(csv_path, config)
+    holder: Dict[str, AttendanceSystem] = {}
+
+    def load_students() -> int:
+        system = AttendanceSystem()
+        system.reports_dir = work_dir
+        system.load_students_from_csv(csv_path)
+        holder['system'] = system
+        return len(system.students)
+
+    results = [measure(config.students, 'load_students_from_csv', load_students, repeat, memory)]
+    system = holder['system']
+    subjects = load_subjects()
+    sessions = list(iter_sessions(config, subjects))
+
+    def take_class_attendance() -> int:
+        # Ghi đè cùng các buổi học nên chạy lại nhiều lần cho cùng kết quả
+        for subject, name, day, records in sessions:
+            system.take_class_attendance(subject, name, day, [str(code) for _, code in records])
+        return record_count(config, subjects)
+
+    results.append(measure(config.students, 'take_class_attendance', take_class_attendance, repeat, memory))
+    return system, results
+
+
+def scenarios(system: AttendanceSystem, config: SyntheticConfig, work_dir: str) -> List[Scenario]:
+    rng = random.Random(config.seed + 3)
+    subject_codes = sorted(system.attendance_store.subject_ids)
+    students = [student_id(rng.randrange(config.students)) for _ in range(1_000)]
+    classes = [class_name(rng.randrange(class_count(config))) for _ in range(50)]
+    keywords = []
+    for sid in students[:200]:
+        name = system.students[sid].name.split()
+        keywords.append(rng.choice([sid[:-2], name[-1], ' '.join(name[-2:]), sid]))
+    statuses = list(ATTENDANCE_STATUS.values())
+    start_date, end_date = datetime(config.start_date.year, 1, 1), datetime(config.start_date.year + 1, 12, 31)
+    writes = [(rng.choice(subject_codes), sid, rng.choice(statuses)) for sid in students]
+
+    def take_attendance() -> int:
+        for subject, sid, status in writes:
+            system.take_attendance(subject, config.start_date.isoformat(), sid, status)
+        return len(writes)
+
+    def search_student() -> int:
+        for keyword in keywords:
+            system.search_student(keyword)
+        return len(keywords)
+
+    def generate_report() -> int:
+        system.report_cache.clear()
+        for subject in subject_codes:
+            system.generate_report(subject, start_date, end_date)
+        return len(subject_codes)
+
+    def generate_report_cached() -> int:
+        for subject in subject_codes:
+            system.generate_report(subject, start_date, end_date)
+        return len(subject_codes)
+
+    def get_class_report() -> int:
+        system.report_cache.clear()
+        for index, name in enumerate(classes):
+            system.get_class_report(subject_codes[index % len(subject_codes)], name, start_date, end_date)
+        return len(classes)
+
+    def scan_eligibility() -> int:
+        return system.scan_eligibility().pairs
+
+    def attendance_trend() -> int:
+        # Lần chạy đầu gồm cả dựng số liệu tổng hợp, các lần sau chỉ cộng các ô tuần/tháng
+        buckets = len(system.attendance_trend(start_date, end_date, 'week'))
+        for index, name in enumerate(classes):
+            buckets += len(system.attendance_trend(start_date, end_date, 'month', name,
+                                                   subject_codes[index % len(subject_codes)]))
+        return buckets
+
+    def get_student_attendance_history() -> int:
+        for sid in students:
+            system.get_student_attendance_history(sid, limit=20)
+        return len(students)
+
+    report = system.generate_report(subject_codes[0], start_date, end_date)
+
+    def save_report() -> int:
+        system.save_report(report, 'bao_cao.csv')
+        return len(report['students'])
+
+    scanner_path = os.path.join(work_dir, 'may_quet.csv')
+    with open(scanner_path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(ATTENDANCE_COLUMNS)
+        for subject, _, day, records in iter_sessions(config, load_subjects()):
+            writer.writerows((sid, subject, day, code) for sid, code in records)
+
+    def import_attendance() -> int:
+        # Cùng dữ liệu với take_class_attendance nên chạy lại không đổi trạng thái
+        return system.import_attendance([scanner_path]).rows
+
+    def export_report() -> int:
+        system.report_cache.clear()
+        with open(os.path.join(work_dir, 'bao_cao_dong.csv'), 'w', encoding='utf-8', newline='') as file:
+            return system.write_report(file, subject_codes[0], start_date, end_date)
+
+    return [
+        ('take_attendance', take_attendance),
+        ('import_attendance', import_attendance),
+        ('search_student', search_student),
+        ('generate_report', generate_report),
+        ('generate_report_cached', generate_report_cached),
+        ('get_class_report', get_class_report),
+        ('scan_eligibility', scan_eligibility),
+        ('attendance_trend', attendance_trend),
+        ('get_student_attendance_history', get_student_attendance_history),
+        ('save_report', save_report),
+        ('export_report', export_report),
+    ]
+
+
+def run_scale(config: SyntheticConfig, repeat: int, memory: bool,
+              only: Optional[List[str]]) -> Tuple[List[Dict], Dict]:
+    with tempfile.TemporaryDirectory() as work_dir:
+        system, results = build_system(config, work_dir, repeat, memory)
+        for name, run in scenarios(system, config, work_dir):
+            if only and name not in only:
+                continue
+            results.append(measure(config.students, name, run, repeat, memory))
+        footprint = {'records': len(system.attendance_store),
+                     'store_bytes': system.attendance_store.nbytes(),
+                     'peak_rss_kb': peak_rss_kb()}
+        system.close()
+    print(f"{config.students:>9} {footprint['records']} bản ghi, kho điểm danh "
+          f"{footprint['store_bytes'] / 1024 / 1024:.1f} MB, RSS đỉnh {footprint['peak_rss_kb'] / 1024:.1f} MB")
+    return results, footprint
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> int:
+    """In bảng so sánh theo (quy mô, kịch bản), trả về số kịch bản chậm đi quá ngưỡng"""
+    old = {(r['scale'], r['scenario']): r for r in baseline['results']}
+    regressions = 0
+    print(f"\n{'quy mô':>9} {'kịch bản':32} {'trước µs':>12} {'sau µs':>12} {'thay đổi':>9}")
+    for result in current['results']:
+        before = old.get((result['scale'], result['scenario']))
+        if before is None or not before['per_op_us']:
+            continue
+        change = result['per_op_us'] / before['per_op_us'] - 1
+        flag = ''
+        if change > threshold:
+            regressions += 1
+            flag = '  CHẬM HƠN'
+        print(f"{result['scale']:>9} {result['scenario']:32} {before['per_op_us']:12.2f} "
+              f"{result['per_op_us']:12.2f} {change:+9.1%}{flag}")
+    print(f"{regressions} kịch bản chậm hơn quá {threshold:.0%}")
+    return regressions
+
+
+def load_results(path: str) -> Dict:
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def main() -> None:
+    defaults = SyntheticConfig()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, help='số sinh viên')
+    parser.add_argument('--class-size', type=int, default=defaults.class_size)
+    parser.add_argument('--subjects-per-class', type=int, default=defaults.subjects_per_class)
+    parser.add_argument('--sessions', type=int, default=defaults.sessions)
+    parser.add_argument('--weights', type=int, nargs='+', default=list(defaults.status_weights),
+                        help='tỉ lệ các trạng thái theo mã 1..5')
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--memory', action='store_true', help='đo bộ nhớ đỉnh của từng kịch bản')
+    parser.add_argument('--only', nargs='*', help='chỉ chạy các kịch bản này')
+    parser.add_argument('--output', help='file JSON kết quả (mặc định benchmarks/results/<thời gian>.json)')
+    parser.add_argument('--baseline', help='so sánh với file kết quả này sau khi chạy')
+    parser.add_argument('--compare', nargs=2, metavar=('TRUOC', 'SAU'), help='chỉ so sánh hai file kết quả')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(load_results(args.compare[0]), load_results(args.compare[1]), args.threshold) else 0)
+
+    configs = [SyntheticConfig(students=scale, class_size=args.class_size,
+                               subjects_per_class=args.subjects_per_class, sessions=args.sessions,
+                               status_weights=tuple(args.weights), seed=args.seed)
+               for scale in args.scales]
+    current = {
+        'meta': {'started': datetime.now().isoformat(timespec='seconds'), 'revision': git_revision(),
+                 'python': platform.python_version(), 'platform': platform.platform(),
+                 'config': {**configs[0]._asdict(), 'students': args.scales,
+                            'start_date': configs[0].start_date.isoformat()},
+                 'repeat': args.repeat},
+        'results': [],
+        'memory': {}
+    }
+    for config in configs:
+        results, footprint = run_scale(config, args.repeat, args.memory, args.only)
+        current['results'].extend(results)
+        current['memory'][str(config.students)] = footprint
+        gc.collect()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(current, file, ensure_ascii=False, indent=2)
+    print(f"Đã lưu kết quả vào {output}")
+
+    if args.baseline and compare(load_results(args.baseline), current, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Sinh dữ liệu giả lập có tính tất định (cùng cấu hình + seed -> cùng dữ liệu).
+
+Sinh viên được chia vào các lớp ``class_size`` người; mỗi lớp học
+``subjects_per_class`` môn (chọn từ mon_hoc.csv) và mỗi môn có ``sessions``
+buổi, mỗi tuần một buổi. Trạng thái điểm danh được rút theo ``status_weights``
+(theo thứ tự mã 1..5 của ATTENDANCE_STATUS).
+"""
+from datetime import date, timedelta
+from typing import Iterator, List, NamedTuple, Tuple
+import csv
+import os
+import random
+
+from models.student import Student
+from models.subject import Subject
+from services.csv_importer import STUDENT_COLUMNS
+from utils.constants import CSV_PATHS, SUBJECTS, SUBJECT_CREDITS
+
+FAMILY_NAMES = ['Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Huỳnh', 'Phan', 'Vũ', 'Võ', 'Đặng', 'Bùi', 'Đỗ']
+MIDDLE_NAMES = ['Văn', 'Thị', 'Hữu', 'Minh', 'Ngọc', 'Thanh', 'Hoàng', 'Quốc', 'Gia', 'Bảo']
+GIVEN_NAMES = ['An', 'Bình', 'Châu', 'Dũng', 'Đạt', 'Đức', 'Giang', 'Hà', 'Hải', 'Hương',
+               'Khánh', 'Linh', 'Long', 'Mai', 'Nam', 'Phúc', 'Quân', 'Sơn', 'Tâm', 'Thảo',
+               'Trang', 'Tuấn', 'Uyên', 'Vy', 'Yến']
+
+
+def random_name(rng: random.Random) -> str:
+    """Sinh một họ tên tiếng Việt ngẫu nhiên"""
+    return f"{rng.choice(FAMILY_NAMES)} {rng.choice(MIDDLE_NAMES)} {rng.choice(GIVEN_NAMES)}"
+
+
+class SyntheticConfig(NamedTuple):
+    students: int = 10_000
+    class_size: int = 50
+    subjects_per_class: int = 4
+    sessions: int = 15
+    status_weights: Tuple[int, ...] = (80, 6, 8, 3, 3)
+    start_date: date = date(2024, 9, 2)
+    seed: int = 42
+
+
+def load_subjects(file_path: str = CSV_PATHS['subjects']) -> List[Subject]:
+    """Môn học trong mon_hoc.csv (hoặc SUBJECTS nếu không có file)"""
+    if not os.path.exists(file_path):
+        return [Subject(code, name, SUBJECT_CREDITS.get(code, 0)) for code, name in SUBJECTS.items()]
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return [Subject(row['ma_mh'], row['ten_mh'], int(row['so_tin_chi'])) for row in csv.DictReader(file)]
+
+
+def student_id(index: int) -> str:
+    return f"SV{index:07d}"
+
+
+def class_name(index: int) -> str:
+    return f"LOP{index:05d}"
+
+
+def class_count(config: SyntheticConfig) -> int:
+    return max(1, -(-config.students // config.class_size))
+
+
+def iter_students(config: SyntheticConfig) -> Iterator[Student]:
+    """Các sinh viên giả lập theo thứ tự MSSV"""
+    rng = random.Random(config.seed)
+    for index in range(config.students):
+        yield Student(student_id(index), random_name(rng), class_name(index // config.class_size),
+                      'ITC', f"KHOA{index // config.class_size % 10}", f"HK{index % 2 + 1}-2024")
+
+
+def write_students_csv(file_path: str, config: SyntheticConfig) -> None:
+    """Ghi danh sách sinh viên giả lập theo định dạng sinh_vien.csv"""
+    with open(file_path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(STUDENT_COLUMNS)
+        for student in iter_students(config):
+            writer.writerow([student.student_id, student.name, student.class_name, student.school,
+                             student.department, student.enrollment_term])
+
+
+def session_dates(config: SyntheticConfig) -> List[str]:
+    return [(config.start_date + timedelta(days=7 * i)).isoformat() for i in range(config.sessions)]
+
+
+def class_subjects(config: SyntheticConfig, subjects: List[Subject]) -> List[List[str]]:
+    """Các môn học của từng lớp"""
+    rng = random.Random(config.seed + 1)
+    codes = [subject.code for subject in subjects]
+    count = min(config.subjects_per_class, len(codes))
+    return [rng.sample(codes, count) for _ in range(class_count(config))]
+
+
+def iter_sessions(config: SyntheticConfig,
+                  subjects: List[Subject]) -> Iterator[Tuple[str, str, str, List[Tuple[str, int]]]]:
+    """Từng buổi học của từng lớp: (môn học, lớp, ngày, [(MSSV, mã trạng thái)])"""
+    rng = random.Random(config.seed + 2)
+    codes = list(range(1, len(config.status_weights) + 1))
+    dates = session_dates(config)
+    for index, codes_of_class in enumerate(class_subjects(config, subjects)):
+        members = [student_id(i) for i in range(index * config.class_size,
+                                                 min(config.students, (index + 1) * config.class_size))]
+        for subject in codes_of_class:
+            for day in dates:
+                statuses = rng.choices(codes, config.status_weights, k=len(members))
+                yield subject, class_name(index), day, list(zip(members, statuses))
+
+
+def record_count(config: SyntheticConfig, subjects: List[Subject]) -> int:
+    return config.students * min(config.subjects_per_class, len(subjects)) * config.sessions
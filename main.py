@@ -1,9 +1,11 @@
 from datetime import datetime
 import os
+import sys
 from typing import List
 from models.student import Student
 from models.subject import Subject
 from services.attendance_system import AttendanceSystem, AttendanceHistory
+from services.repository import CsvRepository
 from utils.constants import ATTENDANCE_STATUS, DATA_DIR
 
 def print_menu() -> None:
@@ -48,13 +50,70 @@ def print_attendance_history(history: List[AttendanceHistory]) -> None:
         print(f"{record['date']} | {record['subject']:7} | {record['status']}")
     print("-" * 40)
 
+def open_system() -> AttendanceSystem:
+    # Dữ liệu lưu trong file CSV (sinh viên, môn học) và nhật ký điểm danh,
+    # chỉ được đọc khi thao tác đầu tiên cần tới
+    system = AttendanceSystem(CsvRepository(
+        students_path=os.path.join(DATA_DIR, 'sinh_vien.csv'),
+        subjects_path=os.path.join(DATA_DIR, 'mon_hoc.csv')
+    ))
+    system.load_repository(lazy=True)
+    return system
+
+def run_command(argv: List[str]) -> int:
+    """Một thao tác từ dòng lệnh (tra cứu, điểm danh một sinh viên hoặc nhập file điểm danh) rồi thoát"""
+    import argparse
+
+    from services.attendance_importer import DEFAULT_BATCH_SIZE, POLICIES
+
+    parser = argparse.ArgumentParser(description='Hệ thống quản lý điểm danh sinh viên')
+    commands = parser.add_subparsers(dest='command', required=True)
+    lookup = commands.add_parser('tra-cuu', help='xem thông tin một sinh viên')
+    lookup.add_argument('student_id')
+    check_in = commands.add_parser('diem-danh', help='điểm danh một sinh viên')
+    check_in.add_argument('subject')
+    check_in.add_argument('student_id')
+    check_in.add_argument('--status', default='1', choices=list(ATTENDANCE_STATUS),
+                          help='mã trạng thái (mặc định 1 = Có mặt)')
+    check_in.add_argument('--date', default=datetime.now().strftime("%Y-%m-%d"), help='YYYY-MM-DD')
+    bulk = commands.add_parser('nhap-diem-danh', help='nhập file CSV điểm danh (ma_sv, ma_mh, ngay, trang_thai)')
+    bulk.add_argument('files', nargs='+', help='các file theo thứ tự thời gian, file sau ghi đè file trước')
+    bulk.add_argument('--policy', default='last', choices=POLICIES,
+                      help='xung đột: last = dòng sau ghi đè, report = giữ dòng đầu và chỉ báo cáo')
+    bulk.add_argument('--conflicts', help='ghi danh sách xung đột ra file CSV này')
+    bulk.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    system = open_system()
+    try:
+        if args.command == 'nhap-diem-danh':
+            result = system.import_attendance(args.files, args.policy, args.batch_size)
+            print(result)
+            for error in result.errors[:20]:
+                print(f"  {error.file}:{error.line}: {error.message}")
+            if args.conflicts:
+                print(f"Đã ghi {result.write_conflicts(args.conflicts)} xung đột vào {args.conflicts}")
+            return 1 if result.errors else 0
+        student = system.get_student(args.student_id)
+        if student is None:
+            print("Không tìm thấy sinh viên!")
+            return 1
+        if args.command == 'tra-cuu':
+            print(student)
+            return 0
+        if args.subject not in system.subjects:
+            print("Mã môn học không hợp lệ!")
+            return 1
+        if not system.take_attendance(args.subject, args.date, args.student_id, ATTENDANCE_STATUS[args.status]):
+            print("Có lỗi xảy ra khi điểm danh!")
+            return 1
+        print("Đã điểm danh thành công!")
+        return 0
+    finally:
+        system.close()
+
 def main() -> None:
-    system = AttendanceSystem()
-    data_file = os.path.join(DATA_DIR, 'sinh_vien.csv')
-    
-    # Tải dữ liệu sinh viên từ file CSV nếu có
-    if os.path.exists(data_file):
-        system.load_students_from_csv(data_file)
+    system = open_system()
 
     while True:
         print_menu()
@@ -65,8 +124,6 @@ def main() -> None:
                 student = get_student_info()
                 if system.add_student(student):
                     print(f"Đã thêm sinh viên {student.name} thành công!")
-                    # Lưu ngay sau khi thêm
-                    system.save_students_to_csv(data_file)
                 else:
                     print("MSSV đã tồn tại!")
             except ValueError as e:
@@ -74,7 +131,7 @@ def main() -> None:
 
         elif choice == "2":
             student_id = input("Nhập MSSV: ")
-            if student_id not in system.students:
+            if system.get_student(student_id) is None:
                 print("Không tìm thấy sinh viên!")
                 continue
 
@@ -128,10 +185,9 @@ def main() -> None:
                     input("Nhập ngày kết thúc (dd/mm/yyyy): "), "%d/%m/%Y"
                 )
                 
-                report = system.generate_report(subject_code, start_date, end_date)
                 filename = f"bao_cao_{subject_code}_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.csv"
                 
-                saved_path = system.save_report(report, filename)
+                saved_path = system.export_report(filename, subject_code, start_date, end_date)
                 if saved_path:
                     print(f"Đã xuất báo cáo thành công! File: {saved_path}")
                 else:
@@ -145,7 +201,7 @@ def main() -> None:
 
         elif choice == "6":
             student_id = input("Nhập MSSV: ")
-            if student_id not in system.students:
+            if system.get_student(student_id) is None:
                 print("Không tìm thấy sinh viên!")
                 continue
 
@@ -178,7 +234,7 @@ def main() -> None:
 
         elif choice == "7":
             student_id = input("Nhập MSSV: ")
-            if student_id not in system.students:
+            if system.get_student(student_id) is None:
                 print("Không tìm thấy sinh viên!")
                 continue
 
@@ -214,10 +270,10 @@ def main() -> None:
                     input("Nhập ngày kết thúc (dd/mm/yyyy): "), "%d/%m/%Y"
                 )
                 
-                report = system.get_class_report(subject_code, class_name, start_date, end_date)
                 filename = f"bao_cao_{subject_code}_{class_name}_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.csv"
                 
-                saved_path = system.save_report(report, filename)
+                saved_path = system.export_report(filename, subject_code, start_date, end_date,
+                                                  class_name=class_name)
                 if saved_path:
                     print(f"Đã xuất báo cáo thành công! File: {saved_path}")
                 else:
@@ -227,6 +283,7 @@ def main() -> None:
                 print(f"Lỗi: Định dạng ngày không hợp lệ! ({str(e)})")
 
         elif choice == "9":
+            system.close()
             print("Cảm ơn bạn đã sử dụng hệ thống!")
             break
 
@@ -234,4 +291,6 @@ def main() -> None:
             print("Lựa chọn không hợp lệ! Vui lòng chọn lại.")
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_command(sys.argv[1:]))
     main()
\ No newline at end of file
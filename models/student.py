@@ -1,16 +1,26 @@
-from typing import Dict, Optional, Union
+from sys import intern
+from typing import Callable, Dict, Optional, Tuple, Union
+
+StudentObserver = Callable[['Student', Dict[str, str]], None]
 
 
 class Student:
+    # Không có __dict__ riêng cho từng sinh viên; lớp, trường, khoa, khóa lặp lại ở rất nhiều
+    # sinh viên nên được intern để mọi sinh viên cùng lớp dùng chung một chuỗi
+    __slots__ = ('student_id', 'name', 'class_name', 'school', 'department', 'enrollment_term',
+                 'attendance', '_observers')
+
     def __init__(self, student_id: str, name: str, class_name: str, 
                 school: str, department: str, enrollment_term: str):
         self.student_id = student_id  # ma_sv
         self.name = name  # ho_ten
-        self.class_name = class_name  # lop_hoc
-        self.school = school  # truong
-        self.department = department  # khoa
-        self.enrollment_term = enrollment_term  # hoc_ky_nhap_hoc
+        self.class_name = intern(class_name)  # lop_hoc
+        self.school = intern(school)  # truong
+        self.department = intern(department)  # khoa
+        self.enrollment_term = intern(enrollment_term)  # hoc_ky_nhap_hoc
         self.attendance: Dict[str, Dict[str, str]] = {}
+        # Các hàm được gọi sau khi thông tin sinh viên thay đổi (nhận giá trị cũ)
+        self._observers: Tuple[StudentObserver, ...] = ()
         
     def add_attendance(self, subject: str, date: str, status: str) -> None:
         """Thêm điểm danh cho sinh viên"""
@@ -35,24 +45,39 @@ class Student:
         """Kiểm tra điều kiện dự thi của sinh viên"""
         if subject not in self.attendance:
             return True, 0
-        absences = sum(1 for status in self.attendance[subject].values() 
-                      if status in ["Vắng mặt", "Không phép"])
+        if hasattr(self.attendance, 'count_absences'):
+            # Kho điểm danh dạng cột giữ sẵn bộ đếm theo môn học
+            absences = self.attendance.count_absences(subject)
+        else:
+            absences = sum(1 for status in self.attendance[subject].values() 
+                          if status in ["Vắng mặt", "Không phép"])
         return absences <= max_absences, absences
 
     def update_info(self, name: Optional[str] = None, class_name: Optional[str] = None,
                    school: Optional[str] = None, department: Optional[str] = None,
                    enrollment_term: Optional[str] = None) -> None:
         """Cập nhật thông tin sinh viên"""
+        previous = {field: getattr(self, field) for field in
+                    ('name', 'class_name', 'school', 'department', 'enrollment_term')}
         if name:
             self.name = name
         if class_name:
-            self.class_name = class_name
+            self.class_name = intern(class_name)
         if school:
-            self.school = school
+            self.school = intern(school)
         if department:
-            self.department = department
+            self.department = intern(department)
         if enrollment_term:
-            self.enrollment_term = enrollment_term
+            self.enrollment_term = intern(enrollment_term)
+
+        changed = {field: value for field, value in previous.items() if getattr(self, field) != value}
+        if changed:
+            for observer in self._observers:
+                observer(self, changed)
+
+    def add_observer(self, observer: StudentObserver) -> None:
+        """Đăng ký hàm được gọi khi thông tin sinh viên thay đổi"""
+        self._observers += (observer,)
 
     def __str__(self) -> str:
         """Hiển thị thông tin sinh viên"""
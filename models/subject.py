@@ -1,6 +1,8 @@
 from typing import Dict
 
 class Subject:
+    __slots__ = ('code', 'name', 'credits')
+
     def __init__(self, code: str, name: str, credits: int):
         self.code = code  # ma_mh
         self.name = name  # ten_mh
@@ -0,0 +1,254 @@
+"""
+Nhập điểm danh hàng loạt từ file CSV xuất từ máy quẹt thẻ hoặc LMS.
+
+Mỗi dòng gồm MSSV, mã môn học, ngày (YYYY-MM-DD hoặc dd/mm/yyyy) và trạng
+thái (mã 1..5 hoặc tên trong ATTENDANCE_STATUS). Các dòng cùng (MSSV, môn
+học, ngày) trong một lần nhập được gộp: dòng giống hệt bị bỏ qua, dòng khác
+trạng thái là xung đột và được xử lý theo ``policy``:
+
+- ``last``: dòng sau ghi đè dòng trước
+- ``report``: giữ dòng đầu tiên, dòng xung đột không được ghi
+
+Mọi xung đột đều được ghi nhận kèm vị trí của cả hai dòng. Bản ghi được gom
+thành lô ``batch_size`` bản ghi rồi mới ghi, mỗi lô một lần khóa và một lần
+ghi nhật ký.
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+import csv
+import time
+
+from utils.constants import ATTENDANCE_IMPORT_BATCH_SIZE, ATTENDANCE_STATUS
+
+ATTENDANCE_COLUMNS = ('ma_sv', 'ma_mh', 'ngay', 'trang_thai')
+DEFAULT_BATCH_SIZE = ATTENDANCE_IMPORT_BATCH_SIZE
+POLICIES = ('last', 'report')
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y')
+
+# (môn học, ngày YYYY-MM-DD, MSSV, mã trạng thái, số thứ tự ngày)
+ImportedRecord = Tuple[str, str, str, int, int]
+
+# Trạng thái ghi bằng mã ("1") hoặc bằng tên ("Có mặt")
+_STATUS_CODES: Dict[str, int] = {code: int(code) for code in ATTENDANCE_STATUS}
+_STATUS_CODES.update({status: int(code) for code, status in ATTENDANCE_STATUS.items()})
+
+
+class ImportRowError(NamedTuple):
+    file: str
+    line: int  # số dòng trong file (dòng tiêu đề là 1, 0 = lỗi của cả file)
+    message: str
+
+
+class Conflict(NamedTuple):
+    """Hai dòng cùng MSSV, môn học, ngày nhưng khác trạng thái"""
+    student_id: str
+    subject: str
+    date: str
+    status: str
+    file: str
+    line: int
+    previous_status: str
+    previous_file: str
+    previous_line: int
+    applied: bool  # dòng sau có được ghi hay không (theo policy)
+
+
+class AttendanceImportResult:
+    """Kết quả và tốc độ của một lần nhập điểm danh"""
+
+    def __init__(self, policy: str):
+        self.policy = policy
+        self.files: List[str] = []
+        self.rows = 0
+        self.applied = 0  # số bản ghi đã ghi vào hệ thống
+        self.created = 0  # trong đó là bản ghi mới (chưa có trước khi nhập)
+        self.duplicates = 0
+        self.batches = 0
+        self.conflicts: List[Conflict] = []
+        self.errors: List[ImportRowError] = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def write_conflicts(self, file_path: str) -> int:
+        """Ghi danh sách xung đột ra file CSV, trả về số xung đột"""
+        with open(file_path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['ma_sv', 'ma_mh', 'ngay', 'trang_thai', 'file', 'dong',
+                             'trang_thai_truoc', 'file_truoc', 'dong_truoc', 'da_ghi'])
+            writer.writerows(self.conflicts)
+        return len(self.conflicts)
+
+    def __str__(self) -> str:
+        return (f"Đã đọc {self.rows} dòng từ {len(self.files)} file, ghi {self.applied} bản ghi "
+                f"({self.created} mới) trong {self.batches} lô, bỏ {self.duplicates} dòng trùng, "
+                f"{len(self.conflicts)} xung đột, {len(self.errors)} lỗi trong {self.elapsed:.2f}s "
+                f"({self.rows_per_second:,.0f} dòng/s)")
+
+
+class AttendanceImporter:
+    """Một lần nhập gồm một hoặc nhiều file; dòng trùng được gộp giữa các file.
+
+    ``apply_batch`` nhận một lô bản ghi đã kiểm tra (mỗi khóa một lần) và trả
+    về số bản ghi mới. ``is_student``/``is_subject`` chỉ được gọi một lần cho
+    mỗi MSSV/mã môn khác nhau.
+    """
+
+    def __init__(self, apply_batch: Callable[[List[ImportedRecord]], int],
+                 is_student: Callable[[str], bool], is_subject: Optional[Callable[[str], bool]] = None,
+                 policy: str = 'last', batch_size: int = DEFAULT_BATCH_SIZE,
+                 progress: Optional[Callable[[AttendanceImportResult], None]] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Cách xử lý xung đột không hợp lệ: {policy} (chọn {', '.join(POLICIES)})")
+        self.apply_batch = apply_batch
+        self.is_student = is_student
+        self.is_subject = is_subject
+        self.batch_size = max(1, batch_size)
+        self.progress = progress
+        self.result = AttendanceImportResult(policy)
+        self._batch: Dict[int, ImportedRecord] = {}
+        # Khóa gộp (sinh viên, môn học, ngày) -> (vị trí dòng << 3) | mã trạng thái, lưu dạng số
+        # nguyên để lần nhập hàng triệu dòng không giữ hàng triệu tuple
+        self._seen: Dict[int, int] = {}
+        self._students: Dict[str, int] = {}
+        self._subjects: Dict[str, int] = {}
+        self._invalid_students: Set[str] = set()
+        self._invalid_subjects: Set[str] = set()
+        self._dates: Dict[str, Tuple[str, int]] = {}
+
+    def import_file(self, file_path: str) -> None:
+        """Đọc một file và ghi các lô đã đầy; phần còn lại được ghi ở ``finish``"""
+        result = self.result
+        file_index = len(result.files)
+        result.files.append(file_path)
+        try:
+            with open(file_path, 'r', encoding='utf-8-sig', newline='') as file:
+                reader = csv.reader(file)
+                header = [column.strip() for column in next(reader, [])]
+                missing = [column for column in ATTENDANCE_COLUMNS if column not in header]
+                if missing:
+                    result.errors.append(ImportRowError(file_path, 1, f"File thiếu cột: {', '.join(missing)}"))
+                    return
+                self._read_rows(reader, file_path, file_index, [header.index(column) for column in ATTENDANCE_COLUMNS])
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            result.errors.append(ImportRowError(file_path, 0, str(e)))
+
+    def _read_rows(self, reader, file_path: str, file_index: int, positions: Sequence[int]) -> None:
+        result = self.result
+        errors = result.errors
+        seen, batch, dates = self._seen, self._batch, self._dates
+        replace = result.policy == 'last'
+        id_position, subject_position, date_position, status_position = positions
+        width = max(positions) + 1
+        rows_before = result.rows
+        line = 1
+        for line, row in enumerate(reader, 2):
+            if not row:
+                continue
+            if len(row) < width:
+                errors.append(ImportRowError(file_path, line, f"Thiếu cột (có {len(row)}, cần {width})"))
+                continue
+            code = _STATUS_CODES.get(row[status_position].strip())
+            if code is None:
+                errors.append(ImportRowError(file_path, line, f"Trạng thái không hợp lệ: {row[status_position]}"))
+                continue
+            date_text = row[date_position].strip()
+            date = dates.get(date_text)
+            if date is None:
+                date = _parse_date(date_text)
+                if date is None:
+                    errors.append(ImportRowError(file_path, line, f"Ngày không hợp lệ: {date_text}"))
+                    continue
+                dates[date_text] = date
+            student_id = row[id_position].strip()
+            student = self._students.get(student_id)
+            if student is None:
+                student = self._check(student_id, self._students, self._invalid_students, self.is_student)
+                if student is None:
+                    errors.append(ImportRowError(file_path, line, f"MSSV {student_id} không tồn tại"))
+                    continue
+            subject = row[subject_position].strip()
+            subject_key = self._subjects.get(subject)
+            if subject_key is None:
+                subject_key = self._check(subject, self._subjects, self._invalid_subjects, self.is_subject)
+                if subject_key is None:
+                    errors.append(ImportRowError(file_path, line, f"Mã môn học {subject} không tồn tại"))
+                    continue
+
+            key = (((student << 16) | subject_key) << 20) | date[1]
+            position = (((file_index << 40) | line) << 3) | code
+            previous = seen.get(key)
+            if previous is not None:
+                if previous & 7 == code:
+                    result.duplicates += 1
+                    continue
+                result.conflicts.append(self._conflict(student_id, subject, date[0], code, file_index, line,
+                                                       previous, replace))
+                if not replace:
+                    continue
+            seen[key] = position
+            batch[key] = (subject, date[0], student_id, code, date[1])
+            if len(batch) >= self.batch_size:
+                result.rows = rows_before + line - 1
+                self.flush()
+                batch = self._batch
+        result.rows = rows_before + line - 1
+
+    @staticmethod
+    def _check(value: str, known: Dict[str, int], invalid: Set[str],
+               is_valid: Optional[Callable[[str], bool]]) -> Optional[int]:
+        """Số thứ tự của MSSV/mã môn trong lần nhập, None nếu không hợp lệ"""
+        if not value or value in invalid or (is_valid is not None and not is_valid(value)):
+            invalid.add(value)
+            return None
+        known[value] = len(known)
+        return known[value]
+
+    def _conflict(self, student_id: str, subject: str, date: str, code: int, file_index: int, line: int,
+                  previous: int, applied: bool) -> Conflict:
+        files = self.result.files
+        previous_line = (previous >> 3) & ((1 << 40) - 1)
+        return Conflict(student_id, subject, date, ATTENDANCE_STATUS[str(code)], files[file_index], line,
+                        ATTENDANCE_STATUS[str(previous & 7)], files[previous >> 43], previous_line, applied)
+
+    def flush(self) -> None:
+        """Ghi lô đang gom"""
+        result = self.result
+        if self._batch:
+            records = list(self._batch.values())
+            self._batch = {}
+            result.created += self.apply_batch(records)
+            result.applied += len(records)
+            result.batches += 1
+        result.elapsed = time.perf_counter() - result.started
+        if self.progress:
+            self.progress(result)
+
+    def finish(self) -> AttendanceImportResult:
+        self.flush()
+        return self.result
+
+
+def _parse_date(text: str) -> Optional[Tuple[str, int]]:
+    """(YYYY-MM-DD, số thứ tự ngày), None nếu không đọc được"""
+    for date_format in DATE_FORMATS:
+        try:
+            day = datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+        return day.isoformat(), day.toordinal()
+    return None
+
+
+def import_attendance(file_paths: Sequence[str], apply_batch: Callable[[List[ImportedRecord]], int],
+                      is_student: Callable[[str], bool], is_subject: Optional[Callable[[str], bool]] = None,
+                      policy: str = 'last', batch_size: int = DEFAULT_BATCH_SIZE,
+                      progress: Optional[Callable[[AttendanceImportResult], None]] = None) -> AttendanceImportResult:
+    """Nhập các file theo thứ tự (file sau là dữ liệu mới hơn) trong cùng một lần nhập"""
+    importer = AttendanceImporter(apply_batch, is_student, is_subject, policy, batch_size, progress)
+    for file_path in file_paths:
+        importer.import_file(file_path)
+    return importer.finish()
@@ -0,0 +1,191 @@
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+import os
+
+from services.attendance_store import AttendanceRun, CODE_BY_STATUS, date_to_ordinal, record_runs
+from utils.constants import (ATTENDANCE_STATUS, STATUS_CODES, ATTENDANCE_LOG_SYNC_EVERY,
+                             ATTENDANCE_LOG_COMPACT_EVERY)
+
+# (mã môn học, ngày, MSSV, trạng thái)
+AttendanceRecord = Tuple[str, str, str, str]
+
+
+class AttendanceLog:
+    """Nhật ký điểm danh chỉ ghi nối tiếp, kèm ảnh chụp (snapshot) đã nén gọn.
+
+    Mỗi sự kiện là một dòng ``op<TAB>môn<TAB>ngày<TAB>MSSV<TAB>mã trạng thái``.
+    Dữ liệu được fsync theo lô ``sync_every`` sự kiện; khi nhật ký vượt quá
+    ``compact_every`` sự kiện, trạng thái hiện tại được ghi thành snapshot
+    (mỗi dòng một cặp môn học/sinh viên) và nhật ký được làm rỗng, nên thời
+    gian nạp lại không tăng theo độ dài lịch sử.
+    """
+
+    def __init__(self, log_path: str, snapshot_path: str,
+                 sync_every: int = ATTENDANCE_LOG_SYNC_EVERY,
+                 compact_every: int = ATTENDANCE_LOG_COMPACT_EVERY):
+        self.log_path = log_path
+        self.snapshot_path = snapshot_path
+        self.sync_every = max(1, sync_every)
+        self.compact_every = compact_every
+        self.entries = 0  # số sự kiện trong nhật ký kể từ snapshot gần nhất
+        self._counted = False  # entries đã tính cả các dòng có sẵn trong file chưa
+        self._unsynced = 0
+        self._file: Optional[TextIO] = None
+
+    def replay(self) -> Iterator[AttendanceRecord]:
+        """Đọc lại snapshot rồi đến phần nhật ký phía sau, theo đúng thứ tự ghi"""
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) != 3:
+                        continue
+                    subject, student_id, records = parts
+                    for record in records.split(','):
+                        date, _, code = record.partition('=')
+                        status = ATTENDANCE_STATUS.get(code)
+                        if status:
+                            yield subject, date, student_id, status
+        yield from self._replay_log()
+
+    def replay_runs(self) -> Iterator[AttendanceRun]:
+        """Như replay nhưng mỗi dòng snapshot là một đoạn đã quy đổi sẵn (dùng với AttendanceStore.load_runs)"""
+        if os.path.exists(self.snapshot_path):
+            # Mỗi "ngày=mã" lặp lại ở rất nhiều dòng nên chỉ quy đổi một lần
+            tokens: Dict[str, Optional[Tuple[int, int]]] = {}
+            with open(self.snapshot_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) != 3:
+                        continue
+                    subject, student_id, records = parts
+                    days, codes = [], []
+                    for record in records.split(','):
+                        if record in tokens:
+                            value = tokens[record]
+                        else:
+                            value = tokens[record] = self._parse_token(record)
+                        if value is not None:
+                            days.append(value[0])
+                            codes.append(value[1])
+                    if days:
+                        yield subject, student_id, days, codes
+        yield from record_runs(self._replay_log())
+
+    @staticmethod
+    def _parse_token(record: str) -> Optional[Tuple[int, int]]:
+        date, _, code = record.partition('=')
+        status = ATTENDANCE_STATUS.get(code)
+        if not status:
+            return None
+        try:
+            return date_to_ordinal(date), CODE_BY_STATUS[status]
+        except ValueError:
+            return None
+
+    def _replay_log(self) -> Iterator[AttendanceRecord]:
+        self.entries = 0
+        self._counted = True
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    # Dòng cuối có thể bị ghi dở nếu tiến trình dừng đột ngột
+                    if not line.endswith('\n'):
+                        break
+                    parts = line[:-1].split('\t')
+                    if len(parts) != 5:
+                        continue
+                    _, subject, date, student_id, code = parts
+                    status = ATTENDANCE_STATUS.get(code)
+                    if status:
+                        self.entries += 1
+                        yield subject, date, student_id, status
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+        lines = self._repair_tail()
+        if not self._counted:
+            # Chưa replay (ví dụ chế độ nạp lười): đếm các sự kiện đã có để vẫn nén đúng hạn
+            self.entries += lines
+            self._counted = True
+        # Ghi theo dòng để sự kiện đã vào bộ đệm của hệ điều hành ngay lập tức
+        self._file = open(self.log_path, 'a', encoding='utf-8', buffering=1)
+
+    def _repair_tail(self) -> int:
+        """Cắt dòng cuối ghi dở (thiếu ký tự xuống dòng) để sự kiện ghi tiếp không dính vào nó, trả về số dòng"""
+        if not os.path.exists(self.log_path):
+            return 0
+        lines, end = 0, 0
+        with open(self.log_path, 'rb+') as file:
+            while True:
+                chunk = file.read(1 << 20)
+                if not chunk:
+                    break
+                newline = chunk.rfind(b'\n')
+                if newline >= 0:
+                    lines += chunk.count(b'\n')
+                    end = file.tell() - len(chunk) + newline + 1
+            if file.tell() != end:
+                file.truncate(end)
+                file.flush()
+                os.fsync(file.fileno())
+        return lines
+
+    def append(self, op: str, subject: str, date: str, student_id: str, status: str) -> None:
+        """Ghi một sự kiện điểm danh ('A' = thêm, 'E' = sửa) vào cuối nhật ký"""
+        if self._file is None:
+            self._open()
+        self._file.write(f"{op}\t{subject}\t{date}\t{student_id}\t{STATUS_CODES[status]}\n")
+        self.entries += 1
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.flush()
+
+    def append_many(self, records: Iterable[AttendanceRecord], op: str = 'A') -> None:
+        """Ghi nhiều sự kiện cùng lúc rồi fsync một lần"""
+        if self._file is None:
+            self._open()
+        lines = [f"{op}\t{subject}\t{date}\t{student_id}\t{STATUS_CODES[status]}\n"
+                 for subject, date, student_id, status in records]
+        self._file.write(''.join(lines))
+        self.entries += len(lines)
+        self._unsynced += len(lines)
+        self.flush()
+
+    def flush(self) -> None:
+        """Đẩy các sự kiện đang chờ xuống đĩa"""
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def needs_compaction(self) -> bool:
+        """Kiểm tra nhật ký đã đủ dài để nén thành snapshot chưa"""
+        return self.entries >= self.compact_every
+
+    def compact(self, records: Iterable[AttendanceRecord]) -> None:
+        """Ghi toàn bộ trạng thái hiện tại thành snapshot mới và làm rỗng nhật ký"""
+        grouped: Dict[Tuple[str, str], List[str]] = {}
+        for subject, date, student_id, status in records:
+            grouped.setdefault((subject, student_id), []).append(f"{date}={STATUS_CODES[status]}")
+
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            for (subject, student_id), entries in grouped.items():
+                file.write(f"{subject}\t{student_id}\t{','.join(entries)}\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+        # Snapshot đã an toàn trên đĩa, giờ mới được phép xóa nhật ký
+        self.close()
+        with open(self.log_path, 'w', encoding='utf-8') as file:
+            file.flush()
+            os.fsync(file.fileno())
+        self.entries = 0
+
+    def close(self) -> None:
+        """Đóng nhật ký sau khi đã đẩy hết dữ liệu xuống đĩa"""
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
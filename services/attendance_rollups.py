@@ -0,0 +1,216 @@
+"""
+Số buổi điểm danh tổng hợp sẵn theo ngày, tuần và tháng cho bảng điều khiển.
+
+Với mỗi nhóm (lớp, môn học) AttendanceRollups giữ số buổi theo từng mã trạng
+thái của từng ngày, từng tuần (bắt đầu thứ Hai) và từng tháng; các nhóm "mọi
+lớp" và/hoặc "mọi môn" cũng được giữ sẵn nên mọi truy vấn chỉ tra một nhóm.
+Bộ tổng hợp được dựng một lần từ AttendanceStore rồi cập nhật theo từng lần
+ghi qua ``store.listener``. Truy vấn một khoảng thời gian bất kỳ cộng các ô
+tuần/tháng nằm trọn trong khoảng và cộng từng ngày ở hai đầu, nên xu hướng cả
+năm học chỉ tốn vài chục lần tra dict.
+"""
+from array import array
+from collections import Counter
+from datetime import date as Date
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from services.attendance_store import AttendanceStore, STATUS_BY_CODE, CODE_BY_STATUS, ordinal_to_date
+
+# Khóa nhóm dùng ALL thay cho chỉ số lớp/môn học để chỉ "mọi lớp"/"mọi môn"
+ALL = -1
+PERIODS = ('day', 'week', 'month')
+ATTENDED_CODES = (CODE_BY_STATUS['Có mặt'], CODE_BY_STATUS['Đi trễ'])
+_WIDTH = max(STATUS_BY_CODE) + 1
+_ZERO = array('I', [0] * _WIDTH)
+
+# Ba mức của một nhóm: ngày (số thứ tự ngày), tuần (số thứ tự ngày thứ Hai), tháng (năm * 12 + tháng - 1)
+Levels = Tuple[Dict[int, array], Dict[int, array], Dict[int, array]]
+
+
+class RollupBucket(NamedTuple):
+    start: str  # ngày đầu (YYYY-MM-DD) của kỳ, đã cắt theo khoảng truy vấn
+    end: str
+    counts: Dict[str, int]  # số buổi theo trạng thái
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def attendance_rate(self) -> float:
+        """Tỷ lệ buổi có mặt (kể cả đi trễ) trên tổng số buổi, 0 nếu kỳ không có buổi nào"""
+        total = self.total
+        attended = sum(self.counts[STATUS_BY_CODE[code]] for code in ATTENDED_CODES)
+        return attended / total if total else 0.0
+
+
+def week_of(day: int) -> int:
+    """Số thứ tự ngày thứ Hai của tuần chứa ``day``"""
+    return day - (day + 6) % 7
+
+
+def month_start(month: int) -> int:
+    return Date(month // 12, month % 12 + 1, 1).toordinal()
+
+
+class AttendanceRollups:
+    """Số buổi theo trạng thái của từng (lớp, môn học) × ngày/tuần/tháng, cập nhật theo từng lần ghi.
+
+    ``class_of`` trả về lớp của một MSSV (None nếu chưa biết sinh viên, khi đó
+    điểm danh được tính vào lớp rỗng cho tới khi ``move_student``). Các thao
+    tác ghi chạy trong ``store.write_lock``; truy vấn không lấy khóa.
+    """
+
+    def __init__(self, store: AttendanceStore, class_of: Callable[[str], Optional[str]]):
+        self.store = store
+        self._class_of = class_of
+        self.class_names: List[str] = []
+        self.class_ids: Dict[str, int] = {}
+        # Chỉ số lớp theo chỉ số sinh viên trong kho
+        self._student_class = array('i')
+        self._groups: Dict[Tuple[int, int], Levels] = {}
+        self._months: Dict[int, int] = {}
+
+    def build(self) -> 'AttendanceRollups':
+        """Dựng lại toàn bộ từ kho rồi nhận các lần ghi sau đó"""
+        store = self.store
+        with store.write_lock:
+            snapshot = store.snapshot()
+            self._groups.clear()
+            self._student_class = array('i')
+            for index in range(snapshot.student_count):
+                self._class_index(index)
+            daily = Counter(zip(map(self._student_class.__getitem__, snapshot.student_idx),
+                                snapshot.subject_idx, snapshot.days, snapshot.statuses))
+            for (class_index, subject_index, day, code), count in daily.items():
+                self._add(class_index, subject_index, day, code, count)
+            store.listener = self.record
+        return self
+
+    def detach(self) -> None:
+        if self.store.listener == self.record:
+            self.store.listener = None
+
+    def record(self, student: int, subject_index: int, day: int, previous: int, code: int) -> None:
+        """Nhận một lần ghi từ AttendanceStore (``previous`` là 0 nếu là bản ghi mới)"""
+        class_index = self._class_index(student)
+        if previous:
+            self._add(class_index, subject_index, day, previous, -1)
+        self._add(class_index, subject_index, day, code, 1)
+
+    def move_student(self, student_id: str, class_name: Optional[str]) -> None:
+        """Chuyển điểm danh đã tính của sinh viên sang lớp mới"""
+        store = self.store
+        with store.write_lock:
+            student = store.student_ids.get(student_id)
+            if student is None or student >= len(self._student_class):
+                return
+            old, new = self._student_class[student], self._intern_class(class_name or '')
+            if old == new:
+                return
+            self._student_class[student] = new
+            days, statuses = store.days, store.statuses
+            for subject_index, rows in store.pairs_of(student):
+                for row in rows:
+                    day, code = days[row], statuses[row]
+                    # Các nhóm "mọi lớp" không đổi
+                    self._add(old, subject_index, day, code, -1, False)
+                    self._add(new, subject_index, day, code, 1, False)
+
+    def trend(self, start: Date, end: Date, period: str = 'week', class_name: Optional[str] = None,
+              subject: Optional[str] = None) -> List[RollupBucket]:
+        """Số buổi theo trạng thái của từng ngày/tuần/tháng trong [start, end] (lọc theo lớp, môn học)"""
+        if period not in PERIODS:
+            raise ValueError(f"Kỳ tổng hợp không hợp lệ: {period} (chọn {', '.join(PERIODS)})")
+        first, last = start.toordinal(), end.toordinal()
+        level = PERIODS.index(period)
+        levels = self._levels(class_name, subject)
+        buckets = []
+        for key, period_first, period_last in self._periods(first, last, period):
+            low, high = max(first, period_first), min(last, period_last)
+            counts = array('I', _ZERO)
+            if levels is not None:
+                if low == period_first and high == period_last:
+                    _accumulate(counts, levels[level].get(key))
+                else:
+                    days = levels[0]
+                    for day in range(low, high + 1):
+                        _accumulate(counts, days.get(day))
+            buckets.append(RollupBucket(ordinal_to_date(low), ordinal_to_date(high),
+                                        {status: counts[code] for code, status in STATUS_BY_CODE.items()}))
+        return buckets
+
+    def totals(self, start: Date, end: Date, class_name: Optional[str] = None,
+               subject: Optional[str] = None) -> RollupBucket:
+        """Tổng số buổi theo trạng thái trong [start, end]"""
+        counts = {status: 0 for status in STATUS_BY_CODE.values()}
+        for bucket in self.trend(start, end, 'month', class_name, subject):
+            for status, count in bucket.counts.items():
+                counts[status] += count
+        return RollupBucket(start.isoformat()[:10], end.isoformat()[:10], counts)
+
+    def _levels(self, class_name: Optional[str], subject: Optional[str]) -> Optional[Levels]:
+        class_index = ALL if class_name is None else self.class_ids.get(class_name)
+        subject_index = ALL if subject is None else self.store.subject_ids.get(subject)
+        if class_index is None or subject_index is None:
+            return None
+        return self._groups.get((class_index, subject_index))
+
+    def _periods(self, first: int, last: int, period: str) -> Iterator[Tuple[int, int, int]]:
+        """(khóa, ngày đầu, ngày cuối) của các kỳ giao với [first, last]"""
+        if period == 'day':
+            for day in range(first, last + 1):
+                yield day, day, day
+        elif period == 'week':
+            for monday in range(week_of(first), last + 1, 7):
+                yield monday, monday, monday + 6
+        else:
+            month, period_first = self._month_of(first), month_start(self._month_of(first))
+            while period_first <= last:
+                next_first = month_start(month + 1)
+                yield month, period_first, next_first - 1
+                month, period_first = month + 1, next_first
+
+    def _month_of(self, day: int) -> int:
+        month = self._months.get(day)
+        if month is None:
+            value = Date.fromordinal(day)
+            month = self._months[day] = value.year * 12 + value.month - 1
+        return month
+
+    def _intern_class(self, class_name: str) -> int:
+        index = self.class_ids.get(class_name)
+        if index is None:
+            index = len(self.class_names)
+            self.class_names.append(class_name)
+            self.class_ids[class_name] = index
+        return index
+
+    def _class_index(self, student: int) -> int:
+        student_class, codes = self._student_class, self.store.student_codes
+        while len(student_class) <= student:
+            # Chỉ số sinh viên được cấp tăng dần nên chỉ cần nối thêm
+            student_class.append(self._intern_class(self._class_of(codes[len(student_class)]) or ''))
+        return student_class[student]
+
+    def _add(self, class_index: int, subject_index: int, day: int, code: int, delta: int,
+             all_classes: bool = True) -> None:
+        keys = (day, week_of(day), self._month_of(day))
+        groups = [(class_index, subject_index), (class_index, ALL)]
+        if all_classes:
+            groups += [(ALL, subject_index), (ALL, ALL)]
+        for group in groups:
+            levels = self._groups.get(group)
+            if levels is None:
+                levels = self._groups[group] = ({}, {}, {})
+            for buckets, key in zip(levels, keys):
+                counts = buckets.get(key)
+                if counts is None:
+                    counts = buckets[key] = array('I', _ZERO)
+                counts[code] += delta
+
+
+def _accumulate(total: array, counts: Optional[array]) -> None:
+    if counts is not None:
+        for code in range(1, _WIDTH):
+            total[code] += counts[code]
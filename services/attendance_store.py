@@ -0,0 +1,496 @@
+from array import array
+from bisect import bisect_left, bisect_right
+import heapq
+from collections.abc import Mapping
+from datetime import date as Date
+from operator import lt
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import threading
+
+from utils.constants import ATTENDANCE_STATUS, STATUS_CODES
+
+# Trạng thái được lưu dưới dạng mã số nhỏ (1-5) theo ATTENDANCE_STATUS
+STATUS_BY_CODE: Dict[int, str] = {int(code): status for code, status in ATTENDANCE_STATUS.items()}
+CODE_BY_STATUS: Dict[str, int] = {status: int(code) for status, code in STATUS_CODES.items()}
+ABSENT_CODES = (CODE_BY_STATUS['Vắng mặt'], CODE_BY_STATUS['Không phép'])
+# Hàm nhận từng lần ghi: (chỉ số sinh viên, chỉ số môn học, ngày, mã cũ hoặc 0 nếu là bản ghi mới, mã mới)
+WriteListener = Callable[[int, int, int, int, int], None]
+# Độ dài một bản ghi cặp trong load_columns: sinh viên, môn học, dòng bắt đầu, số buổi theo mã 1..5
+PAIR_WIDTH = 3 + max(STATUS_BY_CODE)
+
+
+def date_to_ordinal(date: str) -> int:
+    """Chuyển ngày dạng YYYY-MM-DD thành số thứ tự ngày"""
+    return Date.fromisoformat(date).toordinal()
+
+
+def ordinal_to_date(ordinal: int) -> str:
+    """Chuyển số thứ tự ngày về dạng YYYY-MM-DD"""
+    return Date.fromordinal(ordinal).isoformat()
+
+
+class ColumnSnapshot(NamedTuple):
+    """Bản sao các mảng cột tại một thời điểm, đọc được mà không cần khóa"""
+    student_idx: array
+    subject_idx: array
+    days: array
+    statuses: array
+    student_count: int  # số sinh viên đã quy đổi, mọi chỉ số trong student_idx đều nhỏ hơn
+
+
+# (mã môn học, MSSV, số thứ tự các ngày, mã trạng thái tương ứng): các bản ghi liền nhau của một cặp
+AttendanceRun = Tuple[str, str, List[int], List[int]]
+
+
+def group_runs(records: Iterable[Tuple[str, str, int, int]]) -> Iterator[AttendanceRun]:
+    """Gom các bản ghi (môn học, MSSV, số thứ tự ngày, mã trạng thái) liền nhau của cùng một cặp"""
+    run_subject = run_student = None
+    days: List[int] = []
+    codes: List[int] = []
+    for subject, student_id, day, code in records:
+        if student_id != run_student or subject != run_subject:
+            if days:
+                yield run_subject, run_student, days, codes
+            run_subject, run_student, days, codes = subject, student_id, [], []
+        days.append(day)
+        codes.append(code)
+    if days:
+        yield run_subject, run_student, days, codes
+
+
+def record_runs(records: Iterable[Tuple[str, str, str, str]]) -> Iterator[AttendanceRun]:
+    """Như group_runs cho các bản ghi (môn học, ngày, MSSV, trạng thái) dạng chuỗi"""
+    ordinals: Dict[str, int] = {}
+
+    def convert(date: str) -> int:
+        day = ordinals.get(date)
+        if day is None:
+            day = ordinals[date] = date_to_ordinal(date)
+        return day
+
+    return group_runs((subject, student_id, convert(date), CODE_BY_STATUS[status])
+                      for subject, date, student_id, status in records)
+
+
+class AttendanceStore:
+    """Kho điểm danh dạng cột, dùng mảng kiểu cố định thay cho dict lồng nhau.
+
+    Môn học và sinh viên được quy đổi thành chỉ số nguyên, ngày thành số thứ tự
+    ngày và trạng thái thành mã trong ATTENDANCE_STATUS. Mỗi bản ghi là một
+    dòng trong bốn mảng song song ``student_idx``, ``subject_idx``, ``days`` và
+    ``statuses``; chỉ mục ``_rows`` giữ danh sách dòng theo từng cặp sinh
+    viên/môn học (sắp theo ngày) để tra cứu và cập nhật, còn ``_tallies`` giữ số buổi theo
+    từng mã trạng thái của cặp đó để xét điều kiện dự thi trong O(1).
+
+    Các thao tác ghi đi qua ``write_lock``; thao tác đọc không lấy khóa. Luồng
+    đọc cần duyệt nhiều dòng (báo cáo) dùng ``snapshot()``, các dict chỉ mục
+    được chụp lại bằng ``list()`` trước khi duyệt nên không bị lỗi khi luồng
+    khác đang ghi.
+    """
+
+    def __init__(self):
+        self.subject_ids: Dict[str, int] = {}
+        self.subject_codes: List[str] = []
+        self.student_ids: Dict[str, int] = {}
+        self.student_codes: List[str] = []
+
+        self.student_idx = array('I')
+        self.subject_idx = array('H')
+        self.days = array('I')
+        self.statuses = array('B')
+
+        # _rows[chỉ số sinh viên][chỉ số môn học] -> các dòng của cặp đó
+        self._rows: List[Dict[int, array]] = []
+        # _tallies[chỉ số sinh viên][chỉ số môn học][mã trạng thái] -> số buổi
+        self._tallies: List[Dict[int, array]] = []
+        self.write_lock = threading.RLock()
+        # Được gọi trong write_lock sau mỗi bản ghi mới/đổi trạng thái (load_columns không gọi)
+        self.listener: Optional[WriteListener] = None
+
+    def __len__(self) -> int:
+        return len(self.statuses)
+
+    def intern_subject(self, subject: str) -> int:
+        """Lấy (hoặc cấp mới) chỉ số nguyên cho mã môn học"""
+        index = self.subject_ids.get(subject)
+        if index is None:
+            with self.write_lock:
+                index = self.subject_ids.get(subject)
+                if index is None:
+                    # Thêm vào danh sách trước để luồng đọc thấy chỉ số thì đã đổi được ra mã
+                    index = len(self.subject_codes)
+                    self.subject_codes.append(subject)
+                    self.subject_ids[subject] = index
+        return index
+
+    def intern_student(self, student_id: str) -> int:
+        """Lấy (hoặc cấp mới) chỉ số nguyên cho MSSV"""
+        index = self.student_ids.get(student_id)
+        if index is None:
+            with self.write_lock:
+                index = self.student_ids.get(student_id)
+                if index is None:
+                    index = len(self.student_codes)
+                    self.student_codes.append(student_id)
+                    self._rows.append({})
+                    self._tallies.append({})
+                    self.student_ids[student_id] = index
+        return index
+
+    def _find_row(self, student_id: str, subject: str, date: str) -> Optional[int]:
+        student = self.student_ids.get(student_id)
+        subject_index = self.subject_ids.get(subject)
+        if student is None or subject_index is None:
+            return None
+        rows = self._rows[student].get(subject_index)
+        if not rows:
+            return None
+        day = date_to_ordinal(date)
+        position = bisect_left(rows, day, key=self.days.__getitem__)
+        if position < len(rows) and self.days[rows[position]] == day:
+            return rows[position]
+        return None
+
+    def _upsert(self, student: int, subject_index: int, day: int, code: int) -> bool:
+        """Ghi một bản ghi theo chỉ số đã quy đổi, giữ các dòng của cặp theo thứ tự ngày"""
+        rows = self._rows[student].get(subject_index)
+        if rows is None:
+            rows = self._rows[student][subject_index] = array('I')
+            self._tallies[student][subject_index] = array('I', [0] * (max(STATUS_BY_CODE) + 1))
+
+        days = self.days
+        if rows and days[rows[-1]] >= day:
+            position = bisect_left(rows, day, key=days.__getitem__)
+            if days[rows[position]] == day:
+                self._restatus(rows[position], code)
+                return False
+        else:
+            # Trường hợp thường gặp: buổi mới nhất được ghi sau cùng
+            position = len(rows)
+
+        # ``statuses`` được nối sau cùng: luồng đọc lấy độ dài của nó làm số dòng hoàn chỉnh
+        row = len(self.statuses)
+        self.student_idx.append(student)
+        self.subject_idx.append(subject_index)
+        days.append(day)
+        self.statuses.append(code)
+        rows.insert(position, row)
+        self._tallies[student][subject_index][code] += 1
+        if self.listener is not None:
+            self.listener(student, subject_index, day, 0, code)
+        return True
+
+    def set(self, student_id: str, subject: str, date: str, status: str) -> bool:
+        """Ghi điểm danh (ghi đè nếu đã có), trả về True nếu là bản ghi mới"""
+        code = CODE_BY_STATUS[status]
+        day = date_to_ordinal(date)
+        with self.write_lock:
+            return self._upsert(self.intern_student(student_id), self.intern_subject(subject), day, code)
+
+    def set_many(self, subject: str, date: str, codes: Iterable[Tuple[str, int]]) -> int:
+        """Ghi điểm danh một buổi cho nhiều sinh viên (mã trạng thái đã kiểm tra), trả về số bản ghi mới"""
+        subject_index = self.intern_subject(subject)
+        day = date_to_ordinal(date)
+        created = 0
+        with self.write_lock:
+            for student_id, code in codes:
+                created += self._upsert(self.intern_student(student_id), subject_index, day, code)
+        return created
+
+    def set_records(self, records: Iterable[Tuple[str, str, int, int]]) -> int:
+        """Ghi nhiều bản ghi (MSSV, môn học, số thứ tự ngày, mã trạng thái) đã kiểm tra, trả về số bản ghi mới"""
+        created = 0
+        with self.write_lock:
+            for student_id, subject, day, code in records:
+                created += self._upsert(self.intern_student(student_id), self.intern_subject(subject), day, code)
+        return created
+
+    def load_runs(self, runs: Iterable[AttendanceRun]) -> int:
+        """Nạp nhanh điểm danh đọc lại từ nhật ký/kho lưu trữ theo từng đoạn của một cặp, trả về số bản ghi.
+
+        Đoạn của cặp chưa có dòng nào, ngày tăng dần (như trong snapshot) được
+        nối thẳng vào các cột; các đoạn khác được ghi lần lượt như ``set``.
+        """
+        count = 0
+        with self.write_lock:
+            for subject, student_id, days, codes in runs:
+                self._load_run(subject, student_id, days, codes)
+                count += len(days)
+        return count
+
+    def _load_run(self, subject: str, student_id: str, days: List[int], codes: List[int]) -> None:
+        student, subject_index = self.intern_student(student_id), self.intern_subject(subject)
+        if (self.listener is not None or self._rows[student].get(subject_index)
+                or not all(map(lt, days, days[1:]))):
+            for day, code in zip(days, codes):
+                self._upsert(student, subject_index, day, code)
+            return
+        first, size = len(self.statuses), len(days)
+        tally = array('I', [codes.count(code) for code in range(max(STATUS_BY_CODE) + 1)])
+        self.student_idx.extend(array('I', [student]) * size)
+        self.subject_idx.extend(array('H', [subject_index]) * size)
+        self.days.extend(days)
+        # ``statuses`` được nối sau cùng như trong _upsert
+        self.statuses.extend(codes)
+        self._tallies[student][subject_index] = tally
+        self._rows[student][subject_index] = array('I', range(first, first + size))
+
+    def update(self, student_id: str, subject: str, date: str, status: str) -> bool:
+        """Cập nhật điểm danh đã có, trả về False nếu chưa có bản ghi"""
+        code = CODE_BY_STATUS[status]
+        with self.write_lock:
+            row = self._find_row(student_id, subject, date)
+            if row is None:
+                return False
+            self._restatus(row, code)
+        return True
+
+    def _restatus(self, row: int, code: int) -> None:
+        """Đổi trạng thái của một dòng và điều chỉnh bộ đếm tương ứng"""
+        student, subject_index, previous = self.student_idx[row], self.subject_idx[row], self.statuses[row]
+        tally = self._tallies[student][subject_index]
+        tally[previous] -= 1
+        tally[code] += 1
+        self.statuses[row] = code
+        if self.listener is not None and previous != code:
+            self.listener(student, subject_index, self.days[row], previous, code)
+
+    def get(self, student_id: str, subject: str, date: str) -> Optional[str]:
+        """Lấy trạng thái điểm danh của một buổi"""
+        row = self._find_row(student_id, subject, date)
+        return STATUS_BY_CODE[self.statuses[row]] if row is not None else None
+
+    def subjects_of(self, student_id: str) -> List[str]:
+        """Danh sách môn học đã có điểm danh của sinh viên"""
+        student = self.student_ids.get(student_id)
+        if student is None:
+            return []
+        return [self.subject_codes[s] for s, rows in list(self._rows[student].items()) if rows]
+
+    def rows_of(self, student_id: str, subject: str) -> array:
+        """Các dòng điểm danh của sinh viên trong một môn học"""
+        student = self.student_ids.get(student_id)
+        subject_index = self.subject_ids.get(subject)
+        if student is None or subject_index is None:
+            return array('I')
+        return self._rows[student].get(subject_index, array('I'))
+
+    def status_counts(self, student_id: str, subject: str) -> Dict[str, int]:
+        """Số buổi theo từng trạng thái của sinh viên trong một môn học"""
+        student = self.student_ids.get(student_id)
+        subject_index = self.subject_ids.get(subject)
+        tally = None
+        if student is not None and subject_index is not None:
+            tally = self._tallies[student].get(subject_index)
+        return {status: tally[code] if tally else 0 for code, status in STATUS_BY_CODE.items()}
+
+    def count_absences(self, student_id: str, subject: str) -> int:
+        """Số buổi vắng (Vắng mặt, Không phép) của sinh viên trong một môn học"""
+        student = self.student_ids.get(student_id)
+        subject_index = self.subject_ids.get(subject)
+        if student is None or subject_index is None:
+            return 0
+        tally = self._tallies[student].get(subject_index)
+        return sum(tally[code] for code in ABSENT_CODES) if tally else 0
+
+    def iter_absences(self) -> Iterator[Tuple[str, str, int]]:
+        """Duyệt số buổi vắng của mọi cặp (MSSV, môn học) từ bộ đếm"""
+        student_codes, subject_codes = self.student_codes, self.subject_codes
+        first, second = ABSENT_CODES
+        for student in range(len(self._tallies)):
+            student_id = student_codes[student]
+            for subject_index, tally in list(self._tallies[student].items()):
+                yield student_id, subject_codes[subject_index], tally[first] + tally[second]
+
+    def records(self, student_id: str, subject: str) -> Iterator[Tuple[str, str]]:
+        """Duyệt các cặp (ngày, trạng thái) của sinh viên trong một môn học"""
+        for row in self.rows_of(student_id, subject):
+            yield ordinal_to_date(self.days[row]), STATUS_BY_CODE[self.statuses[row]]
+
+    def iter_history(self, student_id: str, subject: Optional[str] = None,
+                     first_day: Optional[int] = None, last_day: Optional[int] = None,
+                     newest_first: bool = True) -> Iterator[Tuple[str, str, str]]:
+        """Duyệt lười lịch sử (môn học, ngày, trạng thái) theo thứ tự ngày.
+
+        Khoảng ngày [first_day, last_day] (số thứ tự ngày) được tìm bằng chia
+        đôi trên các dòng đã sắp xếp của từng môn, nên lấy k buổi gần nhất chỉ
+        tốn O(log n + k).
+        """
+        student = self.student_ids.get(student_id)
+        if student is None:
+            return iter(())
+        pairs = list(self._rows[student].items())
+        if subject is not None:
+            subject_index = self.subject_ids.get(subject)
+            pairs = [(index, rows) for index, rows in pairs if index == subject_index]
+
+        streams = [self._iter_pair(subject_index, rows, first_day, last_day, newest_first)
+                   for subject_index, rows in pairs]
+        if len(streams) == 1:
+            merged = streams[0]
+        else:
+            merged = heapq.merge(*streams, key=lambda item: item[0], reverse=newest_first)
+        return ((self.subject_codes[subject_index], ordinal_to_date(day), STATUS_BY_CODE[code])
+                for day, subject_index, code in merged)
+
+    def _iter_pair(self, subject_index: int, rows: array, first_day: Optional[int],
+                   last_day: Optional[int], newest_first: bool) -> Iterator[Tuple[int, int, int]]:
+        days = self.days
+        low = 0 if first_day is None else bisect_left(rows, first_day, key=days.__getitem__)
+        high = len(rows) if last_day is None else bisect_right(rows, last_day, key=days.__getitem__)
+        positions = range(high - 1, low - 1, -1) if newest_first else range(low, high)
+        for position in positions:
+            row = rows[position]
+            yield days[row], subject_index, self.statuses[row]
+
+    def iter_records(self) -> Iterator[Tuple[str, str, str, str]]:
+        """Duyệt toàn bộ bản ghi dưới dạng (môn học, ngày, MSSV, trạng thái)"""
+        dates: Dict[int, str] = {}
+        for row in range(len(self.statuses)):
+            day = self.days[row]
+            date = dates.get(day)
+            if date is None:
+                date = dates[day] = ordinal_to_date(day)
+            yield (self.subject_codes[self.subject_idx[row]], date,
+                   self.student_codes[self.student_idx[row]], STATUS_BY_CODE[self.statuses[row]])
+
+    def pairs_of(self, student: int) -> List[Tuple[int, array]]:
+        """Các cặp (chỉ số môn học, các dòng theo thứ tự ngày) của sinh viên có chỉ số ``student``"""
+        return list(self._rows[student].items())
+
+    def rows_at(self, student: int, subject_index: int) -> Optional[array]:
+        """Các dòng (theo thứ tự ngày) của cặp (chỉ số sinh viên, chỉ số môn học), None nếu chưa có"""
+        return self._rows[student].get(subject_index)
+
+    def tally_of(self, student: int, subject_index: int) -> array:
+        """Bộ đếm theo mã trạng thái của cặp (chỉ số sinh viên, chỉ số môn học)"""
+        return self._tallies[student][subject_index]
+
+    def load_columns(self, student_codes: Sequence[str], subject_codes: Sequence[str],
+                     columns: ColumnSnapshot, pairs: Sequence[int]) -> None:
+        """Nạp nhanh dữ liệu đã sắp theo (sinh viên, môn học, ngày) vào kho đang rỗng.
+
+        ``pairs`` gồm các bản ghi PAIR_WIDTH số nguyên (sinh viên, môn học, dòng
+        bắt đầu, số buổi theo từng mã trạng thái 1..5), mỗi bản ghi ứng với một
+        đoạn dòng liền nhau của cùng một cặp; chỉ mục dòng và bộ đếm được dựng
+        theo từng đoạn thay vì từng bản ghi. Các cột được chép một lần vào mảng
+        của kho (kho còn ghi tiếp được), nên ``columns`` có thể là view của file
+        mmap đóng ngay sau khi nạp.
+        """
+        with self.write_lock:
+            if len(self.statuses) or self.student_codes or self.subject_codes:
+                raise ValueError("Chỉ nạp được vào kho điểm danh rỗng")
+            for subject in subject_codes:
+                self.intern_subject(subject)
+            for student_id in student_codes:
+                self.intern_student(student_id)
+            self.student_idx.frombytes(memoryview(columns.student_idx).cast('B'))
+            self.subject_idx.frombytes(memoryview(columns.subject_idx).cast('B'))
+            self.days.frombytes(memoryview(columns.days).cast('B'))
+            self.statuses.frombytes(memoryview(columns.statuses).cast('B'))
+
+            total = len(self.statuses)
+            rows, tallies = self._rows, self._tallies
+            zero = array('I', [0])
+            for position in range(0, len(pairs), PAIR_WIDTH):
+                student, subject_index, first = pairs[position:position + 3]
+                following = position + PAIR_WIDTH
+                last = pairs[following + 2] if following < len(pairs) else total
+                rows[student][subject_index] = array('I', range(first, last))
+                tallies[student][subject_index] = zero + array('I', pairs[position + 3:following])
+
+    def snapshot(self) -> ColumnSnapshot:
+        """Chụp các mảng cột (chỉ gồm các dòng đã ghi xong) để duyệt mà không chặn luồng ghi"""
+        rows = len(self.statuses)
+        return ColumnSnapshot(self.student_idx[:rows], self.subject_idx[:rows],
+                              self.days[:rows], self.statuses[:rows], len(self.student_codes))
+
+    def nbytes(self) -> int:
+        """Dung lượng (byte) của các mảng cột và chỉ mục dòng"""
+        columns = (self.student_idx, self.subject_idx, self.days, self.statuses)
+        total = sum(column.itemsize * len(column) for column in columns)
+        total += sum(rows.itemsize * len(rows) for pairs in self._rows for rows in list(pairs.values()))
+        return total
+
+
+class SubjectAttendanceView(Mapping):
+    """Bản ghi điểm danh một môn của sinh viên, dạng ``{ngày: trạng thái}``"""
+
+    __slots__ = ('_store', '_student_id', '_subject')
+
+    def __init__(self, store: AttendanceStore, student_id: str, subject: str):
+        self._store = store
+        self._student_id = student_id
+        self._subject = subject
+
+    def __getitem__(self, date: str) -> str:
+        try:
+            status = self._store.get(self._student_id, self._subject, date)
+        except ValueError:
+            status = None
+        if status is None:
+            raise KeyError(date)
+        return status
+
+    def __setitem__(self, date: str, status: str) -> None:
+        self._store.set(self._student_id, self._subject, date, status)
+
+    def __iter__(self) -> Iterator[str]:
+        for date, _ in self._store.records(self._student_id, self._subject):
+            yield date
+
+    def __len__(self) -> int:
+        return len(self._store.rows_of(self._student_id, self._subject))
+
+    def items(self):
+        return list(self._store.records(self._student_id, self._subject))
+
+    def values(self):
+        return [status for _, status in self._store.records(self._student_id, self._subject)]
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class StudentAttendanceView(Mapping):
+    """Điểm danh của sinh viên dạng ``{môn học: {ngày: trạng thái}}`` đọc từ AttendanceStore.
+
+    Dùng thay cho ``Student.attendance`` nên các phương thức sẵn có của
+    Student vẫn hoạt động mà không phải sửa.
+    """
+
+    __slots__ = ('_store', '_student_id')
+
+    def __init__(self, store: AttendanceStore, student_id: str):
+        self._store = store
+        self._student_id = student_id
+
+    def __getitem__(self, subject: str) -> SubjectAttendanceView:
+        if subject not in self._store.subject_ids:
+            raise KeyError(subject)
+        return SubjectAttendanceView(self._store, self._student_id, subject)
+
+    def __contains__(self, subject: object) -> bool:
+        return isinstance(subject, str) and bool(self._store.rows_of(self._student_id, subject))
+
+    def __setitem__(self, subject: str, records: Dict[str, str]) -> None:
+        self._store.intern_subject(subject)
+        for date, status in records.items():
+            self._store.set(self._student_id, subject, date, status)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.subjects_of(self._student_id))
+
+    def __len__(self) -> int:
+        return len(self._store.subjects_of(self._student_id))
+
+    def count_absences(self, subject: str) -> int:
+        """Số buổi vắng trong môn học, lấy từ bộ đếm của kho"""
+        return self._store.count_absences(self._student_id, subject)
+
+    def status_counts(self, subject: str) -> Dict[str, int]:
+        """Số buổi theo từng trạng thái trong môn học"""
+        return self._store.status_counts(self._student_id, subject)
+
+    def __repr__(self) -> str:
+        return repr({subject: dict(records.items()) for subject, records in self.items()})
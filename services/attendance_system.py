@@ -1,28 +1,38 @@
-from typing import List, Dict, TypedDict, Union, Optional
+from typing import (TYPE_CHECKING, List, Dict, TypedDict, Union, Optional, Iterator, Iterable, Tuple, Callable,
+                    Mapping, Sequence, TextIO)
 import csv
+from itertools import islice
 from datetime import datetime
 import os
-import sys
-
-# Add the project root directory to Python path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import threading
 
 from models.student import Student
 from models.subject import Subject
-from utils.constants import ATTENDANCE_STATUS, MAX_ABSENCES, CSV_PATHS
-
-class StudentReport(TypedDict):
-    student_id: str
-    name: str
-    absences: int
-    late_arrivals: int
-    present: int
-    eligible_for_exam: bool
+from utils.constants import (ATTENDANCE_STATUS, MAX_ABSENCES, CSV_PATHS, ATTENDANCE_LOG_PATHS, SEARCH_RESULT_LIMIT,
+                             BINARY_SNAPSHOT_PATH, METRICS_DUMP_INTERVAL, AT_RISK_MARGIN,
+                             REPORT_EXPORT_THREADS, ATTENDANCE_IMPORT_BATCH_SIZE)
+from services.attendance_log import AttendanceLog, AttendanceRecord
+from services.attendance_store import (AttendanceStore, StudentAttendanceView, CODE_BY_STATUS, STATUS_BY_CODE,
+                                       date_to_ordinal)
+from services.report_engine import AttendanceCounts, day_range, iter_attendance_counts
+from services.search_index import StudentSearchIndex
+from services.student_index import StudentFieldIndex
+from services.csv_importer import DEFAULT_CHUNK_SIZE, ImportResult, import_students
+from services.roster_writer import RosterWriter, write_students_atomic
+from services.report_cache import FILTER_FIELDS, ReportCache, ReportKey
+from services.repository import AttendanceRepository
+from services.report_writer import (AttendanceReport, StudentReport, build_report, format_period,
+                                    stream_report_csv, student_reports)
 
-class AttendanceReport(TypedDict):
-    subject: str
-    period: str
-    students: List[StudentReport]
+if TYPE_CHECKING:
+    # Các module dưới đây (nén, zip, mmap, tiến trình con, cProfile...) chỉ được nạp
+    # trong phương thức dùng tới chúng để khởi động nhanh
+    from services.attendance_importer import AttendanceImportResult, ImportedRecord
+    from services.attendance_rollups import AttendanceRollups, RollupBucket
+    from services.eligibility_scan import EligibilityScan
+    from services.instrumentation import Instrumentation
+    from services.report_exporters import ReportExporter
+    from services.report_jobs import ReportJobResult
 
 class AttendanceHistory(TypedDict):
     subject: str
@@ -30,62 +40,211 @@ class AttendanceHistory(TypedDict):
     status: str
 
 class AttendanceSystem:
-    def __init__(self):
-        self.students: Dict[str, Student] = {}
-        self.subjects: Dict[str, Subject] = {}
+    """Hệ thống điểm danh, dùng chung được cho nhiều luồng (nhiều máy điểm danh).
+
+    Các thao tác ghi (thêm/sửa sinh viên, điểm danh) lần lượt giữ ``_write_lock``
+    để nhật ký, kho lưu trữ và bộ nhớ đệm nhận thay đổi theo đúng thứ tự. Thao
+    tác đọc (báo cáo, tìm kiếm, lịch sử) không lấy khóa này: báo cáo được tính
+    trên bản chụp các cột của AttendanceStore nên luồng ghi không phải chờ.
+
+    Môn học được đọc ở lần truy cập đầu tiên. Với ``load_repository(lazy=True)``
+    sinh viên và điểm danh cũng chỉ được nạp khi cần (xem ``ensure_loaded``).
+    """
+
+    def __init__(self, repository: Optional[AttendanceRepository] = None):
+        self._students: Dict[str, Student] = {}
+        self._subjects: Optional[Dict[str, Subject]] = None
+        self.attendance_store = AttendanceStore()
+        self.attendance_log: Optional[AttendanceLog] = None
+        self.search_index = StudentSearchIndex()
+        self.field_index = StudentFieldIndex()
+        self.roster: Optional[RosterWriter] = None
+        self.report_cache = ReportCache()
+        self.repository = repository
+        self.instrumentation: Optional['Instrumentation'] = None
+        # Số buổi tổng hợp theo lớp/môn × ngày/tuần/tháng, dựng ở truy vấn xu hướng đầu tiên
+        self.rollups: Optional['AttendanceRollups'] = None
+        # False khi dữ liệu nằm trong kho hỗ trợ truy vấn và chỉ được nạp khi cần
+        self.resident = True
+        # Sinh viên/điểm danh trong kho chưa được nạp (load_repository(lazy=True))
+        self._pending_students = False
+        self._pending_attendance = False
+        self._persisting = False
+        self._write_lock = threading.RLock()
+        # Một hàm gắn sẵn dùng chung cho mọi sinh viên thay vì tạo bound method cho từng người
+        self._student_observer = self._on_student_changed
+        # Thư mục reports chỉ được tạo khi ghi báo cáo
         self.data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
         self.reports_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'reports')
-        os.makedirs(self.data_dir, exist_ok=True)
-        os.makedirs(self.reports_dir, exist_ok=True)
-        
-        # Load subjects when initialized
-        self.load_subjects_from_csv(CSV_PATHS["subjects"])
+
+    @property
+    def subjects(self) -> Dict[str, Subject]:
+        """Môn học theo mã, đọc từ kho lưu trữ (hoặc mon_hoc.csv) ở lần truy cập đầu tiên"""
+        if self._subjects is None:
+            with self._write_lock:
+                if self._subjects is None:
+                    if self.repository:
+                        self._subjects = {subject.code: subject for subject in self.repository.load_subjects()}
+                    else:
+                        self._subjects = {}
+                        self.load_subjects_from_csv(CSV_PATHS["subjects"])
+        return self._subjects
+
+    @property
+    def students(self) -> Dict[str, Student]:
+        """Sinh viên theo MSSV; ở chế độ nạp lười, truy cập này nạp toàn bộ danh sách"""
+        if self._pending_students:
+            self._load_pending_students()
+        return self._students
+
+    def load_repository(self, resident: bool = True, lazy: bool = False) -> None:
+        """Nạp dữ liệu từ kho lưu trữ, sau đó mọi thay đổi được ghi xuống kho.
+
+        Với ``resident=False`` (chỉ dùng được với kho hỗ trợ truy vấn) sinh
+        viên chỉ được nạp khi cần, còn báo cáo và điều kiện dự thi được tính
+        trong kho. Với ``lazy=True`` chưa nạp gì cả: tra một MSSV chỉ đọc đúng
+        sinh viên đó, điểm danh mới được ghi thẳng xuống kho; danh sách sinh
+        viên và điểm danh được nạp ở thao tác đầu tiên cần tới chúng.
+        """
+        if not self.repository:
+            raise ValueError("Hệ thống chưa được gắn kho lưu trữ")
+        if not resident and not self.repository.supports_queries:
+            raise ValueError("Kho lưu trữ không hỗ trợ truy vấn, phải nạp toàn bộ dữ liệu")
+        if lazy and not self.repository.supports_lookup:
+            raise ValueError("Kho lưu trữ không tra cứu được từng sinh viên, phải nạp toàn bộ dữ liệu")
+        with self._write_lock:
+            if resident and lazy:
+                self._pending_students = self._pending_attendance = True
+            elif resident:
+                self.repository.load_students(self._register_student)
+                self.attendance_store.load_runs(self.repository.load_attendance_runs())
+            self.resident = resident
+            self.repository.attach(lambda: list(self.students.values()))
+            self._persisting = True
+            self.report_cache.clear()
+
+    def get_student(self, student_id: str) -> Optional[Student]:
+        """Lấy sinh viên theo MSSV, nạp từ kho lưu trữ nếu chưa có trong bộ nhớ"""
+        student = self._students.get(student_id)
+        if student is None and (self._pending_students or not self.resident):
+            with self._write_lock:
+                student = self._students.get(student_id)
+                if student is None and (self._pending_students or not self.resident):
+                    student = self.repository.get_student(student_id)
+                    if student:
+                        if not self.resident:
+                            for subject, date, _, status in self.repository.load_student_attendance(student_id):
+                                student.add_attendance(subject, date, status)
+                        self._register_student(student)
+        return student
+
+    def ensure_loaded(self) -> None:
+        """Nạp ngay sinh viên và điểm danh còn chờ của chế độ nạp lười (cần trước khi đọc attendance_store)"""
+        self._load_pending_students()
+        self._load_pending_attendance()
+
+    def _load_pending_students(self) -> None:
+        if not self._pending_students:
+            return
+        with self._write_lock:
+            if self._pending_students:
+                # Sinh viên đã đọc riêng lẻ (hoặc vừa thêm) được giữ nguyên đối tượng nhưng
+                # chuyển về đúng thứ tự trong file, để danh sách và báo cáo giống khi nạp toàn bộ
+                paged = dict(self._students)
+
+                def register(student: Student) -> bool:
+                    existing = paged.pop(student.student_id, None)
+                    if existing is None:
+                        return self._register_student(student)
+                    self._move_to_end(existing)
+                    return True
+
+                self.repository.load_students(register)
+                for student in paged.values():
+                    self._move_to_end(student)
+                self._pending_students = False
+
+    def _move_to_end(self, student: Student) -> None:
+        self._students[student.student_id] = self._students.pop(student.student_id)
+        self.field_index.remove(student)
+        self.field_index.add(student)
+
+    def _load_pending_attendance(self) -> None:
+        if not self._pending_attendance:
+            return
+        with self._write_lock:
+            if self._pending_attendance:
+                # Điểm danh ghi trước lúc này đã nằm trong kho, đọc lại theo đúng thứ tự ghi
+                self.repository.flush()
+                self.attendance_store.load_runs(self.repository.load_attendance_runs())
+                self._pending_attendance = False
+                self.report_cache.clear()
 
     def add_student(self, student: Student) -> bool:
         """Thêm sinh viên mới vào hệ thống"""
-        if student.student_id not in self.students:
-            self.students[student.student_id] = student
-            return True
+        with self._write_lock:
+            if self.get_student(student.student_id) is None:
+                self._register_student(student)
+                if self.roster:
+                    self.roster.mark_added(student)
+                if self._persisting:
+                    self.repository.add_student(student)
+                self.report_cache.invalidate(None, [student])
+                return True
         return False
 
-    def load_students_from_csv(self, file_path: str) -> None:
-        """Đọc dữ liệu sinh viên từ file CSV"""
+    def _register_student(self, student: Student) -> bool:
+        """Đưa sinh viên vào bộ nhớ và các chỉ mục (không ghi xuống kho)"""
+        if student.student_id in self._students:
+            return False
+        self._students[student.student_id] = student
+        self._bind_attendance(student)
+        self.search_index.add(student)
+        self.field_index.add(student)
+        student.add_observer(self._student_observer)
+        if self.rollups and student.student_id in self.attendance_store.student_ids:
+            # Điểm danh ghi trước khi có sinh viên (ví dụ phát lại nhật ký) đang nằm ở lớp rỗng
+            self.rollups.move_student(student.student_id, student.class_name)
+        return True
+
+    def load_students_from_csv(self, file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 0,
+                               progress: Optional[Callable[[ImportResult], None]] = None) -> Optional[ImportResult]:
+        """Đọc dữ liệu sinh viên từ file CSV theo từng khối, bỏ qua và ghi nhận các dòng lỗi"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    student = Student(
-                        student_id=row['ma_sv'],
-                        name=row['ho_ten'],
-                        class_name=row['lop_hoc'],
-                        school=row['truong'],
-                        department=row['khoa'],
-                        enrollment_term=row['hoc_ky_nhap_hoc']
-                    )
-                    self.add_student(student)
+            result = import_students(file_path, self.add_student, chunk_size, workers, progress)
         except FileNotFoundError:
             print(f"File {file_path} không tồn tại")
+            return None
         except Exception as e:
             print(f"Lỗi khi đọc file: {str(e)}")
+            return None
+
+        for error in result.errors[:10]:
+            print(f"Dòng {error.line}: {error.message}")
+        if len(result.errors) > 10:
+            print(f"... và {len(result.errors) - 10} lỗi khác")
+        return result
 
     def save_students_to_csv(self, file_path: str) -> None:
-        """Lưu dữ liệu sinh viên vào file CSV"""
+        """Lưu dữ liệu sinh viên vào file CSV (ghi file tạm rồi đổi tên)"""
         try:
-            with open(file_path, 'w', encoding='utf-8', newline='') as file:
-                writer = csv.writer(file)
-                writer.writerow(['ma_sv', 'ho_ten', 'lop_hoc', 'truong', 'khoa', 'hoc_ky_nhap_hoc'])
-                for student in self.students.values():
-                    writer.writerow([
-                        student.student_id,
-                        student.name,
-                        student.class_name,
-                        student.school,
-                        student.department,
-                        student.enrollment_term
-                    ])
+            write_students_atomic(file_path, list(self.students.values()))
         except Exception as e:
             print(f"Lỗi khi lưu file: {str(e)}")
 
+    def track_students(self, file_path: str) -> None:
+        """Tự động lưu sinh viên thêm/sửa sau thời điểm này vào file CSV theo lô"""
+        self.roster = RosterWriter(file_path, lambda: list(self.students.values()))
+
+    def flush_students(self) -> None:
+        """Ghi ngay các thay đổi danh sách sinh viên đang chờ"""
+        with self._write_lock:
+            if self.roster and self.roster.dirty:
+                try:
+                    self.roster.flush()
+                except Exception as e:
+                    print(f"Lỗi khi lưu file: {str(e)}")
+
     def load_subjects_from_csv(self, file_path: str) -> None:
         """Đọc danh sách môn học từ file CSV"""
         try:
@@ -108,12 +267,117 @@ class AttendanceSystem:
         if status not in ATTENDANCE_STATUS.values():
             return False
         
-        student = self.students.get(student_id)
+        student = self.get_student(student_id)
         if student:
-            student.add_attendance(subject, date, status)
+            with self._write_lock:
+                try:
+                    student.add_attendance(subject, date, status)
+                except ValueError:
+                    # Ngày không đúng định dạng YYYY-MM-DD
+                    return False
+                self.report_cache.invalidate(subject, [student])
+                self._persist_attendance('A', [(subject, date, student_id, status)])
             return True
         return False
 
+    def take_attendance_many(self, records: Sequence[AttendanceRecord]) -> List[bool]:
+        """Điểm danh nhiều bản ghi (môn học, ngày, MSSV, trạng thái), ghi nhật ký một lần cho cả lô"""
+        results = []
+        accepted: List[AttendanceRecord] = []
+        touched: Dict[str, List[Student]] = {}
+        with self._write_lock:
+            for subject, date, student_id, status in records:
+                student = self.get_student(student_id) if status in ATTENDANCE_STATUS.values() else None
+                if student is None:
+                    results.append(False)
+                    continue
+                try:
+                    student.add_attendance(subject, date, status)
+                except ValueError:
+                    results.append(False)
+                    continue
+                touched.setdefault(subject, []).append(student)
+                accepted.append((subject, date, student_id, status))
+                results.append(True)
+            for subject, students in touched.items():
+                self.report_cache.invalidate(subject, students)
+            if accepted:
+                self._persist_attendance('A', accepted)
+        return results
+
+    def take_class_attendance(self, subject: str, class_name: str, date: str,
+                              statuses: Union[Mapping[str, str], Sequence[str], None] = None,
+                              default_status: str = "Có mặt") -> Dict[str, bool]:
+        """Điểm danh cả lớp trong một buổi.
+
+        ``statuses`` là dict MSSV -> trạng thái cho các trường hợp khác
+        ``default_status``, hoặc danh sách trạng thái theo đúng thứ tự sinh viên
+        của lớp. Trạng thái có thể là chuỗi hoặc mã trong ATTENDANCE_STATUS.
+        Trả về kết quả theo từng MSSV; MSSV không thuộc lớp nhận False.
+        """
+        class_students = self.find_students(class_name=class_name)
+        if statuses is None:
+            statuses = {}
+        elif not isinstance(statuses, Mapping):
+            if len(statuses) != len(class_students):
+                raise ValueError(f"Cần {len(class_students)} trạng thái, nhận được {len(statuses)}")
+            statuses = {student.student_id: status for student, status in zip(class_students, statuses)}
+
+        # Kiểm tra dữ liệu một lần cho cả buổi
+        date_to_ordinal(date)
+        codes = {}
+        for status in set(statuses.values()) | {default_status}:
+            code = ATTENDANCE_STATUS.get(status, status)
+            if code not in CODE_BY_STATUS:
+                raise ValueError(f"Trạng thái điểm danh không hợp lệ: {status}")
+            codes[status] = code
+
+        records = [(student.student_id, codes[statuses.get(student.student_id, default_status)])
+                   for student in class_students]
+        with self._write_lock:
+            self.attendance_store.set_many(subject, date, ((student_id, CODE_BY_STATUS[status])
+                                                           for student_id, status in records))
+            self.report_cache.invalidate(subject, class_students)
+            self._persist_attendance('A', [(subject, date, student_id, status) for student_id, status in records])
+
+        results = {student_id: True for student_id, _ in records}
+        for student_id in statuses:
+            results.setdefault(student_id, False)
+        return results
+
+    def import_attendance(self, file_paths: Sequence[str], policy: str = 'last',
+                          batch_size: int = ATTENDANCE_IMPORT_BATCH_SIZE,
+                          progress: Optional[Callable[['AttendanceImportResult'], None]] = None
+                          ) -> 'AttendanceImportResult':
+        """Nhập điểm danh hàng loạt từ các file CSV của máy quẹt thẻ/LMS (theo thứ tự, file sau mới hơn).
+
+        Dòng trùng được gộp và xung đột xử lý theo ``policy`` (xem
+        services.attendance_importer); mỗi lô ``batch_size`` bản ghi được ghi
+        vào kho điểm danh, nhật ký và kho lưu trữ trong một lần giữ khóa.
+        """
+        from services.attendance_importer import import_attendance
+
+        # Kiểm tra MSSV trên danh sách trong bộ nhớ thay vì đọc từng sinh viên từ file
+        self._load_pending_students()
+        subjects = self.subjects
+
+        def apply(records: List['ImportedRecord']) -> int:
+            with self._write_lock:
+                created = self.attendance_store.set_records(
+                    (student_id, subject, day, code) for subject, _, student_id, code, day in records)
+                for subject in {record[0] for record in records}:
+                    self.report_cache.invalidate(subject)
+                # Nén nhật ký một lần sau cả lần nhập thay vì sau mỗi lô
+                self._persist_attendance('A', [(subject, date, student_id, STATUS_BY_CODE[code])
+                                               for subject, date, student_id, code, _ in records], compact=False)
+            return created
+
+        result = import_attendance(file_paths, apply, lambda student_id: self.get_student(student_id) is not None,
+                                   subjects.__contains__ if subjects else None, policy, batch_size, progress)
+        with self._write_lock:
+            self._compact_if_needed()
+        return result
+
     def edit_attendance(self, subject_code: str, student_id: str, date: str, new_status: str) -> bool:
         """Chỉnh sửa điểm danh của sinh viên"""
         if subject_code not in self.subjects:
@@ -124,154 +388,372 @@ class AttendanceSystem:
             print("Trạng thái điểm danh không hợp lệ!")
             return False
         
-        student = self.students.get(student_id)
+        student = self.get_student(student_id)
         if not student:
             print("Không tìm thấy sinh viên!")
             return False
-            
-        return student.update_attendance(subject_code, date, new_status)
-
-    def search_student(self, keyword: str) -> List[Student]:
-        """Tìm kiếm sinh viên theo từ khóa"""
-        keyword = keyword.lower()
-        return [
-            student for student in self.students.values()
-            if keyword in student.name.lower() or
-            keyword in student.student_id.lower()
-        ]
-
-    def get_student_attendance_history(self, student_id: str, subject_code: Optional[str] = None) -> List[AttendanceHistory]:
-        """Xem lịch sử điểm danh của sinh viên"""
-        student = self.students.get(student_id)
+
+        self._load_pending_attendance()
+        with self._write_lock:
+            if student.update_attendance(subject_code, date, new_status):
+                self.report_cache.invalidate(subject_code, [student])
+                self._persist_attendance('E', [(subject_code, date, student_id, new_status)])
+                return True
+        return False
+
+    def check_exam_eligibility(self, student_id: str, subject_code: str) -> tuple[bool, int]:
+        """Kiểm tra điều kiện dự thi của sinh viên trong một môn học"""
+        if not self.resident:
+            absences = self.repository.count_absences(student_id, subject_code)
+            return absences <= MAX_ABSENCES, absences
+        student = self.get_student(student_id)
         if not student:
+            return True, 0
+        self._load_pending_attendance()
+        return student.check_exam_eligibility(subject_code, MAX_ABSENCES)
+
+    def get_attendance_summary(self, student_id: str, subject_code: str) -> Dict[str, int]:
+        """Tổng số buổi theo từng trạng thái của sinh viên trong một môn học"""
+        self._load_pending_attendance()
+        return self.attendance_store.status_counts(student_id, subject_code)
+
+    def get_students_at_risk(self, subject_code: Optional[str] = None,
+                             margin: int = AT_RISK_MARGIN) -> List[Tuple[Student, str, int]]:
+        """Sinh viên sắp vượt số buổi vắng cho phép (còn tối đa ``margin`` buổi)"""
+        self.ensure_loaded()
+        at_risk = []
+        for student_id, subject, absences in self.attendance_store.iter_absences():
+            if subject_code and subject != subject_code:
+                continue
+            student = self.students.get(student_id)
+            if student and MAX_ABSENCES - margin <= absences <= MAX_ABSENCES:
+                at_risk.append((student, subject, absences))
+        return sorted(at_risk, key=lambda item: item[2], reverse=True)
+
+    def scan_eligibility(self, margin: int = AT_RISK_MARGIN, subjects: Optional[Sequence[str]] = None,
+                         class_names: Optional[Sequence[str]] = None) -> 'EligibilityScan':
+        """Xét điều kiện dự thi của mọi sinh viên × môn học trong một lần duyệt (xem services.eligibility_scan)"""
+        from services.eligibility_scan import scan_eligibility
+
+        self.ensure_loaded()
+        return scan_eligibility(self, margin, subjects, class_names)
+
+    def attendance_trend(self, start_date: datetime, end_date: datetime, period: str = 'week',
+                         class_name: Optional[str] = None, subject: Optional[str] = None) -> List['RollupBucket']:
+        """Số buổi theo trạng thái của từng ngày/tuần/tháng (``period``) trong khoảng thời gian.
+
+        Đọc từ số liệu tổng hợp sẵn (xem services.attendance_rollups) nên không
+        quét các bản ghi điểm danh; lọc được theo lớp và/hoặc môn học.
+        """
+        return self._ensure_rollups().trend(start_date, end_date, period, class_name, subject)
+
+    def attendance_totals(self, start_date: datetime, end_date: datetime, class_name: Optional[str] = None,
+                          subject: Optional[str] = None) -> 'RollupBucket':
+        """Tổng số buổi theo trạng thái trong khoảng thời gian (lọc theo lớp và/hoặc môn học)"""
+        return self._ensure_rollups().totals(start_date, end_date, class_name, subject)
+
+    def _ensure_rollups(self) -> 'AttendanceRollups':
+        if self.rollups is None:
+            from services.attendance_rollups import AttendanceRollups
+
+            if not self.resident:
+                raise ValueError("Thống kê điểm danh cần dữ liệu nằm trong bộ nhớ (load_repository(resident=True))")
+            self.ensure_loaded()
+            with self._write_lock:
+                if self.rollups is None:
+                    students = self._students
+
+                    def class_of(student_id: str) -> Optional[str]:
+                        student = students.get(student_id)
+                        return student.class_name if student else None
+
+                    self.rollups = AttendanceRollups(self.attendance_store, class_of).build()
+        return self.rollups
+
+    def open_attendance_log(self, log_path: str = ATTENDANCE_LOG_PATHS["log"],
+                            snapshot_path: str = ATTENDANCE_LOG_PATHS["snapshot"]) -> int:
+        """Mở nhật ký điểm danh và nạp lại các bản ghi đã lưu, trả về số bản ghi.
+
+        Chỉ dùng khi không gắn kho lưu trữ: kho đã có nhật ký riêng (CsvRepository
+        dùng đúng các file này), mở thêm sẽ ghi và nạp lại mỗi sự kiện hai lần.
+        """
+        if self.repository:
+            raise ValueError("Hệ thống đã gắn kho lưu trữ, điểm danh được ghi qua kho đó")
+        with self._write_lock:
+            self.attendance_log = AttendanceLog(log_path, snapshot_path)
+            # Ghi thẳng vào kho nên cả điểm danh của sinh viên chưa nạp cũng được giữ lại
+            count = self.attendance_store.load_runs(self.attendance_log.replay_runs())
+            self.report_cache.clear()
+        return count
+
+    def save_snapshot(self, path: str = BINARY_SNAPSHOT_PATH) -> int:
+        """Ghi môn học, sinh viên và điểm danh thành ảnh chụp nhị phân, trả về số bản ghi điểm danh"""
+        self.ensure_loaded()
+        with self._write_lock:
+            from services.binary_snapshot import write_snapshot
+            return write_snapshot(path, list(self.subjects.values()), list(self.students.values()),
+                                  self.attendance_store)
+
+    def load_snapshot(self, path: str = BINARY_SNAPSHOT_PATH) -> int:
+        """Nạp ảnh chụp nhị phân vào hệ thống chưa có sinh viên/điểm danh, trả về số bản ghi điểm danh"""
+        self.ensure_loaded()
+        with self._write_lock:
+            if self.students or len(self.attendance_store):
+                raise ValueError("Chỉ nạp ảnh chụp khi hệ thống chưa có dữ liệu")
+            from services.binary_snapshot import SnapshotFile
+            with SnapshotFile(path) as snapshot:
+                for subject in snapshot.subjects():
+                    self.subjects[subject.code] = subject
+                self.attendance_store.load_columns(snapshot.student_codes(), snapshot.subject_codes(),
+                                                   snapshot.columns(), snapshot.pairs())
+                # load_columns không báo từng bản ghi: dựng lại số liệu tổng hợp ở truy vấn sau
+                if self.rollups:
+                    self.rollups.detach()
+                    self.rollups = None
+                for student in snapshot.iter_students():
+                    self._register_student(student)
+                count = len(snapshot)
+            self.report_cache.clear()
+        return count
+
+    def iter_attendance_records(self) -> Iterator[AttendanceRecord]:
+        """Duyệt toàn bộ bản ghi điểm danh hiện có (kể cả của sinh viên chưa nạp)"""
+        self._load_pending_attendance()
+        return self.attendance_store.iter_records()
+
+    def compact_attendance_log(self) -> None:
+        """Nén nhật ký điểm danh thành snapshot"""
+        with self._write_lock:
+            if self.attendance_log:
+                self.attendance_log.compact(self.iter_attendance_records())
+
+    def enable_instrumentation(self, dump_path: Optional[str] = None,
+                               interval: float = METRICS_DUMP_INTERVAL) -> 'Instrumentation':
+        """Bật đo đạc số lần gọi, độ trễ, số dòng và số byte đọc/ghi; ghi định kỳ ra ``dump_path`` nếu có"""
+        if self.instrumentation is None:
+            from services.instrumentation import Instrumentation
+            self.instrumentation = Instrumentation(self)
+        self.instrumentation.enable()
+        if dump_path:
+            self.instrumentation.start_dump(dump_path, interval)
+        return self.instrumentation
+
+    def disable_instrumentation(self) -> None:
+        """Tắt đo đạc, các phương thức trở về bản gốc (số liệu đã thu vẫn giữ trong self.instrumentation)"""
+        if self.instrumentation:
+            self.instrumentation.stop_dump()
+            self.instrumentation.disable()
+
+    def close(self) -> None:
+        """Đẩy dữ liệu còn chờ xuống đĩa, đóng nhật ký điểm danh và kho lưu trữ"""
+        if self.instrumentation:
+            self.instrumentation.stop_dump()
+        with self._write_lock:
+            self.flush_students()
+            if self.attendance_log:
+                self.attendance_log.close()
+            if self.repository:
+                self.repository.close()
+
+    def _bind_attendance(self, student: Student) -> None:
+        """Chuyển điểm danh của sinh viên sang kho dạng cột"""
+        records = student.attendance
+        student.attendance = StudentAttendanceView(self.attendance_store, student.student_id)
+        for subject, dates in records.items():
+            student.attendance[subject] = dates
+
+    def _on_student_changed(self, student: Student, previous: Dict[str, str]) -> None:
+        """Cập nhật các chỉ mục khi thông tin sinh viên thay đổi"""
+        with self._write_lock:
+            if 'name' in previous:
+                self.search_index.add(student)
+            self.field_index.update(student, previous)
+            if self.rollups and 'class_name' in previous:
+                self.rollups.move_student(student.student_id, student.class_name)
+            # Báo cáo theo cả bộ lọc cũ lẫn mới của sinh viên đều không còn đúng
+            old_fields = {field: previous.get(field, getattr(student, field)) for field in FILTER_FIELDS}
+            self.report_cache.invalidate(None, [student], [old_fields])
+            if self.roster:
+                self.roster.mark_changed()
+            if self._persisting:
+                self.repository.update_student(student)
+
+    def _persist_attendance(self, op: str, records: List[AttendanceRecord], compact: bool = True) -> None:
+        """Ghi các bản ghi điểm danh vừa thay đổi vào nhật ký và kho lưu trữ"""
+        if self.attendance_log:
+            if len(records) == 1:
+                self.attendance_log.append(op, *records[0])
+            else:
+                self.attendance_log.append_many(records, op)
+        if self._persisting:
+            self.repository.record_attendance(records, op)
+        if compact:
+            self._compact_if_needed()
+
+    def _compact_if_needed(self) -> None:
+        if self.attendance_log and self.attendance_log.needs_compaction():
+            self.compact_attendance_log()
+        if self._persisting and self.repository.needs_compaction():
+            self.repository.compact(self.iter_attendance_records())
+
+    def search_student(self, keyword: str, limit: Optional[int] = SEARCH_RESULT_LIMIT) -> List[Student]:
+        """Tìm kiếm sinh viên theo từ khóa (MSSV hoặc họ tên, không phân biệt dấu)"""
+        self._load_pending_students()
+        return [self.students[student_id] for student_id in self.search_index.search(keyword, limit)]
+
+    def iter_student_attendance_history(self, student_id: str, subject_code: Optional[str] = None,
+                                        start_date: Optional[datetime] = None,
+                                        end_date: Optional[datetime] = None,
+                                        newest_first: bool = True) -> Iterator[AttendanceHistory]:
+        """Duyệt lười lịch sử điểm danh của sinh viên, lọc theo môn học và khoảng ngày"""
+        self._load_pending_attendance()
+        first_day = day_range(start_date, start_date)[0] if start_date else None
+        last_day = end_date.toordinal() if end_date else None
+        for subject, date, status in self.attendance_store.iter_history(
+                student_id, subject_code, first_day, last_day, newest_first):
+            yield {'subject': subject, 'date': date, 'status': status}
+
+    def get_student_attendance_history(self, student_id: str, subject_code: Optional[str] = None,
+                                       start_date: Optional[datetime] = None,
+                                       end_date: Optional[datetime] = None,
+                                       limit: Optional[int] = None, offset: int = 0) -> List[AttendanceHistory]:
+        """Xem lịch sử điểm danh của sinh viên, mới nhất lên đầu (phân trang bằng offset/limit)"""
+        if self.get_student(student_id) is None:
             return []
-            
-        history: List[AttendanceHistory] = []
-        attendance_records = student.get_attendance(subject_code) if subject_code else student.get_attendance()
-        
-        if subject_code:
-            # Lịch sử cho một môn học cụ thể
-            for date, status in attendance_records.items():
-                history.append({
-                    'subject': subject_code,
-                    'date': date,
-                    'status': status
-                })
-        else:
-            # Lịch sử cho tất cả các môn học
-            for subj, dates in attendance_records.items():
-                for date, status in dates.items():
-                    history.append({
-                        'subject': subj,
-                        'date': date,
-                        'status': status
-                    })
-        
-        # Sắp xếp theo ngày, mới nhất lên đầu
-        return sorted(history, key=lambda x: x['date'], reverse=True)
-
-    def generate_report(self, subject: str, start_date: datetime, end_date: datetime) -> AttendanceReport:
-        """Tạo báo cáo điểm danh theo khoảng thời gian"""
-        report: AttendanceReport = {
-            'subject': subject,
-            'period': f"{start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}",
-            'students': []
-        }
-
-        for student in self.students.values():
-            attendance_records = student.get_attendance(subject)
-            absences = 0
-            late_arrivals = 0
-            present = 0
-
-            for date, status in attendance_records.items():
-                record_date = datetime.strptime(date, '%Y-%m-%d')
-                if start_date <= record_date <= end_date:
-                    if status in ['Vắng mặt', 'Không phép']:
-                        absences += 1
-                    elif status == 'Đi trễ':
-                        late_arrivals += 1
-                    elif status == 'Có mặt':
-                        present += 1
-
-            eligible_for_exam, _ = student.check_exam_eligibility(subject, MAX_ABSENCES)
-            
-            student_report: StudentReport = {
-                'student_id': student.student_id,
-                'name': student.name,
-                'absences': absences,
-                'late_arrivals': late_arrivals,
-                'present': present,
-                'eligible_for_exam': eligible_for_exam
-            }
-            report['students'].append(student_report)
+        history = self.iter_student_attendance_history(student_id, subject_code, start_date, end_date)
+        stop = offset + limit if limit is not None else None
+        return list(islice(history, offset, stop))
+
+    def find_students(self, class_name: Optional[str] = None, department: Optional[str] = None,
+                      school: Optional[str] = None, enrollment_term: Optional[str] = None) -> List[Student]:
+        """Lọc sinh viên theo lớp, khoa, trường, học kỳ nhập học (kết hợp nhiều điều kiện)"""
+        if not self.resident:
+            student_ids = self.repository.find_student_ids(class_name=class_name, department=department,
+                                                           school=school, enrollment_term=enrollment_term)
+            return [self.get_student(student_id) for student_id in student_ids]
+        self._load_pending_students()
+        student_ids = self.field_index.lookup(class_name=class_name, department=department,
+                                              school=school, enrollment_term=enrollment_term)
+        if student_ids is None:
+            return list(self.students.values())
+        return [self.students[student_id] for student_id in student_ids]
 
+    def generate_report(self, subject: str, start_date: datetime, end_date: datetime,
+                        class_name: Optional[str] = None, department: Optional[str] = None,
+                        school: Optional[str] = None, enrollment_term: Optional[str] = None) -> AttendanceReport:
+        """Tạo báo cáo điểm danh theo khoảng thời gian (có thể lọc theo lớp/khoa/trường/khóa)"""
+        key = ReportKey(subject, (class_name, department, school, enrollment_term), start_date, end_date)
+        report = self.report_cache.get(key)
+        if report is None:
+            generation = self.report_cache.generation
+            rows = self._iter_report_rows(subject, start_date, end_date, class_name, department,
+                                          school, enrollment_term)
+            report = self._build_report(subject, rows, start_date, end_date)
+            self.report_cache.put(key, report, generation)
         return report
 
+    def iter_report(self, subject: str, start_date: datetime, end_date: datetime,
+                    class_name: Optional[str] = None, department: Optional[str] = None,
+                    school: Optional[str] = None, enrollment_term: Optional[str] = None) -> Iterator[StudentReport]:
+        """Duyệt từng dòng báo cáo ngay khi tính xong, không dựng toàn bộ AttendanceReport"""
+        key = ReportKey(subject, (class_name, department, school, enrollment_term), start_date, end_date)
+        report = self.report_cache.get(key)
+        if report is not None:
+            return iter(report['students'])
+        return student_reports(self._iter_report_rows(subject, start_date, end_date, class_name,
+                                                      department, school, enrollment_term))
+
+    def write_report(self, file: TextIO, subject: str, start_date: datetime, end_date: datetime,
+                     class_name: Optional[str] = None, department: Optional[str] = None,
+                     school: Optional[str] = None, enrollment_term: Optional[str] = None) -> int:
+        """Ghi báo cáo dạng CSV thẳng ra ``file`` theo từng dòng, trả về số sinh viên đã ghi"""
+        students = self.iter_report(subject, start_date, end_date, class_name, department,
+                                    school, enrollment_term)
+        return stream_report_csv(subject, format_period(start_date, end_date), students, file)
+
+    def export_report(self, filename: str, subject: str, start_date: datetime, end_date: datetime,
+                      class_name: Optional[str] = None, department: Optional[str] = None,
+                      school: Optional[str] = None, enrollment_term: Optional[str] = None,
+                      format: Optional[str] = None) -> str:
+        """Tính và ghi báo cáo vào thư mục reports theo từng dòng (không giữ cả báo cáo trong bộ nhớ).
+
+        ``format`` là tên trong services.report_exporters.EXPORTERS; mặc định
+        chọn theo phần mở rộng của ``filename``.
+        """
+        from services.report_exporters import exporter_for, get_exporter
+
+        file_path = os.path.join(self.reports_dir, filename)
+        try:
+            exporter = get_exporter(format) if format else exporter_for(filename)
+            os.makedirs(self.reports_dir, exist_ok=True)
+            students = self.iter_report(subject, start_date, end_date, class_name, department,
+                                        school, enrollment_term)
+            exporter.export(file_path, subject, format_period(start_date, end_date), students)
+            return file_path
+        except Exception as e:
+            print(f"Lỗi khi lưu báo cáo: {str(e)}")
+            return ""
+
+    def _iter_report_rows(self, subject: str, start_date: datetime, end_date: datetime,
+                          class_name: Optional[str], department: Optional[str], school: Optional[str],
+                          enrollment_term: Optional[str]) -> Iterable[Tuple[str, str, AttendanceCounts]]:
+        """Số liệu (MSSV, họ tên, số buổi) của từng sinh viên thỏa bộ lọc, sinh ra lần lượt"""
+        if not self.resident:
+            # Tính ngay trong kho lưu trữ, không cần nạp sinh viên vào bộ nhớ
+            first_day, last_day = day_range(start_date, end_date)
+            return self.repository.iter_count_attendance(
+                subject, first_day, last_day, class_name=class_name, department=department,
+                school=school, enrollment_term=enrollment_term)
+        self._load_pending_attendance()
+        students = self.find_students(class_name, department, school, enrollment_term)
+        counts = iter_attendance_counts(self.attendance_store, subject,
+                                        [student.student_id for student in students], start_date, end_date)
+        return ((student.student_id, student.name, student_counts)
+                for student, student_counts in zip(students, counts))
+
     def get_class_report(self, subject_code: str, class_name: str, 
                         start_date: datetime, end_date: datetime) -> AttendanceReport:
         """Tạo báo cáo điểm danh theo lớp học"""
-        report: AttendanceReport = {
-            'subject': subject_code,
-            'period': f"{start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}",
-            'students': []
-        }
-
-        # Lọc sinh viên theo lớp
-        class_students = [s for s in self.students.values() if s.class_name == class_name]
-        
-        for student in class_students:
-            attendance_records = student.get_attendance(subject_code)
-            absences = 0
-            late_arrivals = 0
-            present = 0
-
-            for date, status in attendance_records.items():
-                record_date = datetime.strptime(date, '%Y-%m-%d')
-                if start_date <= record_date <= end_date:
-                    if status in ['Vắng mặt', 'Không phép']:
-                        absences += 1
-                    elif status == 'Đi trễ':
-                        late_arrivals += 1
-                    elif status == 'Có mặt':
-                        present += 1
-
-            eligible_for_exam, _ = student.check_exam_eligibility(subject_code, MAX_ABSENCES)
-            
-            student_report: StudentReport = {
-                'student_id': student.student_id,
-                'name': student.name,
-                'absences': absences,
-                'late_arrivals': late_arrivals,
-                'present': present,
-                'eligible_for_exam': eligible_for_exam
-            }
-            report['students'].append(student_report)
+        return self.generate_report(subject_code, start_date, end_date, class_name=class_name)
 
-        return report
+    def export_reports(self, start_date: datetime, end_date: datetime,
+                       subjects: Optional[Sequence[str]] = None, class_names: Optional[Sequence[str]] = None,
+                       workers: int = 0,
+                       progress: Optional[Callable[['ReportJobResult'], None]] = None,
+                       formats: Sequence[str] = ('csv',), threads: int = REPORT_EXPORT_THREADS,
+                       snapshot_path: Optional[str] = None) -> 'ReportJobResult':
+        """Xuất báo cáo theo lớp cho nhiều môn học × lớp vào thư mục reports (song song khi workers > 1).
+
+        Các tiến trình con mmap ảnh chụp ``snapshot_path`` (cùng dữ liệu với hệ
+        thống) hoặc một ảnh chụp tạm ghi từ kho điểm danh.
+        """
+        from services.report_jobs import run_report_job
+
+        self.ensure_loaded()
+        return run_report_job(self, start_date, end_date, subjects, class_names, workers,
+                              self.reports_dir, progress, formats, threads, snapshot_path)
+
+    def _build_report(self, subject: str, rows: Iterable[Tuple[str, str, AttendanceCounts]],
+                      start_date: datetime, end_date: datetime) -> AttendanceReport:
+        """Dựng báo cáo từ số liệu (MSSV, họ tên, số buổi) của từng sinh viên"""
+        return build_report(subject, rows, start_date, end_date)
+
+    def save_report(self, report: AttendanceReport, filename: Optional[str] = None,
+                    format: Optional[str] = None) -> str:
+        """Lưu báo cáo vào thư mục reports.
+
+        Định dạng chọn theo ``format`` hoặc phần mở rộng của ``filename`` (mặc
+        định CSV); không có ``filename`` thì đặt tên theo môn học và thời gian.
+        """
+        from services.report_exporters import exporter_for, get_exporter, period_stamp
 
-    def save_report(self, report: AttendanceReport, filename: str) -> str:
-        """Lưu báo cáo vào file CSV"""
-        file_path = os.path.join(self.reports_dir, filename)
         try:
-            with open(file_path, 'w', encoding='utf-8', newline='') as file:
-                writer = csv.writer(file)
-                # Write header
-                writer.writerow(['Môn học:', report['subject']])
-                writer.writerow(['Thời gian:', report['period']])
-                writer.writerow([])
-                writer.writerow(['MSSV', 'Họ tên', 'Vắng', 'Đi trễ', 'Có mặt', 'Đủ điều kiện thi'])
-                
-                # Write student data
-                for student in report['students']:
-                    writer.writerow([
-                        student['student_id'],
-                        student['name'],
-                        student['absences'],
-                        student['late_arrivals'],
-                        student['present'],
-                        'Có' if student['eligible_for_exam'] else 'Không'
-                    ])
+            exporter: 'ReportExporter' = get_exporter(format) if format else exporter_for(filename or '')
+            if filename is None:
+                filename = f"bao_cao_{report['subject']}_{period_stamp(report['period'])}{exporter.extension}"
+            file_path = os.path.join(self.reports_dir, filename)
+            os.makedirs(self.reports_dir, exist_ok=True)
+            exporter.export(file_path, report['subject'], report['period'], report['students'])
             return file_path
         except Exception as e:
             print(f"Lỗi khi lưu báo cáo: {str(e)}")
@@ -0,0 +1,324 @@
+"""
+Ảnh chụp nhị phân có đánh số phiên bản cho môn học, sinh viên và điểm danh.
+
+Bố cục file (little-endian, mỗi phần căn lề 8 byte):
+    tiêu đề   : magic "DDSNAP\\0\\0", phiên bản (u32), số phần (u32)
+    bảng phần : mỗi phần gồm thẻ 4 byte, 4 byte đệm, vị trí (u64), độ dài byte (u64)
+    STRO/STRD : bảng chuỗi - vị trí bắt đầu (u64, n + 1 phần tử) và dữ liệu UTF-8
+    SUBJ      : mỗi môn 3 x u32 (chuỗi mã, chuỗi tên, số tín chỉ)
+    STUD      : mỗi sinh viên 6 x u32 chuỗi theo thứ tự STUDENT_COLUMNS
+    PAIR      : mỗi cặp sinh viên/môn học PAIR_WIDTH x u32 (sinh viên, môn học, dòng
+                bắt đầu, số buổi theo từng mã trạng thái 1..5)
+    ASTU/ASUB/ADAY/ASTA : các cột điểm danh giống AttendanceStore, sắp theo
+                (sinh viên, môn học, ngày)
+
+Chuỗi tên NO_STRING đánh dấu môn học/sinh viên chỉ có trong dữ liệu điểm danh.
+File được mở bằng mmap và các phần được đọc qua memoryview nên không phải
+phân tích từng dòng. Các view của SnapshotFile (``columns()``) đọc thẳng trên
+các trang của file, nên nhiều tiến trình mở cùng một file dùng chung các trang
+đó trong bộ nhớ đệm của hệ điều hành mà không chép (services.report_jobs đọc
+điểm danh theo cách này). Khi nạp vào AttendanceStore (load_columns), các cột
+được chép một lần thành mảng riêng của kho để kho còn ghi tiếp được.
+
+Chuyển đổi từ thư mục gốc dự án:
+    python -m services.binary_snapshot to-snapshot --out data/diem_danh.snap
+    python -m services.binary_snapshot to-csv --snapshot data/diem_danh.snap --students out/sinh_vien.csv
+"""
+from array import array
+from typing import Dict, Iterable, Iterator, List
+import csv
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+from models.student import Student
+from models.subject import Subject
+from services.attendance_log import AttendanceRecord
+from services.attendance_store import AttendanceStore, ColumnSnapshot, PAIR_WIDTH, STATUS_BY_CODE, ordinal_to_date
+from services.roster_writer import match_file_mode
+
+SNAPSHOT_MAGIC = b'DDSNAP\x00\x00'
+SNAPSHOT_VERSION = 1
+NO_STRING = 0xFFFFFFFF
+
+_HEADER = struct.Struct('<8sII')
+_SECTION = struct.Struct('<4s4xQQ')
+# Thẻ phần -> kiểu phần tử (mã kiểu của array/memoryview)
+SECTION_TYPES: Dict[bytes, str] = {
+    b'STRO': 'Q', b'STRD': 'B', b'SUBJ': 'I', b'STUD': 'I', b'PAIR': 'I',
+    b'ASTU': 'I', b'ASUB': 'H', b'ADAY': 'I', b'ASTA': 'B',
+}
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+
+class _StringTable:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.offsets = array('Q', [0])
+        self.data = bytearray()
+
+    def add(self, text: str) -> int:
+        index = self.ids.get(text)
+        if index is None:
+            index = self.ids[text] = len(self.offsets) - 1
+            self.data += text.encode('utf-8')
+            self.offsets.append(len(self.data))
+        return index
+
+
+def write_snapshot(path: str, subjects: Iterable[Subject], students: Iterable[Student],
+                   store: AttendanceStore) -> int:
+    """Ghi ảnh chụp (file tạm rồi đổi tên), trả về số bản ghi điểm danh"""
+    strings = _StringTable()
+
+    subject_records = array('I')
+    subject_positions: Dict[str, int] = {}
+    for subject in subjects:
+        subject_positions[subject.code] = len(subject_positions)
+        subject_records.extend((strings.add(subject.code), strings.add(subject.name), subject.credits))
+
+    student_records = array('I')
+    student_positions: Dict[str, int] = {}
+    for student in students:
+        student_positions[student.student_id] = len(student_positions)
+        student_records.extend(strings.add(getattr(student, field)) for field in
+                               ('student_id', 'name', 'class_name', 'school', 'department', 'enrollment_term'))
+
+    pairs = array('I')
+    columns = (array('I'), array('H'), array('I'), array('B'))
+    with store.write_lock:
+        # Môn học/sinh viên chỉ xuất hiện trong dữ liệu điểm danh vẫn được giữ lại
+        for code in store.subject_codes:
+            if code not in subject_positions:
+                subject_positions[code] = len(subject_positions)
+                subject_records.extend((strings.add(code), NO_STRING, 0))
+        for student_id in store.student_codes:
+            if student_id not in student_positions:
+                student_positions[student_id] = len(student_positions)
+                student_records.extend((strings.add(student_id),) + (NO_STRING,) * 5)
+
+        subject_map = [subject_positions[code] for code in store.subject_codes]
+        by_position = sorted((student_positions[student_id], index)
+                             for index, student_id in enumerate(store.student_codes))
+        student_idx, subject_idx, days, statuses = columns
+        for position, student in by_position:
+            for subject_index, rows in sorted(store.pairs_of(student), key=lambda pair: subject_map[pair[0]]):
+                if not rows:
+                    continue
+                pairs.extend((position, subject_map[subject_index], len(statuses)))
+                pairs.extend(store.tally_of(student, subject_index)[1:])
+                student_idx.extend(array('I', [position]) * len(rows))
+                subject_idx.extend(array('H', [subject_map[subject_index]]) * len(rows))
+                days.extend(store.days[row] for row in rows)
+                statuses.extend(store.statuses[row] for row in rows)
+
+    sections = [(b'STRO', strings.offsets), (b'STRD', array('B', strings.data)),
+                (b'SUBJ', subject_records), (b'STUD', student_records), (b'PAIR', pairs),
+                (b'ASTU', student_idx), (b'ASUB', subject_idx), (b'ADAY', days), (b'ASTA', statuses)]
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.snapshot_', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            offset = _align(_HEADER.size + _SECTION.size * len(sections))
+            table = []
+            for tag, data in sections:
+                table.append(_SECTION.pack(tag, offset, len(data) * data.itemsize))
+                offset = _align(offset + len(data) * data.itemsize)
+            file.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(sections)))
+            file.write(b''.join(table))
+            for tag, data in sections:
+                file.write(b'\x00' * (_align(file.tell()) - file.tell()))
+                if not _LITTLE_ENDIAN and data.itemsize > 1:
+                    data = array(data.typecode, data)
+                    data.byteswap()
+                file.write(data.tobytes())
+            file.flush()
+            os.fsync(file.fileno())
+        match_file_mode(temp_path, path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return len(statuses)
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class SnapshotFile:
+    """Ảnh chụp nhị phân mở bằng mmap, các phần được đọc trực tiếp qua memoryview.
+
+    Các view trả về (``columns()``...) trỏ thẳng vào vùng nhớ của file, phải
+    ngừng dùng chúng trước khi ``close()``; nạp vào AttendanceStore sẽ chép
+    chúng sang các mảng của kho.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} rỗng, không phải ảnh chụp")
+        self._view = memoryview(self._mmap)
+        self.sections: Dict[bytes, memoryview] = {}
+        try:
+            self._parse()
+        except BaseException:
+            self.close()
+            raise
+
+    def _parse(self) -> None:
+        size = len(self._mmap)
+        if size < _HEADER.size:
+            raise ValueError(f"{self.path} không phải ảnh chụp")
+        magic, self.version, count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{self.path} không phải ảnh chụp")
+        if self.version != SNAPSHOT_VERSION:
+            raise ValueError(f"Không hỗ trợ ảnh chụp phiên bản {self.version} (cần {SNAPSHOT_VERSION})")
+        for index in range(count):
+            tag, offset, nbytes = _SECTION.unpack_from(self._mmap, _HEADER.size + index * _SECTION.size)
+            typecode = SECTION_TYPES.get(tag)
+            if typecode is None:
+                continue  # Phần của phiên bản mới hơn, bỏ qua
+            if offset + nbytes > size:
+                raise ValueError(f"{self.path} bị cắt cụt (phần {tag.decode()})")
+            view = self._view[offset:offset + nbytes]
+            if _LITTLE_ENDIAN:
+                self.sections[tag] = view.cast(typecode)
+            else:
+                data = array(typecode, view.tobytes())
+                data.byteswap()
+                self.sections[tag] = memoryview(data)
+        missing = [tag.decode() for tag in SECTION_TYPES if tag not in self.sections]
+        if missing:
+            raise ValueError(f"{self.path} thiếu phần: {', '.join(missing)}")
+
+    def __enter__(self) -> 'SnapshotFile':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for view in self.sections.values():
+            view.release()
+        self.sections = {}
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self.sections[b'ASTA'])
+
+    def string(self, index: int) -> str:
+        offsets = self.sections[b'STRO']
+        return str(self.sections[b'STRD'][offsets[index]:offsets[index + 1]], 'utf-8')
+
+    @property
+    def subject_count(self) -> int:
+        return len(self.sections[b'SUBJ']) // 3
+
+    @property
+    def student_count(self) -> int:
+        return len(self.sections[b'STUD']) // 6
+
+    def subject_codes(self) -> List[str]:
+        """Mã môn học theo chỉ số dùng trong cột ASUB"""
+        records = self.sections[b'SUBJ']
+        return [self.string(records[i]) for i in range(0, len(records), 3)]
+
+    def student_codes(self) -> List[str]:
+        """MSSV theo chỉ số dùng trong cột ASTU"""
+        records = self.sections[b'STUD']
+        return [self.string(records[i]) for i in range(0, len(records), 6)]
+
+    def subjects(self) -> List[Subject]:
+        """Các môn học có đủ thông tin (bỏ qua mã chỉ có trong dữ liệu điểm danh)"""
+        records = self.sections[b'SUBJ']
+        return [Subject(self.string(records[i]), self.string(records[i + 1]), records[i + 2])
+                for i in range(0, len(records), 3) if records[i + 1] != NO_STRING]
+
+    def iter_students(self) -> Iterator[Student]:
+        """Các sinh viên có đủ thông tin, theo thứ tự trong ảnh chụp"""
+        records = self.sections[b'STUD']
+        string = self.string
+        for i in range(0, len(records), 6):
+            if records[i + 1] != NO_STRING:
+                yield Student(*(string(index) for index in records[i:i + 6]))
+
+    def columns(self) -> ColumnSnapshot:
+        """Các cột điểm danh dạng view không sao chép (dùng được với report_engine.count_columns)"""
+        return ColumnSnapshot(self.sections[b'ASTU'], self.sections[b'ASUB'], self.sections[b'ADAY'],
+                              self.sections[b'ASTA'], self.student_count)
+
+    def pairs(self) -> memoryview:
+        return self.sections[b'PAIR']
+
+    def iter_records(self) -> Iterator[AttendanceRecord]:
+        """Duyệt các bản ghi dạng (môn học, ngày, MSSV, trạng thái)"""
+        subjects = self.subject_codes()
+        students = self.student_codes()
+        columns = self.columns()
+        for student, subject, day, code in zip(columns.student_idx, columns.subject_idx,
+                                               columns.days, columns.statuses):
+            yield subjects[subject], ordinal_to_date(day), students[student], STATUS_BY_CODE[code]
+
+
+def write_subjects_csv(path: str, subjects: Iterable[Subject]) -> None:
+    """Ghi danh sách môn học theo định dạng mon_hoc.csv"""
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['ma_mh', 'ten_mh', 'so_tin_chi'])
+        writer.writerows((subject.code, subject.name, subject.credits) for subject in subjects)
+
+
+def main() -> None:
+    import argparse
+
+    from services.attendance_log import AttendanceLog
+    from services.attendance_system import AttendanceSystem
+    from services.repository import CsvRepository
+    from services.roster_writer import write_students_atomic
+    from utils.constants import ATTENDANCE_LOG_PATHS, BINARY_SNAPSHOT_PATH, CSV_PATHS
+
+    parser = argparse.ArgumentParser(description='Chuyển đổi giữa dữ liệu CSV/nhật ký và ảnh chụp nhị phân')
+    commands = parser.add_subparsers(dest='command', required=True)
+    to_snapshot = commands.add_parser('to-snapshot', help='CSV + nhật ký điểm danh -> ảnh chụp')
+    to_csv = commands.add_parser('to-csv', help='ảnh chụp -> CSV + snapshot nhật ký điểm danh')
+    for command in (to_snapshot, to_csv):
+        command.add_argument('--students', default=CSV_PATHS['students'])
+        command.add_argument('--subjects', default=CSV_PATHS['subjects'])
+        command.add_argument('--log', default=ATTENDANCE_LOG_PATHS['log'])
+        command.add_argument('--log-snapshot', default=ATTENDANCE_LOG_PATHS['snapshot'])
+    to_snapshot.add_argument('--out', default=BINARY_SNAPSHOT_PATH)
+    to_csv.add_argument('--snapshot', default=BINARY_SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'to-snapshot':
+        system = AttendanceSystem(CsvRepository(args.students, args.subjects, args.log, args.log_snapshot))
+        system.load_repository()
+        count = system.save_snapshot(args.out)
+        system.close()
+        print(f"Đã ghi {len(system.students)} sinh viên, {count} bản ghi điểm danh vào {args.out}")
+    else:
+        with SnapshotFile(args.snapshot) as snapshot:
+            students = list(snapshot.iter_students())
+            write_subjects_csv(args.subjects, snapshot.subjects())
+            write_students_atomic(args.students, students)
+            # Ghi lại toàn bộ điểm danh thành snapshot của nhật ký (nhật ký được làm rỗng)
+            log = AttendanceLog(args.log, args.log_snapshot)
+            log.compact(snapshot.iter_records())
+            log.close()
+            print(f"Đã ghi {len(students)} sinh viên, {len(snapshot)} bản ghi điểm danh ra CSV")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+from typing import Callable, Deque, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from array import array
+from collections import deque
+import csv
+import time
+
+from models.student import Student
+
+STUDENT_COLUMNS = ('ma_sv', 'ho_ten', 'lop_hoc', 'truong', 'khoa', 'hoc_ky_nhap_hoc')
+DEFAULT_CHUNK_SIZE = 10_000
+
+StudentFields = Tuple[str, str, str, str, str, str]
+
+
+class RowError(NamedTuple):
+    line: int  # số dòng trong file (dòng tiêu đề là 1)
+    message: str
+
+
+# (dòng bắt đầu của từng bản ghi, các bản ghi thô, lỗi khi đọc)
+Chunk = Tuple[array, List[List[str]], List[RowError]]
+
+
+class ImportResult:
+    """Kết quả nhập dữ liệu sinh viên từ CSV"""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.errors: List[RowError] = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (f"Đã đọc {self.rows} dòng, nhập {self.imported} sinh viên, "
+                f"{len(self.errors)} lỗi trong {self.elapsed:.2f}s "
+                f"({self.rows_per_second:,.0f} dòng/s)")
+
+
+def read_chunks(file, chunk_size: int) -> Iterator[Chunk]:
+    """Đọc file CSV (đã bỏ dòng tiêu đề) thành từng khối ``chunk_size`` bản ghi.
+
+    Số dòng lấy theo ``reader.line_num`` nên đúng cả sau các trường nhiều dòng;
+    bản ghi ``csv`` không đọc được thành RowError và việc đọc tiếp tục.
+    """
+    reader = csv.reader(file)
+    lines, rows, errors = array('I'), [], []
+    while True:
+        # Dòng tiêu đề đã được đọc riêng nên dòng trong file là line_num + 1
+        start = reader.line_num + 2
+        try:
+            row = next(reader)
+        except StopIteration:
+            break
+        except csv.Error as e:
+            errors.append(RowError(start, f"Dòng CSV không hợp lệ: {e}"))
+            continue
+        lines.append(start)
+        rows.append(row)
+        if len(rows) >= chunk_size:
+            yield lines, rows, errors
+            lines, rows, errors = array('I'), [], []
+    if rows or errors:
+        yield lines, rows, errors
+
+
+def has_bad_bytes(row: List[str]) -> bool:
+    """Dòng có byte không phải UTF-8 (được giữ lại dưới dạng surrogate khi đọc)"""
+    try:
+        '\x1f'.join(row).encode('utf-8')
+    except UnicodeEncodeError:
+        return True
+    return False
+
+
+def parse_chunk(chunk: Chunk, positions: Sequence[int]) -> Tuple[List[Tuple[int, StudentFields]], List[RowError]]:
+    """Kiểm tra và tách các trường của một khối dòng; chạy được trong tiến trình con"""
+    lines, rows, read_errors = chunk
+    width = max(positions) + 1
+    parsed: List[Tuple[int, StudentFields]] = []
+    errors: List[RowError] = list(read_errors)
+    for line, row in zip(lines, rows):
+        if not row:
+            continue
+        if len(row) < width:
+            errors.append(RowError(line, f"Thiếu cột (có {len(row)}, cần {width})"))
+            continue
+        if has_bad_bytes(row):
+            errors.append(RowError(line, "Dòng chứa byte không hợp lệ theo UTF-8"))
+            continue
+        fields = tuple(row[position].strip() for position in positions)
+        if not fields[0] or not fields[1]:
+            errors.append(RowError(line, "Thiếu MSSV hoặc họ tên"))
+            continue
+        parsed.append((line, fields))
+    if read_errors:
+        errors.sort()
+    return parsed, errors
+
+
+def import_students(file_path: str, add_student: Callable[[Student], bool],
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 0,
+                    progress: Optional[Callable[[ImportResult], None]] = None) -> ImportResult:
+    """Nhập sinh viên từ CSV theo từng khối, bộ nhớ giới hạn theo kích thước khối.
+
+    Dòng lỗi được ghi nhận trong ``ImportResult.errors`` thay vì dừng cả quá
+    trình. Với ``workers > 1`` các khối được tách trong tiến trình con, tối đa
+    ``2 * workers`` khối chờ cùng lúc. ``progress`` được gọi sau mỗi khối.
+    """
+    result = ImportResult()
+    # Byte lỗi được giữ thành surrogate để chỉ loại đúng dòng chứa nó
+    with open(file_path, 'r', encoding='utf-8-sig', errors='surrogateescape', newline='') as file:
+        header = next(csv.reader([file.readline()]), [])
+        header = [column.strip() for column in header]
+        missing = [column for column in STUDENT_COLUMNS if column not in header]
+        if missing:
+            raise ValueError(f"File thiếu cột: {', '.join(missing)}")
+        positions = [header.index(column) for column in STUDENT_COLUMNS]
+
+        def apply(size: int, parsed: List[Tuple[int, StudentFields]], errors: List[RowError]) -> None:
+            result.rows += size
+            result.errors.extend(errors)
+            for line, fields in parsed:
+                if add_student(Student(*fields)):
+                    result.imported += 1
+                else:
+                    result.errors.append(RowError(line, f"MSSV {fields[0]} đã tồn tại"))
+            result.elapsed = time.perf_counter() - result.started
+            if progress:
+                progress(result)
+
+        chunks = read_chunks(file, chunk_size)
+        if workers > 1:
+            # Nhập ở đây để lần nhập tuần tự không phải tải multiprocessing
+            from concurrent.futures import Future, ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending: Deque[Tuple[int, Future]] = deque()
+                for chunk in chunks:
+                    pending.append((len(chunk[1]) + len(chunk[2]), executor.submit(parse_chunk, chunk, positions)))
+                    if len(pending) >= 2 * workers:
+                        size, future = pending.popleft()
+                        apply(size, *future.result())
+                while pending:
+                    size, future = pending.popleft()
+                    apply(size, *future.result())
+        else:
+            for chunk in chunks:
+                apply(len(chunk[1]) + len(chunk[2]), *parse_chunk(chunk, positions))
+
+    result.elapsed = time.perf_counter() - result.started
+    return result
@@ -0,0 +1,158 @@
+"""
+Xét điều kiện dự thi của mọi cặp sinh viên × môn học trong một lần duyệt.
+
+Số buổi vắng được đọc từ bộ đếm theo cặp của AttendanceStore nên không phải
+duyệt các dòng điểm danh. Mỗi cặp có điểm danh được xếp vào một trong ba mức:
+đủ điều kiện, có nguy cơ (còn tối đa ``margin`` buổi vắng trước MAX_ABSENCES)
+và không đủ điều kiện. Kết quả gồm danh sách các cặp có nguy cơ/không đủ điều
+kiện xếp theo số buổi vắng giảm dần, cùng số lượng theo từng lớp và môn học.
+
+Chạy từ thư mục gốc dự án:
+    python -m services.eligibility_scan --margin 1
+"""
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence
+import csv
+import os
+import time
+
+from utils.constants import AT_RISK_MARGIN, MAX_ABSENCES
+
+ELIGIBLE, AT_RISK, INELIGIBLE = 0, 1, 2
+LEVEL_LABELS = ('Đủ điều kiện', 'Có nguy cơ', 'Không đủ điều kiện')
+
+
+class EligibilityEntry(NamedTuple):
+    student_id: str
+    name: str
+    class_name: str
+    subject: str
+    absences: int
+    level: int
+
+
+class EligibilityScan:
+    """Kết quả xét điều kiện dự thi toàn khóa"""
+
+    def __init__(self, margin: int):
+        self.margin = margin
+        # Các cặp có nguy cơ hoặc không đủ điều kiện, vắng nhiều nhất trước
+        self.entries: List[EligibilityEntry] = []
+        # Số cặp theo mức (đủ điều kiện, có nguy cơ, không đủ điều kiện)
+        self.totals = [0, 0, 0]
+        self.by_class: Dict[str, List[int]] = {}
+        self.by_subject: Dict[str, List[int]] = {}
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def pairs(self) -> int:
+        return sum(self.totals)
+
+    def write_ranked(self, file_path: str) -> int:
+        """Ghi danh sách xếp hạng ra file CSV, trả về số dòng"""
+        with open(file_path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['hang', 'ma_sv', 'ho_ten', 'lop_hoc', 'ma_mh', 'so_buoi_vang', 'con_lai', 'muc'])
+            for rank, entry in enumerate(self.entries, 1):
+                writer.writerow([rank, entry.student_id, entry.name, entry.class_name, entry.subject,
+                                 entry.absences, MAX_ABSENCES - entry.absences, LEVEL_LABELS[entry.level]])
+        return len(self.entries)
+
+    @staticmethod
+    def write_summary(file_path: str, column: str, counts: Dict[str, List[int]]) -> int:
+        """Ghi số cặp theo mức của từng lớp/môn học ra file CSV"""
+        with open(file_path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow([column, 'du_dieu_kien', 'co_nguy_co', 'khong_du_dieu_kien', 'tong'])
+            for key in sorted(counts):
+                writer.writerow([key, *counts[key], sum(counts[key])])
+        return len(counts)
+
+    def write(self, output_dir: str, prefix: str = 'dieu_kien_du_thi') -> List[str]:
+        """Ghi danh sách xếp hạng và hai bảng tổng hợp, trả về đường dẫn các file"""
+        os.makedirs(output_dir, exist_ok=True)
+        paths = [os.path.join(output_dir, f"{prefix}{suffix}.csv") for suffix in ('', '_theo_lop', '_theo_mon')]
+        self.write_ranked(paths[0])
+        self.write_summary(paths[1], 'lop_hoc', self.by_class)
+        self.write_summary(paths[2], 'ma_mh', self.by_subject)
+        return paths
+
+    def __str__(self) -> str:
+        eligible, at_risk, ineligible = self.totals
+        return (f"Đã xét {self.pairs} cặp sinh viên × môn học: {eligible} đủ điều kiện, {at_risk} có nguy cơ, "
+                f"{ineligible} không đủ điều kiện trong {self.elapsed:.2f}s")
+
+
+def scan_eligibility(system, margin: int = AT_RISK_MARGIN, subjects: Optional[Sequence[str]] = None,
+                     class_names: Optional[Sequence[str]] = None) -> EligibilityScan:
+    """Xét điều kiện dự thi của mọi cặp có điểm danh (có thể lọc theo môn học, lớp)"""
+    if not system.resident:
+        raise ValueError("Xét điều kiện toàn khóa cần dữ liệu nằm trong bộ nhớ (load_repository(resident=True))")
+    scan = EligibilityScan(margin)
+    students = system.students
+    subject_filter = set(subjects) if subjects is not None else None
+    class_filter = set(class_names) if class_names is not None else None
+    at_risk_from = MAX_ABSENCES - margin
+    totals, by_class, by_subject, entries = scan.totals, scan.by_class, scan.by_subject, scan.entries
+
+    current_id, student, class_counts = None, None, None
+    for student_id, subject, absences in system.attendance_store.iter_absences():
+        # Các môn của một sinh viên nằm liền nhau: chỉ tra sinh viên khi đổi MSSV
+        if student_id != current_id:
+            current_id, class_counts = student_id, None
+            student = students.get(student_id)
+            if student is not None and class_filter is not None and student.class_name not in class_filter:
+                student = None
+        if student is None or (subject_filter is not None and subject not in subject_filter):
+            continue
+        if absences > MAX_ABSENCES:
+            level = INELIGIBLE
+        elif absences >= at_risk_from:
+            level = AT_RISK
+        else:
+            level = ELIGIBLE
+        totals[level] += 1
+        if class_counts is None:
+            class_counts = by_class.setdefault(student.class_name, [0, 0, 0])
+        class_counts[level] += 1
+        subject_counts = by_subject.get(subject)
+        if subject_counts is None:
+            subject_counts = by_subject[subject] = [0, 0, 0]
+        subject_counts[level] += 1
+        if level:
+            entries.append(EligibilityEntry(student_id, student.name, student.class_name, subject, absences, level))
+
+    entries.sort(key=lambda entry: (-entry.absences, entry.class_name, entry.student_id, entry.subject))
+    scan.elapsed = time.perf_counter() - scan.started
+    return scan
+
+
+def main() -> None:
+    import argparse
+
+    from services.attendance_system import AttendanceSystem
+    from services.repository import CsvRepository
+
+    parser = argparse.ArgumentParser(description='Xét điều kiện dự thi cho mọi sinh viên × môn học')
+    parser.add_argument('--margin', type=int, default=AT_RISK_MARGIN,
+                        help='số buổi vắng còn lại (trước MAX_ABSENCES) để tính là có nguy cơ')
+    parser.add_argument('--subjects', nargs='*', help='mã môn học (mặc định: tất cả)')
+    parser.add_argument('--classes', nargs='*', help='tên lớp (mặc định: tất cả)')
+    parser.add_argument('--output-dir', help='thư mục ghi kết quả (mặc định: reports)')
+    args = parser.parse_args()
+
+    system = AttendanceSystem(CsvRepository())
+    system.load_repository()
+    try:
+        scan = system.scan_eligibility(args.margin, args.subjects, args.classes)
+        print(scan)
+        prefix = f"dieu_kien_du_thi_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        for path in scan.write(args.output_dir or system.reports_dir, prefix):
+            print(f"Đã lưu {path}")
+    finally:
+        system.close()
+
+
+if __name__ == '__main__':
+    main()
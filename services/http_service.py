@@ -0,0 +1,413 @@
+"""
+Dịch vụ HTTP/JSON cục bộ cho AttendanceSystem (asyncio, chỉ dùng thư viện chuẩn).
+
+Chạy từ thư mục gốc dự án:
+    python -m services.http_service --port 8080
+
+Các đường dẫn:
+    GET  /subjects                              danh sách môn học
+    POST /students                              thêm sinh viên (JSON các trường của Student)
+    GET  /students?q=...&limit=...              tìm kiếm sinh viên
+    GET  /students/<mssv>                       thông tin sinh viên
+    GET  /students/<mssv>/history?subject=&start=&end=&limit=&offset=
+    GET  /students/<mssv>/eligibility?subject=  điều kiện dự thi
+    POST /attendance                            điểm danh {subject, date, student_id, status}
+    PUT  /attendance                            sửa điểm danh (cùng các trường)
+    GET  /reports?subject=&start=&end=&class_name=&department=&school=&enrollment_term=
+    GET  /metrics                               số liệu đo đạc dạng Prometheus (khi chạy với --metrics)
+
+Ngày dùng dạng YYYY-MM-DD. Điểm danh gửi tới được gom thành lô và ghi trong
+một luồng riêng; báo cáo, tìm kiếm và lịch sử chạy trong nhóm luồng đọc để
+không chặn vòng lặp sự kiện.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+import argparse
+import asyncio
+import json
+import os
+
+from models.student import Student
+from services.attendance_log import AttendanceRecord
+from services.attendance_system import AttendanceSystem
+from utils.constants import (ATTENDANCE_BATCH_SIZE, ATTENDANCE_BATCH_WINDOW, ATTENDANCE_STATUS, DATA_DIR,
+                             HTTP_HOST, HTTP_PORT, METRICS_DUMP_INTERVAL, SEARCH_RESULT_LIMIT, SQLITE_PATH)
+
+STUDENT_FIELDS = ('student_id', 'name', 'class_name', 'school', 'department', 'enrollment_term')
+REPORT_FILTERS = ('class_name', 'department', 'school', 'enrollment_term')
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 409: 'Conflict', 500: 'Internal Server Error'}
+
+Response = Tuple[int, Any]
+
+
+class HttpError(Exception):
+    """Lỗi trả về cho client với mã trạng thái HTTP"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def student_to_dict(student: Student) -> Dict[str, str]:
+    """Các trường của sinh viên dạng JSON"""
+    return {field: getattr(student, field) for field in STUDENT_FIELDS}
+
+
+def _parse_date(value: Optional[str], field: str) -> datetime:
+    if not value:
+        raise HttpError(400, f"Thiếu tham số {field}")
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise HttpError(400, f"Ngày không hợp lệ: {value}")
+
+
+def _parse_int(value: Optional[str], field: str) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise HttpError(400, f"{field} phải là số nguyên")
+
+
+class AttendanceBatcher:
+    """Gom các yêu cầu điểm danh đến gần nhau thành một lô.
+
+    Lô được ghi bằng ``take_attendance_many`` trong một luồng ghi duy nhất,
+    nên cả lô chỉ giữ khóa ghi và ghi nhật ký một lần. Lô được gửi khi đủ
+    ``batch_size`` bản ghi hoặc sau ``window`` giây kể từ bản ghi đầu tiên.
+    """
+
+    def __init__(self, system: AttendanceSystem, executor: ThreadPoolExecutor,
+                 batch_size: int = ATTENDANCE_BATCH_SIZE, window: float = ATTENDANCE_BATCH_WINDOW):
+        self.system = system
+        self.executor = executor
+        self.batch_size = batch_size
+        self.window = window
+        self.batches = 0
+        self.records = 0
+        self._queue: 'asyncio.Queue[Tuple[AttendanceRecord, asyncio.Future]]' = asyncio.Queue()
+
+    async def submit(self, record: AttendanceRecord) -> bool:
+        """Đưa bản ghi vào lô kế tiếp, chờ tới khi lô được ghi xong"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, future))
+        return await future
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            records = [record for record, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.system.take_attendance_many, records)
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            self.batches += 1
+            self.records += len(records)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+class AttendanceService:
+    """Xử lý yêu cầu HTTP/1.1 (giữ kết nối) và chuyển tới AttendanceSystem"""
+
+    def __init__(self, system: AttendanceSystem, readers: int = 4,
+                 batch_size: int = ATTENDANCE_BATCH_SIZE, batch_window: float = ATTENDANCE_BATCH_WINDOW):
+        self.system = system
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        # Một luồng ghi giữ đúng thứ tự ghi; các luồng đọc dùng cho báo cáo/tìm kiếm
+        self.write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ghi')
+        self.read_executor = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='doc')
+        self.batcher: Optional[AttendanceBatcher] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        self.requests = 0
+
+    async def start(self, host: str = HTTP_HOST, port: int = HTTP_PORT) -> asyncio.AbstractServer:
+        """Mở cổng lắng nghe và chạy bộ gom lô điểm danh"""
+        self.batcher = AttendanceBatcher(self.system, self.write_executor, self.batch_size, self.batch_window)
+        self._batch_task = asyncio.create_task(self.batcher.run())
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def stop(self) -> None:
+        """Dừng bộ gom lô và đóng các luồng (không đóng AttendanceSystem)"""
+        if self._batch_task:
+            self._batch_task.cancel()
+            try:
+                await self._batch_task
+            except asyncio.CancelledError:
+                pass
+        self.write_executor.shutdown(wait=True)
+        self.read_executor.shutdown(wait=True)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as error:
+                    # Không biết thân yêu cầu dài bao nhiêu nên phải đóng kết nối
+                    writer.write(self._encode_response(error.status, {'error': str(error)}, False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, body, keep_alive = request
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except HttpError as error:
+                    status, payload = error.status, {'error': str(error)}
+                except Exception as error:
+                    status, payload = 500, {'error': f"{type(error).__name__}: {error}"}
+                self.requests += 1
+                writer.write(self._encode_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, bytes, bool]]:
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            return None
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ', 2)
+        except ValueError:
+            return None
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        length = _parse_int(headers.get('content-length') or None, 'Content-Length') or 0
+        if length < 0:
+            raise HttpError(400, "Content-Length không được âm")
+        body = await reader.readexactly(length) if length else b''
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+        return method.upper(), target, body, keep_alive
+
+    @staticmethod
+    def _encode_response(status: int, payload: Any, keep_alive: bool) -> bytes:
+        if isinstance(payload, str):
+            body = payload.encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        return head.encode('latin-1') + body
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Response:
+        """Chọn hàm xử lý theo phương thức và đường dẫn"""
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip('/').split('/') if part]
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        if parts == ['subjects'] and method == 'GET':
+            return 200, [{'code': s.code, 'name': s.name, 'credits': s.credits}
+                         for s in self.system.get_subject_list()]
+        if parts == ['students']:
+            if method == 'GET':
+                return await self._search(query)
+            if method == 'POST':
+                return await self._add_student(self._json(body))
+        if len(parts) >= 2 and parts[0] == 'students' and method == 'GET':
+            if len(parts) == 2:
+                return await self._get_student(parts[1])
+            if parts[2:] == ['history']:
+                return await self._history(parts[1], query)
+            if parts[2:] == ['eligibility']:
+                return await self._eligibility(parts[1], query)
+        if parts == ['attendance']:
+            if method == 'POST':
+                return await self._take_attendance(self._json(body))
+            if method == 'PUT':
+                return await self._edit_attendance(self._json(body))
+        if parts == ['reports'] and method == 'GET':
+            return await self._report(query)
+        if parts == ['metrics'] and method == 'GET':
+            if self.system.instrumentation is None or not self.system.instrumentation.enabled:
+                raise HttpError(404, "Chưa bật đo đạc (chạy với --metrics)")
+            return 200, self.system.instrumentation.metrics.to_prometheus()
+        raise HttpError(404, f"Không có đường dẫn {method} {url.path}")
+
+    async def _in_reader(self, function: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.read_executor, function, *args)
+
+    async def _in_writer(self, function: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.write_executor, function, *args)
+
+    @staticmethod
+    def _json(body: bytes) -> Dict[str, Any]:
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            raise HttpError(400, "Nội dung không phải JSON hợp lệ")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Nội dung phải là một đối tượng JSON")
+        return data
+
+    @staticmethod
+    def _require(data: Dict[str, Any], fields: Tuple[str, ...]) -> List[str]:
+        missing = [field for field in fields if not isinstance(data.get(field), str) or not data[field]]
+        if missing:
+            raise HttpError(400, f"Thiếu trường: {', '.join(missing)}")
+        return [data[field] for field in fields]
+
+    async def _add_student(self, data: Dict[str, Any]) -> Response:
+        student = Student(*self._require(data, STUDENT_FIELDS))
+        if not await self._in_writer(self.system.add_student, student):
+            raise HttpError(409, "MSSV đã tồn tại")
+        return 201, student_to_dict(student)
+
+    async def _get_student(self, student_id: str) -> Response:
+        # Ở chế độ nạp dần việc tra sinh viên đọc file nên không chạy trên vòng lặp sự kiện
+        student = await self._in_reader(self.system.get_student, student_id)
+        if student is None:
+            raise HttpError(404, "Không tìm thấy sinh viên")
+        return 200, student_to_dict(student)
+
+    async def _search(self, query: Dict[str, str]) -> Response:
+        limit = _parse_int(query.get('limit'), 'limit') or SEARCH_RESULT_LIMIT
+        students = await self._in_reader(self.system.search_student, query.get('q', ''), limit)
+        return 200, [student_to_dict(student) for student in students]
+
+    async def _history(self, student_id: str, query: Dict[str, str]) -> Response:
+        start = _parse_date(query['start'], 'start') if 'start' in query else None
+        end = _parse_date(query['end'], 'end') if 'end' in query else None
+        limit = _parse_int(query.get('limit'), 'limit')
+        offset = _parse_int(query.get('offset'), 'offset') or 0
+
+        def history() -> Optional[List[Any]]:
+            if self.system.get_student(student_id) is None:
+                return None
+            return self.system.get_student_attendance_history(
+                student_id, query.get('subject'), start, end, limit, offset)
+
+        result = await self._in_reader(history)
+        if result is None:
+            raise HttpError(404, "Không tìm thấy sinh viên")
+        return 200, result
+
+    async def _eligibility(self, student_id: str, query: Dict[str, str]) -> Response:
+        subject = query.get('subject')
+        if subject not in self.system.subjects:
+            raise HttpError(400, "Mã môn học không hợp lệ")
+        eligible, absences = await self._in_reader(self.system.check_exam_eligibility, student_id, subject)
+        return 200, {'student_id': student_id, 'subject': subject,
+                     'eligible_for_exam': eligible, 'absences': absences}
+
+    async def _take_attendance(self, data: Dict[str, Any]) -> Response:
+        subject, date, student_id, status = self._require(data, ('subject', 'date', 'student_id', 'status'))
+        if subject not in self.system.subjects:
+            raise HttpError(400, "Mã môn học không hợp lệ")
+        if not await self.batcher.submit((subject, date, student_id, status)):
+            raise HttpError(400, "Không điểm danh được (sai MSSV, ngày hoặc trạng thái)")
+        return 201, {'subject': subject, 'date': date, 'student_id': student_id, 'status': status}
+
+    async def _edit_attendance(self, data: Dict[str, Any]) -> Response:
+        subject, date, student_id, status = self._require(data, ('subject', 'date', 'student_id', 'status'))
+        # Kiểm tra trước các trường hợp edit_attendance in thông báo ra stdout
+        if subject not in self.system.subjects:
+            raise HttpError(400, "Mã môn học không hợp lệ")
+        if status not in ATTENDANCE_STATUS.values():
+            raise HttpError(400, "Trạng thái điểm danh không hợp lệ")
+
+        def edit() -> Optional[bool]:
+            if self.system.get_student(student_id) is None:
+                return None
+            return self.system.edit_attendance(subject, student_id, date, status)
+
+        edited = await self._in_writer(edit)
+        if edited is None:
+            raise HttpError(404, "Không tìm thấy sinh viên")
+        if not edited:
+            raise HttpError(404, "Không có bản ghi điểm danh để sửa")
+        return 200, {'subject': subject, 'date': date, 'student_id': student_id, 'status': status}
+
+    async def _report(self, query: Dict[str, str]) -> Response:
+        subject = query.get('subject')
+        if subject not in self.system.subjects:
+            raise HttpError(400, "Mã môn học không hợp lệ")
+        start = _parse_date(query.get('start'), 'start')
+        end = _parse_date(query.get('end'), 'end')
+        filters = {field: query.get(field) for field in REPORT_FILTERS}
+        report = await self._in_reader(lambda: self.system.generate_report(subject, start, end, **filters))
+        return 200, report
+
+
+async def serve(system: AttendanceSystem, host: str = HTTP_HOST, port: int = HTTP_PORT,
+                readers: int = 4) -> None:
+    """Chạy dịch vụ cho tới khi bị hủy"""
+    service = AttendanceService(system, readers)
+    server = await service.start(host, port)
+    print(f"Đang phục vụ tại http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main() -> None:
+    from services.repository import CsvRepository
+    from services.sqlite_repository import SqliteRepository
+
+    parser = argparse.ArgumentParser(description='Dịch vụ HTTP/JSON cho hệ thống điểm danh')
+    parser.add_argument('--host', default=HTTP_HOST)
+    parser.add_argument('--port', type=int, default=HTTP_PORT)
+    parser.add_argument('--readers', type=int, default=4, help='số luồng cho báo cáo và tìm kiếm')
+    parser.add_argument('--sqlite', nargs='?', const=SQLITE_PATH, help='dùng kho SQLite thay cho CSV')
+    parser.add_argument('--metrics', nargs='?', const='', metavar='FILE',
+                        help='bật đo đạc, xem tại GET /metrics (và ghi định kỳ ra FILE nếu có)')
+    parser.add_argument('--metrics-interval', type=float, default=METRICS_DUMP_INTERVAL)
+    args = parser.parse_args()
+
+    if args.sqlite:
+        repository = SqliteRepository(args.sqlite)
+    else:
+        repository = CsvRepository(students_path=os.path.join(DATA_DIR, 'sinh_vien.csv'),
+                                   subjects_path=os.path.join(DATA_DIR, 'mon_hoc.csv'))
+    system = AttendanceSystem(repository)
+    if args.metrics is not None:
+        system.enable_instrumentation(args.metrics or None, args.metrics_interval)
+    system.load_repository()
+    try:
+        asyncio.run(serve(system, args.host, args.port, args.readers))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        system.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,370 @@
+"""
+Đo đạc tùy chọn cho AttendanceSystem: số lần gọi, phân bố độ trễ, số bản ghi
+đã quét, số dòng và số byte đọc/ghi của từng thao tác.
+
+Khi bật, các phương thức trong INSTRUMENTED_METHODS được thay bằng hàm bọc
+gắn trên chính đối tượng hệ thống; khi tắt các hàm bọc bị gỡ nên phương thức
+gốc chạy không tốn thêm chi phí nào. Số liệu xuất ra dạng văn bản Prometheus
+(theo yêu cầu hoặc ghi định kỳ ra file).
+
+Ghi lại cProfile/tracemalloc khi tính một báo cáo:
+    python -m services.instrumentation --subject DB103 --start 01/09/2024 --end 30/06/2025
+"""
+from bisect import bisect_left
+from datetime import datetime
+from functools import update_wrapper
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import io
+import os
+import threading
+
+from services.report_cache import FILTER_FIELDS
+from utils.constants import (BINARY_SNAPSHOT_PATH, LATENCY_BUCKETS, METRICS_DUMP_INTERVAL, METRICS_PATH,
+                             PROFILES_DIR, PROFILE_TOP_ALLOCATIONS)
+
+METRIC_PREFIX = 'diem_danh'
+
+# get_student không được đo mặc định vì nằm trong vòng lặp của các thao tác hàng loạt
+INSTRUMENTED_METHODS = (
+    'load_repository', 'add_student', 'load_students_from_csv', 'save_students_to_csv',
+    'flush_students', 'take_attendance', 'take_attendance_many', 'take_class_attendance', 'import_attendance',
+    'edit_attendance', 'check_exam_eligibility', 'get_students_at_risk', 'scan_eligibility', 'attendance_trend',
+    'attendance_totals', 'search_student', 'get_student_attendance_history', 'find_students', 'generate_report',
+    'get_class_report', 'write_report', 'export_report', 'export_reports', 'save_report', 'save_snapshot',
+    'load_snapshot', 'compact_attendance_log',
+)
+
+COUNTER_HELP = {
+    'rows_scanned': 'Số bản ghi điểm danh đã quét để tính báo cáo',
+    'report_rows': 'Số dòng sinh viên đã tính trong báo cáo',
+    'rows_read': 'Số dòng/bản ghi đã đọc từ file',
+    'rows_written': 'Số dòng/bản ghi đã ghi ra file',
+    'bytes_read': 'Số byte đã đọc từ file',
+    'bytes_written': 'Số byte đã ghi ra file',
+}
+
+# (tên bộ đếm, giá trị) rút ra từ tham số và kết quả của một lần gọi
+IoHook = Callable[[tuple, dict, Any], Iterable[Tuple[str, float]]]
+
+
+class Histogram:
+    """Phân bố độ trễ theo các ngưỡng cố định (giây)"""
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # ô cuối cùng là +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Các cặp (ngưỡng, số lần <= ngưỡng) theo kiểu bucket của Prometheus"""
+        result = []
+        running = 0
+        for bound, count in zip([*map(str, self.bounds), '+Inf'], self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+
+class Metrics:
+    """Bộ đếm và phân bố độ trễ theo từng phương thức, dùng được từ nhiều luồng"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.calls: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.latency: Dict[str, Histogram] = {}
+        self.counters: Dict[Tuple[str, str], float] = {}
+        self.started = datetime.now()
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, seconds: float, failed: bool = False) -> None:
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            if failed:
+                self.errors[method] = self.errors.get(method, 0) + 1
+            histogram = self.latency.get(method)
+            if histogram is None:
+                histogram = self.latency[method] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def add(self, counter: str, method: str, value: float) -> None:
+        with self._lock:
+            key = (counter, method)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.errors.clear()
+            self.latency.clear()
+            self.counters.clear()
+            self.started = datetime.now()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Số liệu hiện tại theo từng phương thức (số lần gọi, lỗi, tổng/trung bình độ trễ, bộ đếm)"""
+        with self._lock:
+            methods: Dict[str, Dict[str, Any]] = {}
+            for method, histogram in self.latency.items():
+                methods[method] = {'calls': self.calls.get(method, 0), 'errors': self.errors.get(method, 0),
+                                   'seconds': histogram.total,
+                                   'mean_ms': histogram.total / histogram.count * 1000 if histogram.count else 0.0}
+            for (counter, method), value in self.counters.items():
+                methods.setdefault(method, {})[counter] = value
+        return {'since': self.started.isoformat(timespec='seconds'), 'methods': methods}
+
+    def to_prometheus(self) -> str:
+        """Số liệu dạng văn bản Prometheus (text exposition format 0.0.4)"""
+        lines = []
+        with self._lock:
+            lines.append(f"# HELP {METRIC_PREFIX}_calls_total Số lần gọi theo phương thức")
+            lines.append(f"# TYPE {METRIC_PREFIX}_calls_total counter")
+            for method in sorted(self.calls):
+                lines.append(f'{METRIC_PREFIX}_calls_total{{method="{method}"}} {self.calls[method]}')
+            lines.append(f"# HELP {METRIC_PREFIX}_errors_total Số lần gọi kết thúc bằng ngoại lệ")
+            lines.append(f"# TYPE {METRIC_PREFIX}_errors_total counter")
+            for method in sorted(self.errors):
+                lines.append(f'{METRIC_PREFIX}_errors_total{{method="{method}"}} {self.errors[method]}')
+            name = f"{METRIC_PREFIX}_call_duration_seconds"
+            lines.append(f"# HELP {name} Độ trễ của từng lần gọi")
+            lines.append(f"# TYPE {name} histogram")
+            for method in sorted(self.latency):
+                histogram = self.latency[method]
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{name}_bucket{{method="{method}",le="{bound}"}} {count}')
+                lines.append(f'{name}_sum{{method="{method}"}} {histogram.total:.6f}')
+                lines.append(f'{name}_count{{method="{method}"}} {histogram.count}')
+            for counter, help_text in COUNTER_HELP.items():
+                values = sorted((method, value) for (metric, method), value in self.counters.items()
+                                if metric == counter)
+                if not values:
+                    continue
+                lines.append(f"# HELP {METRIC_PREFIX}_{counter}_total {help_text}")
+                lines.append(f"# TYPE {METRIC_PREFIX}_{counter}_total counter")
+                for method, value in values:
+                    lines.append(f'{METRIC_PREFIX}_{counter}_total{{method="{method}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str) -> None:
+        """Ghi số liệu dạng Prometheus ra file (thay file cũ trong một bước)"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(self.to_prometheus())
+        os.replace(temp_path, path)
+
+
+def _argument(args: tuple, kwargs: dict, position: int, name: str, default: Any = None) -> Any:
+    if len(args) > position:
+        return args[position]
+    return kwargs.get(name, default)
+
+
+def _file_size(path: Optional[str]) -> int:
+    try:
+        return os.path.getsize(path) if path else 0
+    except OSError:
+        return 0
+
+
+IO_HOOKS: Dict[str, IoHook] = {
+    'load_students_from_csv': lambda args, kwargs, result: [
+        ('bytes_read', _file_size(_argument(args, kwargs, 0, 'file_path'))),
+        ('rows_read', result.rows if result else 0)],
+    'save_students_to_csv': lambda args, kwargs, result: [
+        ('bytes_written', _file_size(_argument(args, kwargs, 0, 'file_path')))],
+    'write_report': lambda args, kwargs, result: [('rows_written', result)],
+    'export_report': lambda args, kwargs, result: [('bytes_written', _file_size(result))],
+    'save_report': lambda args, kwargs, result: [
+        ('bytes_written', _file_size(result)),
+        ('rows_written', len(_argument(args, kwargs, 0, 'report')['students']) if result else 0)],
+    'export_reports': lambda args, kwargs, result: [
+        ('bytes_written', sum(_file_size(path) for path in result.files)), ('rows_written', result.rows)],
+    'save_snapshot': lambda args, kwargs, result: [
+        ('bytes_written', _file_size(_argument(args, kwargs, 0, 'path', BINARY_SNAPSHOT_PATH))),
+        ('rows_written', result)],
+    'load_snapshot': lambda args, kwargs, result: [
+        ('bytes_read', _file_size(_argument(args, kwargs, 0, 'path', BINARY_SNAPSHOT_PATH))),
+        ('rows_read', result)],
+}
+
+
+class ProfileCapture(NamedTuple):
+    rows: int  # số dòng sinh viên của báo cáo
+    elapsed: float
+    peak_bytes: int  # bộ nhớ cấp phát đỉnh theo tracemalloc
+    profile_path: str  # file pstats, mở bằng python -m pstats hoặc snakeviz
+    allocations_path: str
+    summary: str  # các hàm tốn thời gian nhất và nơi cấp phát nhiều bộ nhớ nhất
+
+
+class Instrumentation:
+    """Gắn đo đạc vào một AttendanceSystem.
+
+    ``enable`` thay các phương thức bằng hàm bọc trên chính đối tượng (các
+    lời gọi nội bộ qua ``self`` cũng được đếm), ``disable`` gỡ hàm bọc.
+    """
+
+    def __init__(self, system, metrics: Optional[Metrics] = None,
+                 methods: Sequence[str] = INSTRUMENTED_METHODS):
+        self.system = system
+        self.metrics = metrics or Metrics()
+        self.methods = tuple(methods)
+        self.enabled = False
+        self._dump_stop: Optional[threading.Event] = None
+        self._dump_thread: Optional[threading.Thread] = None
+
+    def enable(self) -> 'Instrumentation':
+        if not self.enabled:
+            for name in self.methods:
+                setattr(self.system, name, self._wrap(name, getattr(self.system, name), IO_HOOKS.get(name)))
+            self.system._iter_report_rows = self._wrap_report_rows(self.system._iter_report_rows)
+            self.enabled = True
+        return self
+
+    def disable(self) -> None:
+        if self.enabled:
+            for name in (*self.methods, '_iter_report_rows'):
+                self.system.__dict__.pop(name, None)
+            self.enabled = False
+
+    def _wrap(self, name: str, original: Callable, hook: Optional[IoHook]) -> Callable:
+        observe = self.metrics.observe
+        add = self.metrics.add
+
+        def wrapper(*args, **kwargs):
+            started = perf_counter()
+            failed = True
+            try:
+                result = original(*args, **kwargs)
+                failed = False
+            finally:
+                observe(name, perf_counter() - started, failed)
+            if hook is not None:
+                try:
+                    for counter, value in hook(args, kwargs, result):
+                        add(counter, name, value)
+                except (AttributeError, KeyError, TypeError):
+                    pass  # kết quả lỗi (ví dụ chuỗi rỗng khi không ghi được file) thì bỏ qua
+            return result
+
+        return update_wrapper(wrapper, original)
+
+    def _wrap_report_rows(self, original: Callable) -> Callable:
+        # Chỉ chạy khi báo cáo không có trong bộ nhớ đệm, tức là khi thực sự phải tính
+        system = self.system
+        add = self.metrics.add
+
+        def report_rows(*args, **kwargs):
+            if system.resident:
+                add('rows_scanned', 'report', len(system.attendance_store))
+            count = 0
+            try:
+                for row in original(*args, **kwargs):
+                    count += 1
+                    yield row
+            finally:
+                add('report_rows', 'report', count)
+
+        return update_wrapper(report_rows, original)
+
+    def start_dump(self, path: str = METRICS_PATH, interval: float = METRICS_DUMP_INTERVAL) -> None:
+        """Ghi số liệu ra ``path`` sau mỗi ``interval`` giây (và một lần khi dừng)"""
+        self.stop_dump()
+        stop = self._dump_stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(interval):
+                self.metrics.write(path)
+            self.metrics.write(path)
+
+        self._dump_thread = threading.Thread(target=run, name='metrics-dump', daemon=True)
+        self._dump_thread.start()
+
+    def stop_dump(self) -> None:
+        if self._dump_thread is not None:
+            self._dump_stop.set()
+            self._dump_thread.join()
+            self._dump_thread = self._dump_stop = None
+
+    def profile_report(self, subject: str, start_date: datetime, end_date: datetime,
+                       output_dir: str = PROFILES_DIR, **filters: Optional[str]) -> ProfileCapture:
+        """Tính một báo cáo (bỏ qua bộ nhớ đệm) dưới cProfile và tracemalloc, lưu kết quả vào ``output_dir``"""
+        import cProfile
+        import pstats
+        import tracemalloc
+
+        from services.report_writer import build_report
+
+        os.makedirs(output_dir, exist_ok=True)
+        label = f"bao_cao_{subject}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        profile_path = os.path.join(output_dir, f"{label}.prof")
+        allocations_path = os.path.join(output_dir, f"{label}.alloc.txt")
+
+        filter_values = [filters.get(field) for field in FILTER_FIELDS]
+        profiler = cProfile.Profile()
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        started = perf_counter()
+        profiler.enable()
+        try:
+            report = build_report(subject, self.system._iter_report_rows(subject, start_date, end_date,
+                                                                         *filter_values),
+                                  start_date, end_date)
+        finally:
+            profiler.disable()
+            elapsed = perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            allocations = tracemalloc.take_snapshot().statistics('lineno')[:PROFILE_TOP_ALLOCATIONS]
+            if not was_tracing:
+                tracemalloc.stop()
+
+        profiler.dump_stats(profile_path)
+        with open(allocations_path, 'w', encoding='utf-8') as file:
+            file.write(f"Bộ nhớ đỉnh: {peak} byte\n")
+            for statistic in allocations:
+                file.write(f"{statistic}\n")
+        stats_text = io.StringIO()
+        pstats.Stats(profiler, stream=stats_text).sort_stats('cumulative').print_stats(15)
+        summary = stats_text.getvalue() + '\n'.join(str(statistic) for statistic in allocations[:10])
+        return ProfileCapture(len(report['students']), elapsed, peak, profile_path, allocations_path, summary)
+
+
+def main() -> None:
+    import argparse
+
+    from services.attendance_system import AttendanceSystem
+    from services.repository import CsvRepository
+    from utils.constants import DATA_DIR
+
+    parser = argparse.ArgumentParser(description='Ghi cProfile/tracemalloc khi tính một báo cáo điểm danh')
+    parser.add_argument('--subject', required=True)
+    parser.add_argument('--start', required=True, help='ngày bắt đầu dd/mm/yyyy')
+    parser.add_argument('--end', required=True, help='ngày kết thúc dd/mm/yyyy')
+    parser.add_argument('--class-name')
+    parser.add_argument('--output-dir', default=PROFILES_DIR)
+    args = parser.parse_args()
+
+    system = AttendanceSystem(CsvRepository(students_path=os.path.join(DATA_DIR, 'sinh_vien.csv'),
+                                            subjects_path=os.path.join(DATA_DIR, 'mon_hoc.csv')))
+    system.load_repository()
+    capture = Instrumentation(system).profile_report(
+        args.subject, datetime.strptime(args.start, '%d/%m/%Y'), datetime.strptime(args.end, '%d/%m/%Y'),
+        args.output_dir, class_name=args.class_name)
+    print(capture.summary)
+    print(f"{capture.rows} dòng trong {capture.elapsed:.3f}s, bộ nhớ đỉnh {capture.peak_bytes / 1024 / 1024:.1f} MB")
+    print(f"Đã lưu {capture.profile_path} và {capture.allocations_path}")
+    system.close()
+
+
+if __name__ == '__main__':
+    main()
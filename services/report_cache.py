@@ -0,0 +1,118 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+import threading
+import time
+
+from models.student import Student
+from utils.constants import REPORT_CACHE_SIZE, REPORT_CACHE_TTL
+
+FILTER_FIELDS = ('class_name', 'department', 'school', 'enrollment_term')
+
+
+class ReportKey(NamedTuple):
+    subject: str
+    filters: Tuple[Optional[str], ...]  # theo thứ tự FILTER_FIELDS
+    start_date: datetime
+    end_date: datetime
+
+
+class ReportCache:
+    """Bộ nhớ đệm LRU cho báo cáo điểm danh, có thời hạn (TTL).
+
+    Khi điểm danh hoặc thông tin sinh viên thay đổi chỉ các báo cáo của đúng
+    môn học đó mà bộ lọc có thể chứa sinh viên đó bị xóa. Báo cáo trả về từ
+    bộ nhớ đệm là dùng chung, người gọi không được sửa. Mọi thao tác đều giữ
+    khóa riêng của bộ nhớ đệm nên dùng được từ nhiều luồng.
+    """
+
+    def __init__(self, max_size: int = REPORT_CACHE_SIZE, ttl: float = REPORT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: 'OrderedDict[ReportKey, Tuple[float, object]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Tăng sau mỗi lần xóa; báo cáo tính xong sau một lần xóa thì không được lưu
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: ReportKey):
+        """Lấy báo cáo đã lưu, None nếu chưa có hoặc đã hết hạn"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, report = entry
+                if expires >= time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return report
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: ReportKey, report, generation: Optional[int] = None) -> None:
+        """Lưu báo cáo, loại bỏ báo cáo ít dùng nhất khi đầy.
+
+        ``generation`` là giá trị ``self.generation`` đọc trước khi tính báo
+        cáo; nếu dữ liệu đã đổi trong lúc tính thì báo cáo không được lưu.
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, report)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, subject: Optional[str] = None,
+                   students: Iterable[Student] = (), fields: Iterable[Dict[str, str]] = ()) -> int:
+        """Xóa các báo cáo bị ảnh hưởng, trả về số báo cáo đã xóa.
+
+        ``subject`` None nghĩa là mọi môn học. Một báo cáo bị xóa khi bộ lọc
+        của nó có thể chứa một trong các sinh viên (hoặc bộ giá trị trường)
+        được truyền vào; không truyền sinh viên nào thì xóa mọi báo cáo của môn.
+        """
+        profiles = [tuple(getattr(student, field) for field in FILTER_FIELDS) for student in students]
+        profiles += [tuple(values.get(field) for field in FILTER_FIELDS) for values in fields]
+        with self._lock:
+            stale = []
+            for key in self._entries:
+                if subject is not None and key.subject != subject:
+                    continue
+                if profiles and not any(_matches(key.filters, profile) for profile in profiles):
+                    continue
+                stale.append(key)
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            self.generation += 1
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Số liệu hit/miss của bộ nhớ đệm"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+def _matches(filters: Tuple[Optional[str], ...], profile: Tuple[Optional[str], ...]) -> bool:
+    return all(wanted is None or wanted == value for wanted, value in zip(filters, profile))
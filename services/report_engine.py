@@ -0,0 +1,146 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time
+from typing import Iterator, List, NamedTuple, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # khi thiếu sẽ dùng vòng lặp thuần Python
+    np = None
+
+from services.attendance_store import AttendanceStore, ColumnSnapshot, CODE_BY_STATUS, ABSENT_CODES
+from utils.constants import REPORT_SCAN_MIN_SHARE
+
+PRESENT_CODE = CODE_BY_STATUS['Có mặt']
+LATE_CODE = CODE_BY_STATUS['Đi trễ']
+
+
+class AttendanceCounts(NamedTuple):
+    absences: int  # số buổi vắng trong khoảng thời gian
+    late_arrivals: int
+    present: int
+    total_absences: int  # số buổi vắng của cả môn, dùng xét điều kiện dự thi
+
+
+EMPTY_COUNTS = AttendanceCounts(0, 0, 0, 0)
+
+
+def day_range(start_date: datetime, end_date: datetime) -> tuple[int, int]:
+    """Đổi khoảng [start_date, end_date] thành khoảng số thứ tự ngày tương đương.
+
+    Ngày điểm danh được hiểu là 00:00 của ngày đó, giống khi so sánh với
+    ``datetime.strptime(date, '%Y-%m-%d')``.
+    """
+    first = start_date.toordinal()
+    if start_date.time() != time():
+        first += 1
+    return first, end_date.toordinal()
+
+
+def count_attendance(store: AttendanceStore, subject: str, student_ids: Sequence[str],
+                     start_date: datetime, end_date: datetime) -> List[AttendanceCounts]:
+    """Đếm vắng/trễ/có mặt của nhiều sinh viên trong một môn bằng một lượt quét.
+
+    Quét trên bản chụp các cột nên luồng khác vẫn ghi điểm danh được trong lúc tính.
+    """
+    return list(iter_attendance_counts(store, subject, student_ids, start_date, end_date))
+
+
+def iter_attendance_counts(store: AttendanceStore, subject: str, student_ids: Sequence[str],
+                           start_date: datetime, end_date: datetime) -> Iterator[AttendanceCounts]:
+    """Như count_attendance nhưng trả về lần lượt số liệu của từng sinh viên theo thứ tự ``student_ids``.
+
+    Nhóm nhỏ (một lớp) được đếm trên các dòng của từng cặp sinh viên/môn học;
+    chỉ nhóm chiếm từ REPORT_SCAN_MIN_SHARE số sinh viên trở lên mới quét cả cột.
+    """
+    subject_index = store.subject_ids.get(subject)
+    if subject_index is None or not len(store):
+        for _ in student_ids:
+            yield EMPTY_COUNTS
+        return
+
+    first_day, last_day = day_range(start_date, end_date)
+    if len(student_ids) < len(store.student_codes) * REPORT_SCAN_MIN_SHARE:
+        for student_id in student_ids:
+            yield count_pair(store, student_id, subject_index, first_day, last_day)
+        return
+    snapshot = store.snapshot()
+    columns = count_columns(snapshot, subject_index, first_day, last_day)
+    for student_id in student_ids:
+        index = store.student_ids.get(student_id)
+        if index is None or index >= snapshot.student_count:
+            yield EMPTY_COUNTS
+        else:
+            yield AttendanceCounts(*(int(column[index]) for column in columns))
+
+
+def count_pair(store: AttendanceStore, student_id: str, subject_index: int,
+               first_day: int, last_day: int) -> AttendanceCounts:
+    """Số liệu của một sinh viên: chia đôi trên các dòng đã sắp theo ngày, tổng số buổi vắng lấy từ bộ đếm"""
+    student = store.student_ids.get(student_id)
+    rows = store.rows_at(student, subject_index) if student is not None else None
+    if not rows:
+        return EMPTY_COUNTS
+    days, statuses = store.days, store.statuses
+    absences = late = present = 0
+    for position in range(bisect_left(rows, first_day, key=days.__getitem__),
+                          bisect_right(rows, last_day, key=days.__getitem__)):
+        status = statuses[rows[position]]
+        if status in ABSENT_CODES:
+            absences += 1
+        elif status == LATE_CODE:
+            late += 1
+        elif status == PRESENT_CODE:
+            present += 1
+    tally = store.tally_of(student, subject_index)
+    return AttendanceCounts(absences, late, present, sum(tally[code] for code in ABSENT_CODES))
+
+
+def count_columns(snapshot: ColumnSnapshot, subject_index: int, first_day: int, last_day: int):
+    """Bốn cột số liệu (theo thứ tự của AttendanceCounts) đánh chỉ số theo sinh viên đã quy đổi"""
+    if np is not None:
+        return _count_numpy(snapshot, subject_index, first_day, last_day)
+    return _count_python(snapshot, subject_index, first_day, last_day)
+
+
+def _as_numpy(column):
+    return np.frombuffer(column, dtype=f'u{column.itemsize}')
+
+
+def _count_numpy(store: ColumnSnapshot, subject_index: int, first_day: int, last_day: int):
+    size = store.student_count
+    mask = _as_numpy(store.subject_idx) == subject_index
+    students = _as_numpy(store.student_idx)[mask]
+    days = _as_numpy(store.days)[mask]
+    statuses = _as_numpy(store.statuses)[mask]
+
+    in_range = (days >= first_day) & (days <= last_day)
+    absent = np.isin(statuses, ABSENT_CODES)
+    return (
+        np.bincount(students[in_range & absent], minlength=size),
+        np.bincount(students[in_range & (statuses == LATE_CODE)], minlength=size),
+        np.bincount(students[in_range & (statuses == PRESENT_CODE)], minlength=size),
+        np.bincount(students[absent], minlength=size),
+    )
+
+
+def _count_python(store: ColumnSnapshot, subject_index: int, first_day: int, last_day: int):
+    size = store.student_count
+    absences = [0] * size
+    late = [0] * size
+    present = [0] * size
+    total_absences = [0] * size
+    for student, subject, day, status in zip(store.student_idx, store.subject_idx,
+                                             store.days, store.statuses):
+        if subject != subject_index:
+            continue
+        is_absent = status in ABSENT_CODES
+        if is_absent:
+            total_absences[student] += 1
+        if first_day <= day <= last_day:
+            if is_absent:
+                absences[student] += 1
+            elif status == LATE_CODE:
+                late[student] += 1
+            elif status == PRESENT_CODE:
+                present[student] += 1
+    return absences, late, present, total_absences
@@ -0,0 +1,166 @@
+"""
+Các định dạng xuất báo cáo điểm danh.
+
+Mỗi định dạng là một ReportExporter đăng ký theo tên trong EXPORTERS (thêm
+định dạng mới bằng ``register_exporter``): CSV giữ đúng bố cục cũ, JSON Lines
+mỗi dòng một sinh viên, và bản nén gzip/bz2/xz của hai định dạng trên. File
+được ghi qua bộ đệm REPORT_BUFFER_SIZE nên mỗi báo cáo chỉ tốn vài lần gọi
+ghi xuống đĩa. ReportArchive gom nhiều báo cáo (mỗi báo cáo một "sheet") vào
+một file zip, nhận được báo cáo từ nhiều luồng cùng lúc.
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional, TextIO, Tuple
+import bz2
+import gzip
+import io
+import json
+import lzma
+import threading
+import zipfile
+
+from services.report_writer import StudentReport, stream_report_csv
+from utils.constants import REPORT_BUFFER_SIZE
+
+# Tên định dạng gom mọi báo cáo của một lần xuất vào một file zip
+ARCHIVE_FORMAT = 'zip'
+
+
+class ReportExporter(ABC):
+    """Ghi một báo cáo (môn học, khoảng thời gian, các dòng sinh viên) ra một định dạng file"""
+
+    extension = ''
+
+    @abstractmethod
+    def write(self, file: TextIO, subject: str, period: str, students: Iterable[StudentReport]) -> int:
+        """Ghi báo cáo ra ``file`` đã mở, trả về số sinh viên đã ghi"""
+
+    def open(self, file_path: str) -> TextIO:
+        return open(file_path, 'w', encoding='utf-8', newline='', buffering=REPORT_BUFFER_SIZE)
+
+    def export(self, file_path: str, subject: str, period: str, students: Iterable[StudentReport]) -> int:
+        """Ghi báo cáo ra file, trả về số sinh viên đã ghi"""
+        with self.open(file_path) as file:
+            return self.write(file, subject, period, students)
+
+    def render(self, subject: str, period: str, students: Iterable[StudentReport]) -> Tuple[bytes, int]:
+        """Nội dung file (UTF-8) của báo cáo và số sinh viên, dùng cho ReportArchive"""
+        buffer = io.StringIO(newline='')
+        count = self.write(buffer, subject, period, students)
+        return buffer.getvalue().encode('utf-8'), count
+
+
+class CsvExporter(ReportExporter):
+    """CSV với phần đầu (môn học, thời gian) và các cột REPORT_COLUMNS như save_report trước đây"""
+
+    extension = '.csv'
+
+    def write(self, file: TextIO, subject: str, period: str, students: Iterable[StudentReport]) -> int:
+        return stream_report_csv(subject, period, students, file)
+
+
+class JsonLinesExporter(ReportExporter):
+    """Mỗi dòng một đối tượng JSON gồm môn học, thời gian và các trường của StudentReport"""
+
+    extension = '.jsonl'
+
+    def write(self, file: TextIO, subject: str, period: str, students: Iterable[StudentReport]) -> int:
+        encode = json.JSONEncoder(ensure_ascii=False).encode
+        count = 0
+        for student in students:
+            file.write(encode({'subject': subject, 'period': period, **student}))
+            file.write('\n')
+            count += 1
+        return count
+
+
+class CompressedExporter(ReportExporter):
+    """Nén đầu ra của một định dạng khác bằng gzip, bz2 hoặc xz (lzma) của thư viện chuẩn"""
+
+    CODECS = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz'}
+
+    def __init__(self, inner: ReportExporter, codec: str = 'gzip', level: Optional[int] = None):
+        if codec not in self.CODECS:
+            raise ValueError(f"Kiểu nén không hỗ trợ: {codec}")
+        self.inner = inner
+        self.codec = codec
+        self.level = level
+        self.extension = inner.extension + self.CODECS[codec]
+
+    def write(self, file: TextIO, subject: str, period: str, students: Iterable[StudentReport]) -> int:
+        return self.inner.write(file, subject, period, students)
+
+    def open(self, file_path: str) -> TextIO:
+        if self.codec == 'gzip':
+            stream = gzip.open(file_path, 'wb', compresslevel=6 if self.level is None else self.level)
+        elif self.codec == 'bz2':
+            stream = bz2.open(file_path, 'wb', compresslevel=9 if self.level is None else self.level)
+        else:
+            stream = lzma.open(file_path, 'wb', preset=self.level)
+        # Gom dữ liệu thành khối lớn trước khi nén: ít lần gọi bộ nén và ít lần ghi hơn
+        return io.TextIOWrapper(io.BufferedWriter(stream, REPORT_BUFFER_SIZE), encoding='utf-8', newline='')
+
+
+EXPORTERS: Dict[str, ReportExporter] = {
+    'csv': CsvExporter(),
+    'jsonl': JsonLinesExporter(),
+    'csv.gz': CompressedExporter(CsvExporter(), 'gzip'),
+    'jsonl.gz': CompressedExporter(JsonLinesExporter(), 'gzip'),
+    'csv.bz2': CompressedExporter(CsvExporter(), 'bz2'),
+    'csv.xz': CompressedExporter(CsvExporter(), 'xz'),
+}
+
+
+def register_exporter(name: str, exporter: ReportExporter) -> None:
+    """Thêm (hoặc thay) một định dạng xuất báo cáo"""
+    EXPORTERS[name] = exporter
+
+
+def get_exporter(name: str) -> ReportExporter:
+    exporter = EXPORTERS.get(name)
+    if exporter is None:
+        raise ValueError(f"Định dạng không hỗ trợ: {name} (chọn {', '.join(EXPORTERS)})")
+    return exporter
+
+
+def exporter_for(file_path: str) -> ReportExporter:
+    """Định dạng theo phần mở rộng dài nhất khớp với tên file, mặc định CSV"""
+    matches = [exporter for exporter in EXPORTERS.values() if file_path.endswith(exporter.extension)]
+    return max(matches, key=lambda exporter: len(exporter.extension), default=EXPORTERS['csv'])
+
+
+def period_stamp(period: str) -> str:
+    """'01/09/2024 - 30/06/2025' -> '20240901_20250630', dùng trong tên file"""
+    return '_'.join(''.join(reversed(part.strip().split('/'))) for part in period.split('-'))
+
+
+class ReportArchive:
+    """File zip gồm nhiều báo cáo, mỗi báo cáo một file con; ``add`` gọi được từ nhiều luồng"""
+
+    def __init__(self, file_path: str, exporter: Optional[ReportExporter] = None, compresslevel: int = 6):
+        self.file_path = file_path
+        self.exporter = exporter or EXPORTERS['csv']
+        self._zip = zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+        self._lock = threading.Lock()
+        self.members = 0
+
+    def add(self, name: str, subject: str, period: str, students: Iterable[StudentReport]) -> int:
+        """Thêm một báo cáo tên ``name`` (chưa có phần mở rộng), trả về số sinh viên"""
+        data, count = self.exporter.render(subject, period, students)
+        self.add_rendered(name + self.exporter.extension, data)
+        return count
+
+    def add_rendered(self, member: str, data: bytes) -> None:
+        """Thêm nội dung đã dựng sẵn (ví dụ từ tiến trình con)"""
+        with self._lock:
+            self._zip.writestr(member, data)
+            self.members += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._zip.close()
+
+    def __enter__(self) -> 'ReportArchive':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
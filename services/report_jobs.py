@@ -0,0 +1,301 @@
+"""
+Xuất hàng loạt báo cáo điểm danh cho nhiều môn học × lớp trong một lần chạy.
+
+Các tiến trình con tự mở ảnh chụp nhị phân (services.binary_snapshot) bằng
+mmap và đọc các cột điểm danh qua memoryview, nên các cột không bị chép sang
+từng tiến trình mà dùng chung các trang của file trong bộ nhớ đệm của hệ điều
+hành. Không truyền ``snapshot_path`` thì một ảnh chụp tạm được ghi từ kho cho
+lần chạy. Mỗi tiến trình tính số liệu của một môn một lần rồi ghi các file của
+nhiều lớp song song với các tiến trình khác. Trong mỗi phần
+việc, các file (mỗi lớp × định dạng một file) được ghi bởi ``threads`` luồng
+để phần nén và ghi đĩa chạy chồng lên nhau. Định dạng xem
+services.report_exporters; ``zip`` gom mọi báo cáo CSV của lần xuất vào một file.
+
+Chạy từ thư mục gốc dự án:
+    python -m services.report_jobs --start 01/09/2024 --end 30/06/2025 --workers 8
+    python -m services.report_jobs --start 01/09/2024 --end 30/06/2025 --formats csv.gz zip --threads 4
+    python -m services.report_jobs --start 01/09/2024 --end 30/06/2025 --snapshot data/diem_danh.snap
+"""
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar, Union
+import math
+import os
+import tempfile
+import time
+
+from services.attendance_store import ColumnSnapshot
+from services.report_engine import AttendanceCounts, EMPTY_COUNTS, count_columns, day_range
+from services.report_exporters import ARCHIVE_FORMAT, EXPORTERS, ReportArchive, ReportExporter, get_exporter
+from services.report_writer import format_period, student_reports
+from utils.constants import REPORT_EXPORT_THREADS
+
+# (MSSV, họ tên, chỉ số sinh viên trong kho hoặc -1)
+Roster = List[Tuple[str, str, int]]
+# (môn học, chỉ số môn trong kho hoặc -1, các lớp)
+ReportTask = Tuple[str, int, List[str]]
+# (tên file con trong archive, nội dung)
+ArchiveMember = Tuple[str, bytes]
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class ReportJobResult:
+    """Kết quả xuất báo cáo hàng loạt"""
+
+    def __init__(self, tasks: int):
+        self.tasks = tasks
+        self.done = 0
+        self.files: List[str] = []
+        self.rows = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def __str__(self) -> str:
+        return (f"Đã xuất {len(self.files)} báo cáo ({self.rows} dòng), "
+                f"{self.done}/{self.tasks} phần việc trong {self.elapsed:.2f}s")
+
+
+def report_filename(subject: str, class_name: str, start_date: datetime, end_date: datetime,
+                    extension: str = '.csv') -> str:
+    """Tên file báo cáo theo lớp, giống khi xuất từ menu"""
+    return (f"bao_cao_{subject}_{class_name}_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}"
+            f"{extension}")
+
+
+def archive_filename(start_date: datetime, end_date: datetime) -> str:
+    """Tên file zip gom mọi báo cáo của một kỳ"""
+    return f"bao_cao_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.zip"
+
+
+# Trạng thái của tiến trình con, được gán một lần trong _init_worker
+_snapshot: Optional[ColumnSnapshot] = None
+_snapshot_file = None  # SnapshotFile mà các cột của _snapshot trỏ vào
+_rosters: Dict[str, Roster] = {}
+_last_counts: Optional[Tuple[Tuple[int, int, int], tuple]] = None
+
+
+def _init_worker(snapshot: Union[ColumnSnapshot, str, None], rosters: Dict[str, Roster]) -> None:
+    """``snapshot`` là bản chụp trong bộ nhớ hoặc đường dẫn ảnh chụp nhị phân để tiến trình tự mmap"""
+    global _snapshot, _snapshot_file, _rosters, _last_counts
+    _snapshot = None
+    _last_counts = None
+    if _snapshot_file is not None:
+        _snapshot_file.close()
+        _snapshot_file = None
+    if isinstance(snapshot, str):
+        from services.binary_snapshot import SnapshotFile
+
+        _snapshot_file = SnapshotFile(snapshot)
+        snapshot = _snapshot_file.columns()
+    _snapshot = snapshot
+    _rosters = rosters
+
+
+def _subject_counts(subject_index: int, first_day: int, last_day: int) -> tuple:
+    # Các phần việc của cùng một môn thường rơi vào cùng tiến trình nên giữ lại lần tính gần nhất
+    global _last_counts
+    key = (subject_index, first_day, last_day)
+    if _last_counts is None or _last_counts[0] != key:
+        _last_counts = key, count_columns(_snapshot, subject_index, first_day, last_day)
+    return _last_counts[1]
+
+
+def _map(function: Callable[[T], R], items: Sequence[T], threads: int) -> List[R]:
+    """``map`` qua ``threads`` luồng (tuần tự khi chỉ có một luồng hoặc một phần tử)"""
+    if threads <= 1 or len(items) <= 1:
+        return [function(item) for item in items]
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(threads, len(items))) as pool:
+        return list(pool.map(function, items))
+
+
+def _run_task(task: ReportTask, start_date: datetime, end_date: datetime, output_dir: str,
+              formats: Sequence[str] = ('csv',), archived: bool = False,
+              threads: int = 0) -> Tuple[List[str], int, List[ArchiveMember]]:
+    """Tính và ghi báo cáo của một môn cho các lớp của phần việc.
+
+    Trả về (các file đã ghi, số dòng mỗi định dạng, các báo cáo dựng sẵn cho archive).
+    """
+    subject, subject_index, class_names = task
+    first_day, last_day = day_range(start_date, end_date)
+    columns = _subject_counts(subject_index, first_day, last_day) if subject_index >= 0 else None
+    student_count = _snapshot.student_count
+
+    def rows(roster: Roster):
+        for student_id, name, index in roster:
+            if columns is None or not 0 <= index < student_count:
+                yield student_id, name, EMPTY_COUNTS
+            else:
+                yield student_id, name, AttendanceCounts(*(int(column[index]) for column in columns))
+
+    period = format_period(start_date, end_date)
+
+    def export(job: Tuple[str, ReportExporter]) -> str:
+        class_name, exporter = job
+        path = os.path.join(output_dir, report_filename(subject, class_name, start_date, end_date,
+                                                        exporter.extension))
+        exporter.export(path, subject, period, student_reports(rows(_rosters.get(class_name, ()))))
+        return path
+
+    def render(class_name: str) -> ArchiveMember:
+        exporter = EXPORTERS['csv']
+        data, _ = exporter.render(subject, period, student_reports(rows(_rosters.get(class_name, ()))))
+        return report_filename(subject, class_name, start_date, end_date, exporter.extension), data
+
+    exporters = [get_exporter(name) for name in formats]
+    files = _map(export, [(class_name, exporter) for class_name in class_names for exporter in exporters], threads)
+    members = _map(render, class_names, threads) if archived else []
+    return files, sum(len(_rosters.get(class_name, ())) for class_name in class_names), members
+
+
+def plan_tasks(subjects: Sequence[Tuple[str, int]], class_names: Sequence[str], workers: int) -> List[ReportTask]:
+    """Chia môn học × lớp thành các phần việc, mỗi phần việc chỉ gồm một môn.
+
+    Mỗi phần việc phải quét lại các cột của môn đó, nên một môn chỉ bị chia
+    nhỏ khi số môn không đủ để mỗi tiến trình có khoảng hai phần việc.
+    """
+    if not class_names or not subjects:
+        return []
+    splits = max(1, math.ceil(2 * workers / len(subjects)))
+    per_task = max(1, math.ceil(len(class_names) / splits))
+    return [(subject, subject_index, list(class_names[i:i + per_task]))
+            for subject, subject_index in subjects
+            for i in range(0, len(class_names), per_task)]
+
+
+def run_report_job(system, start_date: datetime, end_date: datetime,
+                   subjects: Optional[Sequence[str]] = None, class_names: Optional[Sequence[str]] = None,
+                   workers: int = 0, output_dir: Optional[str] = None,
+                   progress: Optional[Callable[[ReportJobResult], None]] = None,
+                   formats: Iterable[str] = ('csv',), threads: int = REPORT_EXPORT_THREADS,
+                   snapshot_path: Optional[str] = None) -> ReportJobResult:
+    """Xuất báo cáo của mọi cặp môn học × lớp (mặc định: tất cả môn và lớp).
+
+    Mỗi báo cáo được ghi theo từng định dạng trong ``formats`` (tên trong
+    EXPORTERS, hoặc ``zip`` để gom tất cả vào một file). Với ``workers > 1``
+    các phần việc chạy trong tiến trình con, đọc điểm danh từ ảnh chụp
+    ``snapshot_path`` (phải cùng dữ liệu với hệ thống, ví dụ file vừa
+    load_snapshot) hoặc từ ảnh chụp tạm ghi từ kho; ``progress`` được gọi sau
+    mỗi phần việc hoàn thành.
+    """
+    if not system.resident:
+        raise ValueError("Xuất hàng loạt cần dữ liệu nằm trong bộ nhớ (load_repository(resident=True))")
+    formats = list(formats)
+    archived = ARCHIVE_FORMAT in formats
+    file_formats = [name for name in formats if name != ARCHIVE_FORMAT]
+    for name in file_formats:
+        get_exporter(name)
+    output_dir = output_dir or system.reports_dir
+    os.makedirs(output_dir, exist_ok=True)
+    subjects = list(subjects) if subjects is not None else list(system.subjects)
+    if class_names is None:
+        class_names = sorted(system.field_index.values('class_name'))
+
+    temp_path = None
+    if workers > 1:
+        if snapshot_path is None:
+            fd, temp_path = tempfile.mkstemp(prefix='.report_job_', suffix='.snap', dir=output_dir)
+            os.close(fd)
+            system.save_snapshot(temp_path)
+            snapshot_path = temp_path
+        from services.binary_snapshot import SnapshotFile
+
+        # Chỉ số sinh viên/môn học theo ảnh chụp mà tiến trình con sẽ mở
+        with SnapshotFile(snapshot_path) as snapshot_file:
+            student_ids = {code: index for index, code in enumerate(snapshot_file.student_codes())}
+            subject_ids = {code: index for index, code in enumerate(snapshot_file.subject_codes())}
+        source: Union[ColumnSnapshot, str] = snapshot_path
+    else:
+        store = system.attendance_store
+        source = store.snapshot()
+        student_ids, subject_ids = store.student_ids, store.subject_ids
+    rosters = {class_name: [(student.student_id, student.name, student_ids.get(student.student_id, -1))
+                            for student in system.find_students(class_name=class_name)]
+               for class_name in class_names}
+    tasks = plan_tasks([(subject, subject_ids.get(subject, -1)) for subject in subjects],
+                       list(class_names), max(1, workers))
+
+    result = ReportJobResult(len(tasks))
+    archive = ReportArchive(os.path.join(output_dir, archive_filename(start_date, end_date))) if archived else None
+
+    def collect(files: List[str], rows: int, members: List[ArchiveMember]) -> None:
+        for member, data in members:
+            archive.add_rendered(member, data)
+        result.done += 1
+        result.files.extend(files)
+        result.rows += rows
+        result.elapsed = time.perf_counter() - result.started
+        if progress:
+            progress(result)
+
+    try:
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(source, rosters)) as executor:
+                futures = [executor.submit(_run_task, task, start_date, end_date, output_dir, file_formats,
+                                           archived, threads) for task in tasks]
+                for future in as_completed(futures):
+                    collect(*future.result())
+        else:
+            _init_worker(source, rosters)
+            try:
+                for task in tasks:
+                    collect(*_run_task(task, start_date, end_date, output_dir, file_formats, archived, threads))
+            finally:
+                _init_worker(None, {})
+    finally:
+        if archive:
+            archive.close()
+            result.files.append(archive.file_path)
+        if temp_path:
+            os.remove(temp_path)
+
+    result.elapsed = time.perf_counter() - result.started
+    return result
+
+
+def main() -> None:
+    import argparse
+
+    from services.attendance_system import AttendanceSystem
+    from services.repository import CsvRepository
+    from utils.constants import DATA_DIR
+
+    parser = argparse.ArgumentParser(description='Xuất báo cáo điểm danh cho nhiều môn học × lớp')
+    parser.add_argument('--start', required=True, help='ngày bắt đầu dd/mm/yyyy')
+    parser.add_argument('--end', required=True, help='ngày kết thúc dd/mm/yyyy')
+    parser.add_argument('--subjects', nargs='*', help='mã môn học (mặc định: tất cả)')
+    parser.add_argument('--classes', nargs='*', help='tên lớp (mặc định: tất cả)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--formats', nargs='+', default=['csv'], choices=[*EXPORTERS, ARCHIVE_FORMAT],
+                        help='định dạng file (zip = gom mọi báo cáo CSV vào một file)')
+    parser.add_argument('--threads', type=int, default=REPORT_EXPORT_THREADS, help='số luồng ghi file mỗi tiến trình')
+    parser.add_argument('--snapshot', help='nạp dữ liệu từ ảnh chụp nhị phân và để các tiến trình con mmap chung file này')
+    args = parser.parse_args()
+
+    start_date = datetime.strptime(args.start, '%d/%m/%Y')
+    end_date = datetime.strptime(args.end, '%d/%m/%Y')
+    if args.snapshot:
+        system = AttendanceSystem()
+        system.load_snapshot(args.snapshot)
+    else:
+        system = AttendanceSystem(CsvRepository(students_path=os.path.join(DATA_DIR, 'sinh_vien.csv'),
+                                                subjects_path=os.path.join(DATA_DIR, 'mon_hoc.csv')))
+        system.load_repository()
+
+    def show(result: ReportJobResult) -> None:
+        print(f"\r{result.done}/{result.tasks} phần việc, {len(result.files)} file, {result.elapsed:.1f}s",
+              end='', flush=True)
+
+    result = run_report_job(system, start_date, end_date, args.subjects, args.classes, args.workers,
+                            progress=show, formats=args.formats, threads=args.threads, snapshot_path=args.snapshot)
+    print(f"\n{result}")
+    system.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+from datetime import datetime
+from typing import Iterable, Iterator, List, TextIO, Tuple, TypedDict
+import csv
+
+from services.report_engine import AttendanceCounts
+from utils.constants import MAX_ABSENCES
+
+REPORT_COLUMNS = ['MSSV', 'Họ tên', 'Vắng', 'Đi trễ', 'Có mặt', 'Đủ điều kiện thi']
+
+
+class StudentReport(TypedDict):
+    student_id: str
+    name: str
+    absences: int
+    late_arrivals: int
+    present: int
+    eligible_for_exam: bool
+
+
+class AttendanceReport(TypedDict):
+    subject: str
+    period: str
+    students: List[StudentReport]
+
+
+def format_period(start_date: datetime, end_date: datetime) -> str:
+    """Chuỗi khoảng thời gian hiển thị trong báo cáo"""
+    return f"{start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}"
+
+
+def student_reports(rows: Iterable[Tuple[str, str, AttendanceCounts]]) -> Iterator[StudentReport]:
+    """Đổi số liệu (MSSV, họ tên, số buổi) thành từng dòng báo cáo ngay khi nhận được"""
+    for student_id, name, student_counts in rows:
+        student_report: StudentReport = {
+            'student_id': student_id,
+            'name': name,
+            'absences': student_counts.absences,
+            'late_arrivals': student_counts.late_arrivals,
+            'present': student_counts.present,
+            'eligible_for_exam': student_counts.total_absences <= MAX_ABSENCES
+        }
+        yield student_report
+
+
+def build_report(subject: str, rows: Iterable[Tuple[str, str, AttendanceCounts]],
+                 start_date: datetime, end_date: datetime) -> AttendanceReport:
+    """Dựng báo cáo từ số liệu (MSSV, họ tên, số buổi) của từng sinh viên"""
+    return {
+        'subject': subject,
+        'period': format_period(start_date, end_date),
+        'students': list(student_reports(rows))
+    }
+
+
+def stream_report_csv(subject: str, period: str, students: Iterable[StudentReport], file: TextIO) -> int:
+    """Ghi báo cáo ra CSV theo từng dòng khi các dòng được sinh ra, trả về số sinh viên đã ghi"""
+    writer = csv.writer(file)
+    writer.writerow(['Môn học:', subject])
+    writer.writerow(['Thời gian:', period])
+    writer.writerow([])
+    writer.writerow(REPORT_COLUMNS)
+    count = 0
+    for student in students:
+        writer.writerow([
+            student['student_id'],
+            student['name'],
+            student['absences'],
+            student['late_arrivals'],
+            student['present'],
+            'Có' if student['eligible_for_exam'] else 'Không'
+        ])
+        count += 1
+    return count
+
+
+def write_report_csv(report: AttendanceReport, file: TextIO) -> int:
+    """Ghi báo cáo đã dựng sẵn ra file CSV đã mở"""
+    return stream_report_csv(report['subject'], report['period'], report['students'], file)
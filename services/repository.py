@@ -0,0 +1,171 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+import csv
+import os
+
+from models.student import Student
+from models.subject import Subject
+from services.attendance_log import AttendanceLog, AttendanceRecord
+from services.attendance_store import AttendanceRun, record_runs
+from services.csv_importer import ImportResult, import_students
+from services.report_engine import AttendanceCounts
+from services.roster_writer import RosterWriter
+from services.student_offsets import StudentOffsetIndex
+from utils.constants import CSV_PATHS, ATTENDANCE_LOG_PATHS
+
+
+class AttendanceRepository(ABC):
+    """Giao diện lưu trữ phía sau AttendanceSystem.
+
+    Các phương thức ``load_*`` dùng khi nạp toàn bộ dữ liệu vào bộ nhớ; các
+    phương thức ghi được gọi sau mỗi thay đổi. Kho hỗ trợ truy vấn
+    (``supports_queries``) còn cho phép đọc từng sinh viên và tính báo cáo
+    ngay trong kho mà không cần giữ toàn bộ dữ liệu trong bộ nhớ.
+    """
+
+    supports_queries = False
+    # Đọc được từng sinh viên theo MSSV (get_student) mà không cần nạp cả danh sách
+    supports_lookup = False
+
+    @abstractmethod
+    def load_subjects(self) -> List[Subject]:
+        """Danh sách môn học"""
+
+    @abstractmethod
+    def load_students(self, add_student: Callable[[Student], bool]) -> Optional[ImportResult]:
+        """Nạp toàn bộ sinh viên, gọi ``add_student`` cho từng sinh viên"""
+
+    @abstractmethod
+    def load_attendance(self) -> Iterator[AttendanceRecord]:
+        """Toàn bộ bản ghi điểm danh"""
+
+    def load_attendance_runs(self) -> Iterator[AttendanceRun]:
+        """Toàn bộ điểm danh theo từng đoạn của một cặp (dùng với AttendanceStore.load_runs)"""
+        return record_runs(self.load_attendance())
+
+    @abstractmethod
+    def add_student(self, student: Student) -> None:
+        """Lưu sinh viên mới"""
+
+    @abstractmethod
+    def update_student(self, student: Student) -> None:
+        """Lưu thông tin sinh viên vừa sửa"""
+
+    @abstractmethod
+    def record_attendance(self, records: Sequence[AttendanceRecord], op: str = 'A') -> None:
+        """Lưu các bản ghi điểm danh ('A' = thêm, 'E' = sửa)"""
+
+    def attach(self, students: Callable[[], Iterable[Student]]) -> None:
+        """Gọi sau khi nạp xong; ``students`` trả về danh sách sinh viên hiện tại"""
+
+    def needs_compaction(self) -> bool:
+        return False
+
+    def compact(self, records: Iterable[AttendanceRecord]) -> None:
+        """Nén dữ liệu điểm danh từ trạng thái hiện tại (nếu kho cần)"""
+
+    def flush(self) -> None:
+        """Đẩy các thay đổi đang chờ xuống đĩa"""
+
+    def close(self) -> None:
+        self.flush()
+
+    def get_student(self, student_id: str) -> Optional[Student]:
+        """Đọc một sinh viên theo MSSV (kho hỗ trợ tra cứu hoặc truy vấn)"""
+        raise NotImplementedError
+
+    # Các truy vấn dưới đây chỉ có ở kho hỗ trợ truy vấn
+
+    def load_student_attendance(self, student_id: str) -> Iterator[AttendanceRecord]:
+        raise NotImplementedError
+
+    def find_student_ids(self, **filters: Optional[str]) -> List[str]:
+        raise NotImplementedError
+
+    def count_attendance(self, subject: str, first_day: int, last_day: int,
+                         **filters: Optional[str]) -> List[Tuple[str, str, AttendanceCounts]]:
+        """(MSSV, họ tên, số liệu) của các sinh viên thỏa bộ lọc, theo thứ tự thêm vào"""
+        raise NotImplementedError
+
+    def iter_count_attendance(self, subject: str, first_day: int, last_day: int,
+                              **filters: Optional[str]) -> Iterator[Tuple[str, str, AttendanceCounts]]:
+        """Như count_attendance nhưng trả về từng dòng khi đọc được"""
+        return iter(self.count_attendance(subject, first_day, last_day, **filters))
+
+    def count_absences(self, student_id: str, subject: str) -> int:
+        raise NotImplementedError
+
+
+class CsvRepository(AttendanceRepository):
+    """Lưu trữ bằng file CSV như trước: sinh_vien.csv, mon_hoc.csv và nhật ký điểm danh"""
+
+    supports_lookup = True
+
+    def __init__(self, students_path: str = CSV_PATHS["students"],
+                 subjects_path: str = CSV_PATHS["subjects"],
+                 log_path: str = ATTENDANCE_LOG_PATHS["log"],
+                 snapshot_path: str = ATTENDANCE_LOG_PATHS["snapshot"]):
+        self.students_path = students_path
+        self.subjects_path = subjects_path
+        self.attendance_log = AttendanceLog(log_path, snapshot_path)
+        self.roster: Optional[RosterWriter] = None
+        self.offsets = StudentOffsetIndex(students_path)
+
+    def load_subjects(self) -> List[Subject]:
+        subjects = []
+        with open(self.subjects_path, 'r', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                subjects.append(Subject(code=row['ma_mh'], name=row['ten_mh'],
+                                        credits=int(row['so_tin_chi'])))
+        return subjects
+
+    def load_students(self, add_student: Callable[[Student], bool]) -> Optional[ImportResult]:
+        result = None
+        if os.path.exists(self.students_path):
+            result = import_students(self.students_path, add_student)
+        return result
+
+    def get_student(self, student_id: str) -> Optional[Student]:
+        if not os.path.exists(self.students_path):
+            return None
+        return self.offsets.read_student(student_id)
+
+    def attach(self, students: Callable[[], Iterable[Student]]) -> None:
+        # Sinh viên thêm/sửa sau thời điểm này được ghi nối vào file theo lô
+        self.roster = RosterWriter(self.students_path, students)
+
+    def load_attendance(self) -> Iterator[AttendanceRecord]:
+        return self.attendance_log.replay()
+
+    def load_attendance_runs(self) -> Iterator[AttendanceRun]:
+        return self.attendance_log.replay_runs()
+
+    def add_student(self, student: Student) -> None:
+        if self.roster:
+            self.roster.mark_added(student)
+
+    def update_student(self, student: Student) -> None:
+        if self.roster:
+            self.roster.mark_changed()
+
+    def record_attendance(self, records: Sequence[AttendanceRecord], op: str = 'A') -> None:
+        if len(records) == 1:
+            self.attendance_log.append(op, *records[0])
+        else:
+            self.attendance_log.append_many(records, op)
+
+    def needs_compaction(self) -> bool:
+        return self.attendance_log.needs_compaction()
+
+    def compact(self, records: Iterable[AttendanceRecord]) -> None:
+        self.attendance_log.compact(records)
+
+    def flush(self) -> None:
+        if self.roster and self.roster.dirty:
+            self.roster.flush()
+        self.attendance_log.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.attendance_log.close()
+        self.offsets.close()
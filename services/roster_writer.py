@@ -0,0 +1,118 @@
+from typing import Callable, Iterable, List
+import csv
+import os
+import stat
+import tempfile
+import time
+
+from models.student import Student
+from services.csv_importer import STUDENT_COLUMNS
+from utils.constants import ROSTER_FLUSH_EVERY, ROSTER_FLUSH_INTERVAL
+
+
+def student_row(student: Student) -> List[str]:
+    """Một dòng CSV của sinh viên theo thứ tự STUDENT_COLUMNS"""
+    return [
+        student.student_id,
+        student.name,
+        student.class_name,
+        student.school,
+        student.department,
+        student.enrollment_term
+    ]
+
+
+def match_file_mode(temp_path: str, file_path: str) -> None:
+    """Đặt quyền của file tạm (mkstemp tạo với 0600) giống file sắp bị thay, hoặc 0666 trừ umask nếu chưa có file"""
+    try:
+        mode = stat.S_IMODE(os.stat(file_path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    os.chmod(temp_path, mode)
+
+
+def write_students_atomic(file_path: str, students: Iterable[Student]) -> None:
+    """Ghi lại toàn bộ danh sách vào file tạm rồi đổi tên, không bao giờ để file dở dang"""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(prefix='.sinh_vien_', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='', buffering=1 << 20) as file:
+            writer = csv.writer(file)
+            writer.writerow(STUDENT_COLUMNS)
+            writer.writerows(student_row(student) for student in students)
+            file.flush()
+            os.fsync(file.fileno())
+        match_file_mode(temp_path, file_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class RosterWriter:
+    """Ghi danh sách sinh viên xuống CSV theo kiểu tăng dần.
+
+    Sinh viên mới được gom lại và ghi nối vào cuối file theo lô (mỗi
+    ``flush_every`` sinh viên hoặc sau ``flush_interval`` giây); chỉ khi thông
+    tin sinh viên cũ bị sửa mới cần ghi lại toàn bộ file, và việc đó luôn đi
+    qua file tạm + đổi tên.
+    """
+
+    def __init__(self, file_path: str, students: Callable[[], Iterable[Student]],
+                 flush_every: int = ROSTER_FLUSH_EVERY, flush_interval: float = ROSTER_FLUSH_INTERVAL):
+        self.file_path = file_path
+        self._students = students
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._added: List[Student] = []
+        self._rewrite = False
+        self._last_flush = time.monotonic()
+        self.writes = 0  # số lần ghi file, dùng để theo dõi
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._added) or self._rewrite
+
+    def mark_added(self, student: Student) -> None:
+        """Ghi nhận sinh viên mới cần lưu"""
+        self._added.append(student)
+        self._maybe_flush()
+
+    def mark_changed(self) -> None:
+        """Ghi nhận thông tin sinh viên cũ đã thay đổi, lần ghi tới sẽ ghi lại cả file"""
+        self._rewrite = True
+        self._maybe_flush()
+
+    def flush(self) -> None:
+        """Ghi các thay đổi đang chờ xuống đĩa"""
+        if self._rewrite or not os.path.exists(self.file_path):
+            write_students_atomic(self.file_path, self._students())
+            self.writes += 1
+        elif self._added:
+            with open(self.file_path, 'a', encoding='utf-8', newline='') as file:
+                if not _ends_with_newline(self.file_path):
+                    file.write('\r\n')
+                csv.writer(file).writerows(student_row(student) for student in self._added)
+                file.flush()
+                os.fsync(file.fileno())
+            self.writes += 1
+        self._added = []
+        self._rewrite = False
+        self._last_flush = time.monotonic()
+
+    def _maybe_flush(self) -> None:
+        if (len(self._added) >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+
+def _ends_with_newline(file_path: str) -> bool:
+    with open(file_path, 'rb') as file:
+        file.seek(0, os.SEEK_END)
+        if file.tell() == 0:
+            return True
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b'\n'
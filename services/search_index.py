@@ -0,0 +1,206 @@
+from bisect import bisect_left
+from itertools import islice
+import heapq
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import threading
+import unicodedata
+
+from models.student import Student
+
+NGRAM_SIZE = 3
+
+
+# Tên tiếng Việt lặp lại rất nhiều từ nên kết quả bỏ dấu được lưu theo từng từ
+_folded_words: Dict[str, str] = {}
+
+
+def _fold_word(word: str) -> str:
+    folded = _folded_words.get(word)
+    if folded is None:
+        decomposed = unicodedata.normalize('NFD', word.replace('đ', 'd'))
+        folded = ''.join(char for char in decomposed if not unicodedata.combining(char))
+        if len(_folded_words) < 100_000:
+            _folded_words[word] = folded
+    return folded
+
+
+def fold(text: str) -> str:
+    """Chuẩn hóa chuỗi để tìm kiếm: chữ thường, bỏ dấu tiếng Việt ("Đức" -> "duc")"""
+    text = text.lower()
+    if text.isascii():
+        return text
+    return ' '.join(_fold_word(word) for word in text.split(' '))
+
+
+def ngrams(text: str) -> Set[str]:
+    """Các n-gram của chuỗi đã chuẩn hóa, có đệm khoảng trắng ở hai đầu"""
+    padded = f" {text} "
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+class StudentSearchIndex:
+    """Chỉ mục tìm kiếm sinh viên theo MSSV và họ tên.
+
+    MSSV được giữ trong danh sách đã sắp xếp (sắp lại khi cần) để tra tiền tố
+    bằng tìm kiếm nhị phân; MSSV và họ tên (đã bỏ dấu) được tách thành n-gram
+    để tìm chuỗi con mà không phải duyệt toàn bộ danh sách sinh viên. N-gram
+    của sinh viên mới chỉ được đưa vào chỉ mục ở lần tìm kiếm kế tiếp, nên nạp
+    hàng loạt không
+    phải chờ dựng chỉ mục cho từng dòng. Vì tìm kiếm cũng sửa chỉ mục nên mọi
+    thao tác đều giữ khóa của chỉ mục.
+    """
+
+    def __init__(self):
+        self._keys: Dict[str, Tuple[str, str]] = {}  # MSSV -> (mssv chuẩn hóa, tên chuẩn hóa)
+        self._sorted_ids: List[Tuple[str, str]] = []  # (mssv chuẩn hóa, MSSV) đã sắp xếp
+        self._sorted_dirty = False
+        self._postings: Dict[str, Set[str]] = {}
+        self._unindexed: List[str] = []  # MSSV chưa được tách n-gram
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, student: Student) -> None:
+        """Thêm (hoặc cập nhật) sinh viên vào chỉ mục"""
+        folded_id = fold(student.student_id)
+        folded_name = fold(student.name)
+        with self._lock:
+            if student.student_id in self._keys:
+                self.remove(student.student_id)
+            self._keys[student.student_id] = (folded_id, folded_name)
+            self._sorted_dirty = True
+            self._unindexed.append(student.student_id)
+
+    def remove(self, student_id: str) -> None:
+        """Xóa sinh viên khỏi chỉ mục"""
+        with self._lock:
+            keys = self._keys.pop(student_id, None)
+            if keys is None:
+                return
+            folded_id, folded_name = keys
+            self._sorted_dirty = True
+            for gram in ngrams(folded_id) | ngrams(folded_name):
+                postings = self._postings.get(gram)
+                if postings is not None:
+                    postings.discard(student_id)
+                    if not postings:
+                        del self._postings[gram]
+
+    def prefix_ids(self, prefix: str) -> Iterable[str]:
+        """Các MSSV bắt đầu bằng ``prefix`` theo thứ tự tăng dần (MSSV trùng khớp đứng đầu)"""
+        with self._lock:
+            if self._sorted_dirty:
+                self._sorted_ids = sorted((folded_id, student_id)
+                                          for student_id, (folded_id, _) in self._keys.items())
+                self._sorted_dirty = False
+            # Danh sách chỉ được thay mới chứ không sửa tại chỗ nên duyệt ngoài khóa được
+            sorted_ids = self._sorted_ids
+        folded = fold(prefix)
+        position = bisect_left(sorted_ids, (folded, ''))
+        while position < len(sorted_ids):
+            folded_id, student_id = sorted_ids[position]
+            if not folded_id.startswith(folded):
+                break
+            yield student_id
+            position += 1
+
+    def search(self, keyword: str, limit: Optional[int] = None) -> List[str]:
+        """Tìm MSSV khớp từ khóa, xếp hạng theo mức độ khớp.
+
+        Thứ tự ưu tiên: trùng MSSV, tiền tố MSSV (theo thứ tự MSSV), tiền tố
+        một từ trong họ tên, chuỗi con của họ tên, chuỗi con của MSSV.
+
+        Từ khóa có chữ số (MSSV) được tra trên danh sách MSSV đã sắp xếp, chỉ
+        khi không có MSSV nào bắt đầu bằng từ khóa mới tìm chuỗi con qua n-gram.
+        """
+        query = fold(keyword.strip())
+        if query and ' ' not in query and any(char.isdigit() for char in query):
+            ids = list(islice(self.prefix_ids(query), limit))
+            if ids:
+                return ids
+        with self._lock:
+            self._index_pending()
+            if 0 < len(query) < NGRAM_SIZE:
+                return self._search_short(query, limit)
+            return self._search(query, limit)
+
+    def _search_short(self, query: str, limit: Optional[int]) -> List[str]:
+        """Từ khóa 1-2 ký tự, tra qua các n-gram chứa từ khóa thay vì duyệt mọi sinh viên.
+
+        Các n-gram đệm khoảng trắng " xy" là các đầu từ (MSSV hoặc một từ trong
+        tên): nếu chúng đã đủ ``limit`` sinh viên thì các kết quả chuỗi con
+        (xếp sau) không thể lọt vào danh sách nên không cần xét.
+        """
+        postings = self._postings
+        start = f" {query}"
+        if limit is not None:
+            if len(start) == NGRAM_SIZE:
+                candidates = postings.get(start, set())
+            else:
+                candidates = set()
+                for gram in [gram for gram in postings if gram.startswith(start)]:
+                    candidates |= postings[gram]
+            if len(candidates) >= limit:
+                return self._rank(query, candidates, limit)
+        candidates = set()
+        for gram in [gram for gram in postings if query in gram]:
+            candidates |= postings[gram]
+        return self._rank(query, candidates, limit)
+
+    def _search(self, query: str, limit: Optional[int]) -> List[str]:
+        if not query:
+            ids = list(self._keys)
+            return ids[:limit] if limit is not None else ids
+
+        # Giao các tập ứng viên bắt đầu từ n-gram hiếm nhất
+        grams = sorted(self._query_grams(query), key=lambda gram: len(self._postings.get(gram, ())))
+        candidates = set(self._postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= self._postings.get(gram, set())
+        return self._rank(query, candidates, limit)
+
+    def _rank(self, query: str, candidates: Iterable[str], limit: Optional[int]) -> List[str]:
+        ranked = []
+        keys = self._keys
+        word_start = f" {query}"
+        for student_id in candidates:
+            folded_id, folded_name = keys[student_id]
+            if folded_id == query:
+                rank, folded_name = 0, ''
+            elif folded_id.startswith(query):
+                # Cùng thứ tự MSSV như prefix_ids
+                rank, folded_name = 1, folded_id
+            elif folded_name.startswith(query) or word_start in folded_name:
+                rank = 2
+            elif query in folded_name:
+                rank = 3
+            elif query in folded_id:
+                rank = 4
+            else:
+                continue
+            ranked.append((rank, folded_name, student_id))
+
+        ranked = heapq.nsmallest(limit, ranked) if limit is not None else sorted(ranked)
+        return [student_id for _, _, student_id in ranked]
+
+    def _index_pending(self) -> None:
+        """Tách n-gram cho các sinh viên mới thêm"""
+        postings = self._postings
+        for student_id in self._unindexed:
+            keys = self._keys.get(student_id)
+            if keys is None:
+                continue
+            for gram in ngrams(keys[0]) | ngrams(keys[1]):
+                bucket = postings.get(gram)
+                if bucket is None:
+                    bucket = postings[gram] = set()
+                bucket.add(student_id)
+        self._unindexed = []
+
+    @staticmethod
+    def _query_grams(query: str) -> List[str]:
+        # Không đệm khoảng trắng vì từ khóa có thể nằm giữa chuỗi
+        return [query[i:i + NGRAM_SIZE] for i in range(len(query) - NGRAM_SIZE + 1)]
@@ -0,0 +1,197 @@
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+import sqlite3
+import threading
+
+from models.student import Student
+from models.subject import Subject
+from services.attendance_log import AttendanceRecord
+from services.attendance_store import (ABSENT_CODES, CODE_BY_STATUS, STATUS_BY_CODE, AttendanceRun, date_to_ordinal,
+                                       group_runs, ordinal_to_date)
+from services.report_engine import AttendanceCounts, LATE_CODE, PRESENT_CODE
+from services.repository import AttendanceRepository
+from utils.constants import SQLITE_PATH, SUBJECTS, SUBJECT_CREDITS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subjects (
+    code TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    credits INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS students (
+    student_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    class_name TEXT NOT NULL,
+    school TEXT NOT NULL,
+    department TEXT NOT NULL,
+    enrollment_term TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_students_class ON students (class_name);
+CREATE INDEX IF NOT EXISTS idx_students_department ON students (department);
+CREATE TABLE IF NOT EXISTS attendance (
+    student_id TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    PRIMARY KEY (student_id, subject, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_attendance_subject_day ON attendance (subject, day);
+"""
+
+STUDENT_FIELDS = ('class_name', 'department', 'school', 'enrollment_term')
+ABSENT_SQL = ', '.join(str(code) for code in ABSENT_CODES)
+
+
+class SqliteRepository(AttendanceRepository):
+    """Lưu trữ bằng SQLite (chế độ WAL).
+
+    Khóa chính (student_id, subject, day) của bảng điểm danh phục vụ tra cứu
+    theo sinh viên/môn học, chỉ mục (subject, day) phục vụ báo cáo theo khoảng
+    ngày, chỉ mục class_name phục vụ lọc theo lớp. Báo cáo và điều kiện dự thi
+    được tính bằng truy vấn gộp ngay trong SQLite.
+
+    Ghi dùng chung một kết nối (giữ khóa); truy vấn đọc dùng một kết nối riêng
+    cho từng luồng nên nhờ WAL không phải chờ luồng đang ghi.
+    """
+
+    supports_queries = True
+    supports_lookup = True
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        if not self.connection.execute("SELECT 1 FROM subjects LIMIT 1").fetchone():
+            self.save_subjects(Subject(code, name, SUBJECT_CREDITS.get(code, 0)) for code, name in SUBJECTS.items())
+
+    def _reader(self) -> sqlite3.Connection:
+        """Kết nối đọc của luồng hiện tại (CSDL trong bộ nhớ chỉ có một kết nối)"""
+        if self.path == ':memory:':
+            return self.connection
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._local.connection = connection
+            with self._write_lock:
+                self._readers.append(connection)
+        return connection
+
+    def save_subjects(self, subjects: Iterable[Subject]) -> None:
+        with self._write_lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO subjects (code, name, credits) VALUES (?, ?, ?)",
+                ((subject.code, subject.name, subject.credits) for subject in subjects))
+
+    def load_subjects(self) -> List[Subject]:
+        rows = self.connection.execute("SELECT code, name, credits FROM subjects ORDER BY rowid")
+        return [Subject(code, name, credits) for code, name, credits in rows]
+
+    def load_students(self, add_student: Callable[[Student], bool]) -> None:
+        for row in self.connection.execute(
+                "SELECT student_id, name, class_name, school, department, enrollment_term "
+                "FROM students ORDER BY rowid"):
+            add_student(Student(*row))
+
+    def load_attendance(self) -> Iterator[AttendanceRecord]:
+        for student_id, subject, day, status in self.connection.execute(
+                "SELECT student_id, subject, day, status FROM attendance"):
+            yield subject, ordinal_to_date(day), student_id, STATUS_BY_CODE[status]
+
+    def load_attendance_runs(self) -> Iterator[AttendanceRun]:
+        # Ngày và trạng thái đã được lưu dạng số, không cần đổi qua chuỗi
+        return group_runs(self.connection.execute("SELECT subject, student_id, day, status FROM attendance"))
+
+    def add_student(self, student: Student) -> None:
+        self.add_students([student])
+
+    def add_students(self, students: Iterable[Student]) -> None:
+        with self._write_lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO students VALUES (?, ?, ?, ?, ?, ?)",
+                ((s.student_id, s.name, s.class_name, s.school, s.department, s.enrollment_term)
+                 for s in students))
+
+    def update_student(self, student: Student) -> None:
+        with self._write_lock, self.connection:
+            self.connection.execute(
+                "UPDATE students SET name = ?, class_name = ?, school = ?, department = ?, "
+                "enrollment_term = ? WHERE student_id = ?",
+                (student.name, student.class_name, student.school, student.department,
+                 student.enrollment_term, student.student_id))
+
+    def record_attendance(self, records: Sequence[AttendanceRecord], op: str = 'A') -> None:
+        with self._write_lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO attendance (student_id, subject, day, status) VALUES (?, ?, ?, ?)",
+                ((student_id, subject, date_to_ordinal(date), CODE_BY_STATUS[status])
+                 for subject, date, student_id, status in records))
+
+    def close(self) -> None:
+        with self._write_lock:
+            for connection in self._readers:
+                connection.close()
+            self._readers = []
+            self.connection.close()
+
+    def get_student(self, student_id: str) -> Optional[Student]:
+        row = self._reader().execute(
+            "SELECT student_id, name, class_name, school, department, enrollment_term "
+            "FROM students WHERE student_id = ?", (student_id,)).fetchone()
+        return Student(*row) if row else None
+
+    def load_student_attendance(self, student_id: str) -> Iterator[AttendanceRecord]:
+        for subject, day, status in self._reader().execute(
+                "SELECT subject, day, status FROM attendance WHERE student_id = ? ORDER BY subject, day",
+                (student_id,)):
+            yield subject, ordinal_to_date(day), student_id, STATUS_BY_CODE[status]
+
+    def find_student_ids(self, **filters: Optional[str]) -> List[str]:
+        where, params = _student_filters(filters)
+        return [row[0] for row in self._reader().execute(
+            f"SELECT student_id FROM students s {where} ORDER BY rowid", params)]
+
+    def count_attendance(self, subject: str, first_day: int, last_day: int,
+                         **filters: Optional[str]) -> List[Tuple[str, str, AttendanceCounts]]:
+        return list(self.iter_count_attendance(subject, first_day, last_day, **filters))
+
+    def iter_count_attendance(self, subject: str, first_day: int, last_day: int,
+                              **filters: Optional[str]) -> Iterator[Tuple[str, str, AttendanceCounts]]:
+        where, params = _student_filters(filters)
+        query = f"""
+            SELECT s.student_id, s.name,
+                   COALESCE(SUM(a.status IN ({ABSENT_SQL}) AND a.day BETWEEN :first AND :last), 0),
+                   COALESCE(SUM(a.status = {LATE_CODE} AND a.day BETWEEN :first AND :last), 0),
+                   COALESCE(SUM(a.status = {PRESENT_CODE} AND a.day BETWEEN :first AND :last), 0),
+                   COALESCE(SUM(a.status IN ({ABSENT_SQL})), 0)
+            FROM students s
+            LEFT JOIN attendance a ON a.student_id = s.student_id AND a.subject = :subject
+            {where}
+            GROUP BY s.rowid
+            ORDER BY s.rowid
+        """
+        params.update(subject=subject, first=first_day, last=last_day)
+        for student_id, name, *counts in self._reader().execute(query, params):
+            yield student_id, name, AttendanceCounts(*counts)
+
+    def count_absences(self, student_id: str, subject: str) -> int:
+        row = self._reader().execute(
+            f"SELECT COUNT(*) FROM attendance WHERE student_id = ? AND subject = ? "
+            f"AND status IN ({ABSENT_SQL})", (student_id, subject)).fetchone()
+        return row[0]
+
+
+def _student_filters(filters: dict) -> Tuple[str, dict]:
+    conditions = []
+    params = {}
+    for field, value in filters.items():
+        if value is None:
+            continue
+        if field not in STUDENT_FIELDS:
+            raise ValueError(f"Không thể lọc theo trường {field}")
+        conditions.append(f"s.{field} = :{field}")
+        params[field] = value
+    return ("WHERE " + " AND ".join(conditions) if conditions else ""), params
@@ -0,0 +1,74 @@
+from typing import Dict, List, Optional, Sequence
+
+from models.student import Student
+
+INDEXED_FIELDS = ('class_name', 'department', 'school', 'enrollment_term')
+
+
+class StudentFieldIndex:
+    """Chỉ mục phụ theo lớp, khoa, trường và học kỳ nhập học.
+
+    Mỗi trường ánh xạ giá trị -> tập MSSV (dict dùng làm tập có thứ tự để giữ
+    thứ tự thêm sinh viên), nên lọc theo một hoặc nhiều trường không phải
+    duyệt toàn bộ danh sách sinh viên.
+    """
+
+    def __init__(self, fields: Sequence[str] = INDEXED_FIELDS):
+        self.fields = tuple(fields)
+        self._indexes: Dict[str, Dict[str, Dict[str, None]]] = {field: {} for field in self.fields}
+
+    def add(self, student: Student) -> None:
+        """Thêm sinh viên vào các chỉ mục"""
+        for field in self.fields:
+            self._indexes[field].setdefault(getattr(student, field), {})[student.student_id] = None
+
+    def remove(self, student: Student) -> None:
+        """Xóa sinh viên khỏi các chỉ mục"""
+        for field in self.fields:
+            index = self._indexes[field]
+            value = getattr(student, field)
+            bucket = index.get(value)
+            if bucket is not None:
+                bucket.pop(student.student_id, None)
+                if not bucket:
+                    del index[value]
+
+    def update(self, student: Student, previous: Dict[str, str]) -> None:
+        """Chuyển sinh viên sang nhóm mới cho các trường vừa thay đổi"""
+        for field, old_value in previous.items():
+            index = self._indexes.get(field)
+            if index is None:
+                continue
+            bucket = index.get(old_value)
+            if bucket is not None:
+                bucket.pop(student.student_id, None)
+                if not bucket:
+                    del index[old_value]
+            index.setdefault(getattr(student, field), {})[student.student_id] = None
+
+    def values(self, field: str) -> List[str]:
+        """Các giá trị hiện có của một trường (VD: danh sách lớp)"""
+        return list(self._indexes[field])
+
+    def count(self, field: str, value: str) -> int:
+        """Số sinh viên có ``field`` bằng ``value``"""
+        return len(self._indexes[field].get(value, ()))
+
+    def lookup(self, **filters: Optional[str]) -> Optional[List[str]]:
+        """Các MSSV thỏa mọi điều kiện lọc; trả về None nếu không có điều kiện nào"""
+        buckets = []
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if field not in self._indexes:
+                raise ValueError(f"Không có chỉ mục cho trường {field}")
+            buckets.append(self._indexes[field].get(value, {}))
+        if not buckets:
+            return None
+
+        # Duyệt nhóm nhỏ nhất và kiểm tra trong các nhóm còn lại
+        buckets.sort(key=len)
+        smallest, others = buckets[0], buckets[1:]
+        # Chụp nhóm trước khi duyệt vì luồng khác có thể đang thêm sinh viên
+        return [student_id for student_id in list(smallest)
+                if all(student_id in bucket for bucket in others)]
@@ -0,0 +1,203 @@
+"""
+Chỉ mục MSSV -> vị trí byte của dòng trong file sinh viên CSV, dùng để đọc
+một sinh viên mà không phải nạp cả file.
+
+Chỉ mục được lưu cạnh file CSV (``<file>.idx``) gồm các cặp (MSSV, vị trí) có
+độ rộng cố định, sắp xếp theo MSSV và được tìm nhị phân qua mmap, nên thời
+gian mở không phụ thuộc số sinh viên. Các dòng được ghi nối vào cuối file sau
+khi dựng chỉ mục (RosterWriter) được đọc thêm khi mở; file bị ghi lại toàn bộ
+thì chỉ mục được dựng lại. Mỗi dòng dữ liệu phải nằm trên một dòng của file.
+"""
+from typing import Dict, List, Optional, Tuple
+import csv
+import mmap
+import os
+import struct
+import zlib
+
+from models.student import Student
+from services.csv_importer import STUDENT_COLUMNS, parse_chunk
+
+INDEX_MAGIC = b'DDIDX\0\0\0'
+INDEX_VERSION = 1
+# magic, phiên bản, độ rộng MSSV, số MSSV, inode của file CSV, số byte đã lập chỉ mục, CRC32 đoạn cuối
+_HEADER = struct.Struct('<8sIIQQQI4x')
+_OFFSET = struct.Struct('<Q')
+# Số byte cuối của phần đã lập chỉ mục dùng để nhận ra file bị ghi lại tại chỗ
+CHECK_BYTES = 4096
+# Khi phần ghi nối chưa có trong chỉ mục vượt quá số dòng này thì dựng lại chỉ mục
+TAIL_REBUILD_ROWS = 10_000
+
+
+class StudentOffsetIndex:
+    """Tra vị trí dòng của sinh viên trong file CSV theo MSSV (mở chỉ mục ở lần tra đầu tiên)"""
+
+    def __init__(self, csv_path: str, index_path: Optional[str] = None):
+        self.csv_path = csv_path
+        self.index_path = index_path or f"{csv_path}.idx"
+        self.positions: List[int] = []
+        self._data = b''  # mmap của file chỉ mục, hoặc bytes khi không ghi được file
+        self._file = None
+        self._width = 0
+        self._count = 0
+        self._tail: Dict[str, int] = {}
+        self._opened = False
+
+    def __len__(self) -> int:
+        self._ensure_open()
+        return self._count + len(self._tail)
+
+    def offset(self, student_id: str) -> Optional[int]:
+        """Vị trí byte đầu dòng của sinh viên, None nếu không có"""
+        self._ensure_open()
+        key = student_id.encode('utf-8')
+        if len(key) <= self._width:
+            target = key.ljust(self._width, b'\0')
+            record = self._width + _OFFSET.size
+            data = self._data
+            low, high = 0, self._count
+            while low < high:
+                middle = (low + high) // 2
+                start = _HEADER.size + middle * record
+                if data[start:start + self._width] < target:
+                    low = middle + 1
+                else:
+                    high = middle
+            start = _HEADER.size + low * record
+            if low < self._count and data[start:start + self._width] == target:
+                return _OFFSET.unpack_from(data, start + self._width)[0]
+        return self._tail.get(student_id)
+
+    def read_student(self, student_id: str) -> Optional[Student]:
+        """Đọc đúng một dòng của sinh viên trong file CSV"""
+        for _ in range(2):
+            offset = self.offset(student_id)
+            if offset is None:
+                return None
+            with open(self.csv_path, 'rb') as file:
+                file.seek(offset)
+                line = file.readline().decode('utf-8')
+            parsed, _ = parse_chunk((0, list(csv.reader([line]))), self.positions)
+            if parsed and parsed[0][1][0] == student_id:
+                return Student(*parsed[0][1])
+            # File đã đổi mà chỉ mục chưa biết: dựng lại một lần rồi tra lại
+            self.rebuild()
+        return None
+
+    def rebuild(self) -> None:
+        """Đọc lại cả file CSV và ghi chỉ mục mới"""
+        self.close()
+        self.positions = self._read_header()
+        entries, indexed_size = self._scan(0)
+        self._write(entries, indexed_size)
+        self._tail = {}
+        self._opened = True
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        if self._file is not None:
+            self._file.close()
+        self._data = b''
+        self._file = None
+        self._count = self._width = 0
+        self._opened = False
+
+    def _ensure_open(self) -> None:
+        if self._opened:
+            return
+        self.positions = self._read_header()
+        header = self._load()
+        if header is None:
+            self.rebuild()
+            return
+        tail, _ = self._scan(header[5])
+        if len(tail) > TAIL_REBUILD_ROWS:
+            self.rebuild()
+            return
+        self._tail = {key.decode('utf-8'): offset for key, offset in tail.items()}
+        self._opened = True
+
+    def _read_header(self) -> List[int]:
+        with open(self.csv_path, 'r', encoding='utf-8-sig', newline='') as file:
+            header = [column.strip() for column in next(csv.reader([file.readline()]), [])]
+        missing = [column for column in STUDENT_COLUMNS if column not in header]
+        if missing:
+            raise ValueError(f"File thiếu cột: {', '.join(missing)}")
+        return [header.index(column) for column in STUDENT_COLUMNS]
+
+    def _load(self) -> Optional[Tuple]:
+        """Mở file chỉ mục nếu còn khớp với file CSV, trả về phần đầu của chỉ mục"""
+        try:
+            file = open(self.index_path, 'rb')
+        except OSError:
+            return None
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # file rỗng
+            file.close()
+            return None
+        header = _HEADER.unpack_from(data, 0) if len(data) >= _HEADER.size else None
+        if header is None or header[0] != INDEX_MAGIC or header[1] != INDEX_VERSION or not self._matches(header):
+            data.close()
+            file.close()
+            return None
+        self._file, self._data = file, data
+        self._width, self._count = header[2], header[3]
+        return header
+
+    def _matches(self, header: Tuple) -> bool:
+        _, _, width, count, inode, indexed_size, checksum = header
+        stat = os.stat(self.csv_path)
+        if stat.st_ino != inode or stat.st_size < indexed_size:
+            return False
+        with open(self.csv_path, 'rb') as file:
+            file.seek(max(0, indexed_size - CHECK_BYTES))
+            return zlib.crc32(file.read(min(indexed_size, CHECK_BYTES))) == checksum
+
+    def _scan(self, start: int) -> Tuple[Dict[bytes, int], int]:
+        """MSSV -> vị trí của các dòng từ byte ``start`` (0 = cả file), giữ lần xuất hiện đầu tiên"""
+        position = self.positions[0]
+        entries: Dict[bytes, int] = {}
+        with open(self.csv_path, 'rb') as file:
+            if start == 0:
+                file.readline()
+            else:
+                file.seek(start)
+            offset = file.tell()
+            for line in file:
+                if b'"' in line:
+                    row = next(csv.reader([line.decode('utf-8')]), [])
+                    key = row[position].strip().encode('utf-8') if len(row) > position else b''
+                else:
+                    fields = line.split(b',', position + 1)
+                    key = fields[position].strip() if len(fields) > position else b''
+                if key and key not in entries:
+                    entries[key] = offset
+                offset += len(line)
+        return entries, offset
+
+    def _write(self, entries: Dict[bytes, int], indexed_size: int) -> None:
+        width = max(map(len, entries), default=0)
+        with open(self.csv_path, 'rb') as file:
+            file.seek(max(0, indexed_size - CHECK_BYTES))
+            checksum = zlib.crc32(file.read(min(indexed_size, CHECK_BYTES)))
+        parts = [_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, width, len(entries), os.stat(self.csv_path).st_ino,
+                              indexed_size, checksum)]
+        for key in sorted(entries):
+            parts.append(key.ljust(width, b'\0'))
+            parts.append(_OFFSET.pack(entries[key]))
+        data = b''.join(parts)
+        self._width, self._count = width, len(entries)
+        temp_path = f"{self.index_path}.tmp"
+        try:
+            with open(temp_path, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            # Thư mục chỉ đọc: vẫn dùng chỉ mục trong bộ nhớ cho lần chạy này
+            self._data = data
+            return
+        if self._load() is None:
+            self._data = data
+            self._width, self._count = width, len(entries)
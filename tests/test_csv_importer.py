@@ -0,0 +1,53 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from services.csv_importer import import_students
+
+HEADER = b'ma_sv,ho_ten,lop_hoc,truong,khoa,hoc_ky_nhap_hoc\n'
+
+
+def student_row(index: int) -> bytes:
+    return f'SV{index:04d},Nguyen Van {index},CNTT1,DHBK,CNTT,2023-1\n'.encode('utf-8')
+
+
+class ImportStudentsTest(unittest.TestCase):
+    def import_bytes(self, content: bytes, chunk_size: int = 2):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'wb') as file:
+            file.write(content)
+        self.addCleanup(os.remove, path)
+        students = []
+        result = import_students(path, lambda student: students.append(student) or True, chunk_size)
+        return result, students
+
+    def test_bad_byte_rejects_only_its_row(self):
+        bad = b'SV0003,Nguy\xff Van 3,CNTT1,DHBK,CNTT,2023-1\n'
+        content = HEADER + student_row(1) + student_row(2) + bad + student_row(4) + student_row(5)
+        result, students = self.import_bytes(content)
+        self.assertEqual([student.student_id for student in students], ['SV0001', 'SV0002', 'SV0004', 'SV0005'])
+        self.assertEqual(result.rows, 5)
+        self.assertEqual(result.imported, 4)
+        self.assertEqual([error.line for error in result.errors], [4])
+
+    def test_line_numbers_follow_multiline_fields(self):
+        quoted = b'SV0002,"Nguyen\nVan\n2",CNTT1,DHBK,CNTT,2023-1\n'
+        content = HEADER + student_row(1) + quoted + b'SV0003,,CNTT1,DHBK,CNTT,2023-1\n'
+        result, students = self.import_bytes(content)
+        self.assertEqual(len(students), 2)
+        self.assertEqual([error.line for error in result.errors], [6])
+
+    def test_csv_error_does_not_stop_import(self):
+        limit = csv.field_size_limit()
+        csv.field_size_limit(100)
+        self.addCleanup(csv.field_size_limit, limit)
+        too_long = f'SV0002,{"x" * 200},CNTT1,DHBK,CNTT,2023-1\n'.encode('utf-8')
+        content = HEADER + student_row(1) + too_long + student_row(3)
+        result, students = self.import_bytes(content)
+        self.assertEqual([student.student_id for student in students], ['SV0001', 'SV0003'])
+        self.assertEqual([error.line for error in result.errors], [3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,6 +12,28 @@ CSV_PATHS = {
     "subjects": os.path.join(DATA_DIR, 'mon_hoc.csv')
 }
 
+# Attendance journal paths
+ATTENDANCE_LOG_PATHS = {
+    "log": os.path.join(DATA_DIR, 'diem_danh.log'),
+    "snapshot": os.path.join(DATA_DIR, 'diem_danh_snapshot.tsv')
+}
+
+# Binary snapshot of subjects, students and attendance (loaded with mmap)
+BINARY_SNAPSHOT_PATH = os.path.join(DATA_DIR, 'diem_danh.snap')
+
+# Instrumentation: periodic Prometheus text dump and profiler captures
+METRICS_PATH = os.path.join(DATA_DIR, 'metrics.prom')
+PROFILES_DIR = os.path.join(REPORTS_DIR, 'profiles')
+
+# SQLite storage backend
+SQLITE_PATH = os.path.join(DATA_DIR, 'diem_danh.db')
+
+# Number of journal events between fsync calls
+ATTENDANCE_LOG_SYNC_EVERY = 64
+
+# Number of journal events before the log is compacted into a snapshot
+ATTENDANCE_LOG_COMPACT_EVERY = 100_000
+
 # Subject definitions
 SUBJECTS: Dict[str, str] = {
     'WD102': 'Thiết Kế Web',
@@ -45,5 +67,48 @@ ATTENDANCE_STATUS: Dict[str, str] = {
     "5": "Không phép"
 }
 
+# Reverse lookup: attendance status -> status code
+STATUS_CODES: Dict[str, str] = {status: code for code, status in ATTENDANCE_STATUS.items()}
+
+# Roster persistence: append new students in batches of this size,
+# or after this many seconds since the previous write
+ROSTER_FLUSH_EVERY = 10_000
+ROSTER_FLUSH_INTERVAL = 2.0
+
+# Report cache: number of reports kept and their lifetime in seconds
+REPORT_CACHE_SIZE = 128
+REPORT_CACHE_TTL = 300.0
+
+# Reports covering fewer than this share of all students count each student's
+# rows directly instead of scanning the whole attendance column
+REPORT_SCAN_MIN_SHARE = 0.25
+
+# Write buffer for exported report files, and threads writing reports concurrently
+REPORT_BUFFER_SIZE = 1 << 20
+REPORT_EXPORT_THREADS = 4
+
+# Bulk attendance import: records written to the store and journal per batch
+ATTENDANCE_IMPORT_BATCH_SIZE = 50_000
+
 # Maximum allowed absences
-MAX_ABSENCES = 4
\ No newline at end of file
+MAX_ABSENCES = 4
+
+# A student with at most this many absences left before MAX_ABSENCES is at risk
+AT_RISK_MARGIN = 1
+
+# Maximum number of results returned by a student search
+SEARCH_RESULT_LIMIT = 50
+# Local HTTP service
+HTTP_HOST = '127.0.0.1'
+HTTP_PORT = 8080
+
+# Attendance writes received over HTTP are applied in batches of at most
+# this size, waiting at most this many seconds to fill a batch
+ATTENDANCE_BATCH_SIZE = 512
+ATTENDANCE_BATCH_WINDOW = 0.002
+
+# Instrumentation: latency histogram bucket bounds (seconds), seconds between
+# metric dumps, and allocation sites kept from a tracemalloc capture
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_DUMP_INTERVAL = 60.0
+PROFILE_TOP_ALLOCATIONS = 25